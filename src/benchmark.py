@@ -0,0 +1,444 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import importlib.util
+import logging
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional
+
+import numpy as np
+
+from core.types import InterpolationMethod, TemperatureType, MAX_OBSERVER
+from core.excel_processor import ExcelProcessor
+from core.interpolation import InterpolationEngine
+from core.exporter import export_results, EXPORT_FORMATS
+from core.pipeline import AnalysisPipeline
+from core.aggregation import ResultColumns, parse_rollups
+from core.results_db import ResultsDatabase
+from core.checkpoint import RunCheckpoint
+from core.comparison import COMPARISON_METHODS
+from core.record_store import RecordStore, LABEL_FIELDS
+from utils.synthetic_reports import generate_dataset
+from utils.report_conversion import convert_folder
+
+
+# Slowdowns smaller than this are treated as timer noise
+MIN_REGRESSION_SECONDS = 0.01
+
+# Rollups timed over the pipeline results
+BENCHMARK_ROLLUPS = ('max:subsection', 'p95:subsection+weather', 'mean:scenario')
+
+# Entry points whose import time is measured, and the heavy libraries they
+# must only import when a feature needs them
+STARTUP_MODULES = {'gui': 'gui.main_window', 'cli': 'cli'}
+LAZY_MODULES = ('scipy', 'openpyxl', 'pyarrow', 'pandas')
+
+_STARTUP_SCRIPT = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "seconds = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': seconds, 'eager': sorted(m for m in {lazy!r} if m in sys.modules)}}))\n"
+)
+
+
+class BenchmarkRun:
+    """
+    Times and memory-profiles named stages and collects them for a JSON report.
+    
+    Each stage is timed over `repeat` runs without tracing, keeping the
+    fastest, then run once more under tracemalloc for its peak Python heap
+    use, so tracing overhead never inflates the timings. Work done in
+    worker processes is timed but not traced.
+    """
+    
+    def __init__(self, repeat: int = 1, trace_memory: bool = True):
+        self.repeat = max(repeat, 1)
+        self.trace_memory = trace_memory
+        self.stages: List[Dict[str, Any]] = []
+        self.logger = logging.getLogger("phast-analyzer.benchmark")
+    
+    def stage(self, name: str, func: Callable[[], Any], items: Optional[int] = None, unit: str = "items") -> Any:
+        """
+        Run and record one stage.
+        
+        Args:
+            name: Stage name in the report
+            func: Stage body; its result from the last run is returned
+            items: Work items processed per run, for throughput
+            unit: What the items are (records, rows, files)
+        """
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        
+        peak_bytes = None
+        if self.trace_memory:
+            tracemalloc.start()
+            try:
+                result = func()
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        
+        seconds = min(timings)
+        entry = {
+            'name': name,
+            'seconds': round(seconds, 6),
+            'timings': [round(t, 6) for t in timings],
+            'peak_memory_mb': round(peak_bytes / (1024 * 1024), 3) if peak_bytes is not None else None,
+            'items': items,
+            'unit': unit,
+            'items_per_second': round(items / seconds, 1) if items and seconds > 0 else None
+        }
+        self.stages.append(entry)
+        self.logger.info(
+            f"{name}: {seconds:.3f} s"
+            + (f", {entry['items_per_second']} {unit}/s" if entry['items_per_second'] else "")
+            + (f", peak {entry['peak_memory_mb']} MB" if peak_bytes is not None else "")
+        )
+        return result
+
+
+def environment_info() -> Dict[str, Any]:
+    """Versions and machine details that affect timings."""
+    import scipy
+    import openpyxl
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'openpyxl': openpyxl.__version__
+    }
+
+
+def measure_startup(module: str) -> Optional[Dict[str, Any]]:
+    """
+    Import a module in a fresh interpreter and time it.
+    
+    Returns:
+        Import seconds and the LAZY_MODULES that were imported with it,
+        or None if the module cannot be imported here (no PyQt5, no display)
+    """
+    script = _STARTUP_SCRIPT.format(module=module, lazy=LAZY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        logging.getLogger("phast-analyzer.benchmark").warning(
+            f"Cannot import {module}: {completed.stderr.strip().splitlines()[-1:]}"
+        )
+        return None
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def same_records(a: RecordStore, b: RecordStore) -> bool:
+    """Whether two stores hold the same curves and labels, ignoring source file names."""
+    return (
+        np.array_equal(a.offsets, b.offsets)
+        and np.array_equal(a.distances, b.distances)
+        and np.array_equal(a.temperatures, b.temperatures)
+        and all(a.labels(field) == b.labels(field) for field in LABEL_FIELDS if field != 'source_file')
+    )
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    """Generate the synthetic data set, run every stage and return the report."""
+    run = BenchmarkRun(args.repeat, not args.no_memory)
+    data_dir = Path(args.data_dir) if args.data_dir else Path(tempfile.mkdtemp(prefix="phast-bench-"))
+    temperature_types = list(TemperatureType) if args.include_liquid else [TemperatureType.VAPOUR]
+    targets = args.temperature
+    blocks = args.files * args.sheets * args.blocks
+    
+    # Application start-up; the stage includes starting the interpreter
+    startup = {}
+    for name, module in STARTUP_MODULES.items():
+        result = measure_startup(module)
+        if result is None:
+            continue
+        run.stage(f'startup_{name}', lambda: measure_startup(module), unit="imports")
+        startup[name] = result
+    
+    try:
+        # Data generation is set-up, not a benchmarked stage
+        start = time.perf_counter()
+        generate_dataset(
+            str(data_dir), args.files, args.sheets, args.blocks, args.rows,
+            args.observers, args.extra_columns, args.include_liquid, args.seed
+        )
+        generate_seconds = time.perf_counter() - start
+        
+        def parse(workers: int) -> RecordStore:
+            processor = ExcelProcessor(temperature_types, workers=workers)
+            return processor.process_files(str(data_dir))
+        
+        records = run.stage('parse', lambda: parse(1), blocks, "blocks")
+        if args.workers != 1:
+            run.stage(f'parse_workers_{args.workers}', lambda: parse(args.workers), blocks, "blocks")
+        
+        # The same reports through the other reader backends; conversion is set-up
+        text_dir = Path(tempfile.mkdtemp(prefix="phast-bench-text-"))
+        try:
+            readers = {'openpyxl': data_dir}
+            for reader, extension in (('csv', '.csv'), ('text', '.txt')):
+                convert_folder(str(data_dir), str(text_dir / reader), extension)
+                readers[reader] = text_dir / reader
+            for reader, folder in readers.items():
+                run.stage(
+                    f'parse_reader_{reader}',
+                    lambda: ExcelProcessor(temperature_types, reader=reader).process_files(str(folder)),
+                    blocks, "blocks"
+                )
+        finally:
+            shutil.rmtree(text_dir, ignore_errors=True)
+        
+        for method in InterpolationMethod:
+            run.stage(
+                f'interpolate_{method.name.lower()}',
+                lambda: InterpolationEngine.interpolate_batch(
+                    records.offsets, records.temperatures, records.distances, targets, method
+                ),
+                len(records), "records"
+            )
+        
+        # Every compared method on one shared sort of the records
+        run.stage(
+            'compare_methods',
+            lambda: InterpolationEngine.interpolate_methods(records, targets, COMPARISON_METHODS),
+            len(records) * len(COMPARISON_METHODS), "records"
+        )
+        
+        # Worst case across the observers of every block
+        linear = InterpolationEngine.interpolate_store(records, targets, InterpolationMethod.LINEAR)
+        run.stage(
+            'observer_maximum',
+            lambda: InterpolationEngine.group_maximum(linear, records.group_starts()),
+            len(records), "records"
+        )
+        
+        # Interactive threshold sweep on the envelope cached with the store
+        records.envelope()
+        sweep = np.linspace(-100.0, 20.0, 100)
+        run.stage(
+            'envelope_sweep_100',
+            lambda: InterpolationEngine.interpolate_store(records, sweep, InterpolationMethod.ENVELOPE),
+            len(records) * len(sweep), "queries"
+        )
+        
+        config = {
+            'input_folder': str(data_dir),
+            'temperature_types': [t.value for t in temperature_types],
+            'temperatures_of_interest': targets,
+            'interpolation_method': InterpolationMethod.LINEAR.value,
+            'workers': 1
+        }
+        pipeline = AnalysisPipeline(config)
+        results = pipeline.run()
+        
+        # Grouped worst-case rollups over every result
+        def collect_results() -> ResultColumns:
+            columns = ResultColumns(targets, MAX_OBSERVER)
+            columns.extend(results)
+            return columns
+        
+        columns = run.stage('rollup_collect', collect_results, len(results), "results")
+        rollups = parse_rollups(BENCHMARK_ROLLUPS)
+        run.stage('rollup', lambda: columns.rollups(rollups, 2), len(columns) * len(rollups), "results")
+        
+        output_dir = Path(tempfile.mkdtemp(prefix="phast-bench-out-"))
+        try:
+            # Results database: bulk insert of a study, then a threshold query on its curves
+            def store_study():
+                with ResultsDatabase(str(output_dir / "results.sqlite")) as database:
+                    writer = database.begin_study(str(output_dir / "results.xlsx"), config=config)
+                    writer.add_results(results)
+                    writer.add_curves(records)
+                    writer.commit()
+            
+            run.stage('db_store', store_study, len(results) + len(records), "rows")
+            with ResultsDatabase(str(output_dir / "results.sqlite")) as database:
+                run.stage(
+                    'db_query_curves',
+                    lambda: database.query_curves(-40.0, observer=MAX_OBSERVER, limit=10),
+                    len(records), "curves"
+                )
+            
+            # Checkpoint of a run: journal every file, then restore them as a resumed run would
+            processor = ExcelProcessor(temperature_types)
+            parsed = list(processor.iter_files(processor.find_files(str(data_dir)), root=data_dir))
+            settings = {'parser': processor.cache_namespace, 'input_folder': str(data_dir)}
+            checkpoint_output = str(output_dir / "checkpointed.xlsx")
+            
+            def write_checkpoint():
+                checkpoint = RunCheckpoint.open(checkpoint_output, settings)
+                checkpoint.remove()
+                for file_path, file_data in parsed:
+                    checkpoint.add(file_path, file_data)
+                checkpoint.flush()
+            
+            def restore_checkpoint() -> List[Optional[RecordStore]]:
+                checkpoint = RunCheckpoint.open(checkpoint_output, settings)
+                return [checkpoint.restore(file_path) for file_path, _ in parsed]
+            
+            run.stage('checkpoint_write', write_checkpoint, len(records), "records")
+            restored = run.stage('checkpoint_restore', restore_checkpoint, len(records), "records")
+            checkpoint_matches = all(
+                file_records is not None and same_records(file_records, file_data)
+                and file_records.labels('source_file') == file_data.labels('source_file')
+                for file_records, (_, file_data) in zip(restored, parsed)
+            )
+            
+            for extension, file_format in EXPORT_FORMATS.items():
+                if file_format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+                    continue
+                output_file = str(output_dir / f"results{extension}")
+                run.stage(
+                    f'export_{file_format}',
+                    lambda: export_results(results, output_file, 2, targets),
+                    len(records), "rows"
+                )
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    finally:
+        if not args.data_dir and not args.keep_data:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment_info(),
+        'parameters': {
+            'files': args.files,
+            'sheets': args.sheets,
+            'blocks_per_sheet': args.blocks,
+            'rows_per_block': args.rows,
+            'observers': args.observers,
+            'extra_columns': args.extra_columns,
+            'include_liquid': args.include_liquid,
+            'temperatures_of_interest': targets,
+            'workers': args.workers,
+            'repeat': run.repeat,
+            'seed': args.seed
+        },
+        'records': len(records),
+        'record_store_mb': round(records.nbytes / (1024 * 1024), 3),
+        'generate_seconds': round(generate_seconds, 3),
+        'stages': run.stages,
+        'startup': startup,
+        'checkpoint_resume': checkpoint_matches,
+        'pipeline': pipeline.stats.report()
+    }
+
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare stage timings against a baseline report.
+    
+    Returns:
+        Names of stages slower than the baseline by more than tolerance
+        (a fraction, 0.2 meaning 20 %) and by more than
+        MIN_REGRESSION_SECONDS, so timer noise on tiny stages is ignored
+    """
+    logger = logging.getLogger("phast-analyzer.benchmark")
+    parameters = {k: v for k, v in report['parameters'].items() if k != 'repeat'}
+    baseline_parameters = {k: v for k, v in baseline.get('parameters', {}).items() if k != 'repeat'}
+    if parameters != baseline_parameters:
+        logger.warning("Baseline was recorded with different parameters; ratios may not be comparable")
+    
+    previous = {stage['name']: stage for stage in baseline.get('stages', [])}
+    regressions = []
+    for stage in report['stages']:
+        before = previous.get(stage['name'])
+        if not before or not before['seconds']:
+            continue
+        ratio = stage['seconds'] / before['seconds']
+        logger.info(f"{stage['name']}: {ratio:.2f}x baseline ({before['seconds']:.3f} s -> {stage['seconds']:.3f} s)")
+        if ratio > 1 + tolerance and stage['seconds'] - before['seconds'] > MIN_REGRESSION_SECONDS:
+            regressions.append(stage['name'])
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark parsing, interpolation and export on synthetic PHAST reports"
+    )
+    parser.add_argument('--files', type=int, default=10, help="Synthetic workbooks (default: 10)")
+    parser.add_argument('--sheets', type=int, default=1, help="Worksheets per workbook (default: 1)")
+    parser.add_argument('--blocks', type=int, default=8, help="Dispersion blocks per sheet (default: 8)")
+    parser.add_argument('--rows', type=int, default=200, help="Rows per observer in each block (default: 200)")
+    parser.add_argument('--observers', type=int, default=2, help="Observers per block (default: 2)")
+    parser.add_argument('--extra-columns', type=int, default=0, help="Additional numeric columns per block")
+    parser.add_argument('--include-liquid', action='store_true', help="Add liquid temperatures and parse both types")
+    parser.add_argument(
+        '-t', '--temperature', type=float, nargs='+', default=[-15.0, -40.0],
+        help="Temperatures of interest in degC (default: -15 -40)"
+    )
+    parser.add_argument('-w', '--workers', type=int, default=0, help="Also time parsing with this many workers, 0 for one per core")
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per stage, the fastest is reported")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the synthetic data")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    parser.add_argument('--data-dir', help="Generate the reports here instead of a temporary folder (kept afterwards)")
+    parser.add_argument('--keep-data', action='store_true', help="Keep the temporary reports folder")
+    parser.add_argument('-o', '--output', help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument('--baseline', help="Earlier JSON report to compare timings against")
+    parser.add_argument(
+        '--tolerance', type=float, default=0.2,
+        help="Allowed slowdown against the baseline as a fraction (default: 0.2)"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the benchmarks; exits with 1 if any stage regressed against the
+    baseline, an entry point imports a library that should load lazily or
+    records restored from a checkpoint differ from the parsed ones.
+    """
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("core").setLevel(logging.WARNING)
+    
+    report = run_benchmarks(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    
+    logger = logging.getLogger("phast-analyzer.benchmark")
+    status = 0
+    for name, result in report['startup'].items():
+        if result['eager']:
+            logger.error(f"Starting the {name} imports {', '.join(result['eager'])}")
+            status = 1
+    if not report['checkpoint_resume']:
+        logger.error("Records restored from a checkpoint differ from the parsed records")
+        status = 1
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        if regressions:
+            logger.error(f"Slower than baseline: {', '.join(regressions)}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,332 @@
+import os
+import sys
+import csv
+import argparse
+import signal
+import logging
+from typing import List, Dict, Any, Optional
+
+from core.types import TemperatureType, InterpolationMethod, ObserverSelection
+from core.pipeline import AnalysisPipeline
+from core.exporter import export_format
+from core.readers import reader_names
+from core.aggregation import parse_rollups
+from core.comparison import COMPARISON_METHODS, DEFAULT_TOLERANCE
+from core.results_db import ResultsDatabase
+from core.watcher import FolderWatcher, WATCH_BACKENDS, SETTLE_SECONDS, POLL_SECONDS, WATCH_QUEUE_SIZE
+
+
+METHOD_CHOICES = {method.name.lower(): method for method in InterpolationMethod}
+TEMPERATURE_TYPE_CHOICES = {t.name.lower(): [t] for t in TemperatureType}
+TEMPERATURE_TYPE_CHOICES['both'] = list(TemperatureType)
+OBSERVER_CHOICES = {'all': ObserverSelection.ALL, 'max': ObserverSelection.MAXIMUM, 'first': ObserverSelection.FIRST}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        description="PHAST Temperature Dispersion Analyser (headless batch runner)"
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+    
+    run_parser = subparsers.add_parser('run', help="Analyse a folder of PHAST dispersion reports")
+    add_analysis_arguments(run_parser)
+    run_parser.add_argument(
+        '--incremental', action='store_true',
+        help="Only analyse files added or changed since the last run and update the output in place"
+    )
+    run_parser.add_argument(
+        '--no-checkpoint', action='store_true',
+        help="Do not journal parsed files next to the output, so an interrupted run cannot resume"
+    )
+    run_parser.add_argument(
+        '--partial', metavar='FILE',
+        help="Where SIGUSR1 writes the results analysed so far (default: the output name with .partial)"
+    )
+    run_parser.add_argument(
+        '--stats', metavar='FILE',
+        help="Write a JSON report of stage and per-file timings, counts and peak memory"
+    )
+    run_parser.add_argument(
+        '--profile', metavar='FILE',
+        help="Dump a cProfile profile of the run (parses in a single process) and a text summary"
+    )
+    run_parser.set_defaults(handler=run_command)
+    
+    watch_parser = subparsers.add_parser(
+        'watch', help="Keep the output up to date while reports arrive in the input folder"
+    )
+    add_analysis_arguments(watch_parser)
+    watch_parser.add_argument(
+        '--settle', type=float, default=SETTLE_SECONDS, metavar='SECONDS',
+        help=f"Seconds a report must stay unchanged before it is analysed (default: {SETTLE_SECONDS:g})"
+    )
+    watch_parser.add_argument(
+        '--backend', choices=WATCH_BACKENDS, default='auto',
+        help="File change notifications from the operating system (native, needs watchdog), "
+             "folder scans (poll), or native when available (auto, the default)"
+    )
+    watch_parser.add_argument(
+        '--poll-interval', type=float, default=POLL_SECONDS, metavar='SECONDS',
+        help=f"Seconds between folder scans when polling (default: {POLL_SECONDS:g})"
+    )
+    watch_parser.add_argument(
+        '--queue-size', type=int, default=WATCH_QUEUE_SIZE,
+        help=f"File events buffered before the watcher waits for the analysis (default: {WATCH_QUEUE_SIZE})"
+    )
+    watch_parser.set_defaults(handler=watch_command)
+    
+    query_parser = subparsers.add_parser(
+        'query', help="Search the results stored with --db across studies, furthest distance first"
+    )
+    query_parser.add_argument('database', help="SQLite database written with --db")
+    query_parser.add_argument('-t', '--temperature', type=float, help="Temperature of interest in degC")
+    query_parser.add_argument(
+        '--equipment', metavar='PATTERN',
+        help="Equipment item (subsection), exact or with * and ? wildcards, e.g. '*LNG*pump*'"
+    )
+    query_parser.add_argument('--scenario', metavar='PATTERN', help="Scenario, exact or with wildcards")
+    query_parser.add_argument('--weather', metavar='PATTERN', help="Weather, exact or with wildcards")
+    query_parser.add_argument(
+        '--temperature-type', choices=[t.name.lower() for t in TemperatureType], help="Centreline temperature"
+    )
+    query_parser.add_argument('--observer', help="Observer number, or Max for the worst case across observers")
+    query_parser.add_argument('--study', metavar='PATTERN', help="Study name, exact or with wildcards")
+    query_parser.add_argument('--since', metavar='DATE', help="Only studies updated on or after this date (YYYY-MM-DD)")
+    query_parser.add_argument(
+        '--from-curves', action='store_true',
+        help="Interpolate the temperature on the stored curves instead of reading stored results, "
+             "for thresholds that were not analysed"
+    )
+    query_parser.add_argument(
+        '-m', '--method', choices=sorted(METHOD_CHOICES), default='linear',
+        help="Interpolation method with --from-curves (default: linear)"
+    )
+    query_parser.add_argument(
+        '-n', '--limit', type=int, default=20, help="Rows to show, 0 for all (default: 20)"
+    )
+    query_parser.add_argument('-o', '--output', metavar='FILE', help="Write the rows to a CSV file instead")
+    query_parser.add_argument('--studies', action='store_true', help="List the stored studies instead")
+    query_parser.add_argument('-v', '--verbose', action='store_true', help="Log progress")
+    query_parser.set_defaults(handler=query_command)
+    
+    return parser
+
+
+def add_analysis_arguments(parser: argparse.ArgumentParser):
+    """Add the input, analysis and export options shared by the run and watch commands."""
+    parser.add_argument('-i', '--input', required=True, help="Folder containing the reports")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Also search subfolders of the input folder")
+    parser.add_argument(
+        '--include', nargs='+', metavar='PATTERN',
+        help="File name patterns to analyse (default: *.xlsx *.xls *.csv *.txt)"
+    )
+    parser.add_argument(
+        '--exclude', nargs='+', metavar='PATTERN',
+        help="File or folder patterns to skip, matched against names and paths relative to the input folder"
+    )
+    parser.add_argument(
+        '--reader', choices=['auto'] + reader_names(), default='auto',
+        help="Backend used to read the reports (default: the fastest one available for each file)"
+    )
+    parser.add_argument('-o', '--output', required=True, help="Output file (.xlsx, .csv or .parquet)")
+    parser.add_argument(
+        '--temperature-type', choices=sorted(TEMPERATURE_TYPE_CHOICES), default='vapour',
+        help="Centreline temperature to analyse (default: vapour)"
+    )
+    parser.add_argument(
+        '-t', '--temperature', type=float, nargs='+', required=True,
+        help="One or more temperatures of interest in degC"
+    )
+    parser.add_argument(
+        '-m', '--method', choices=sorted(METHOD_CHOICES), default='linear',
+        help="Interpolation method (default: linear)"
+    )
+    parser.add_argument(
+        '--observers', choices=list(OBSERVER_CHOICES), default='all',
+        help="Report every observer and the furthest distance across them (all), only the furthest (max) "
+             "or only observer 1 (first) (default: all)"
+    )
+    parser.add_argument(
+        '--decimal-places', type=int, default=2, help="Decimal places in the export (default: 2)"
+    )
+    parser.add_argument(
+        '--rollup', metavar='SPEC', nargs='+', default=[],
+        help="Add a sheet of grouped distances per SPEC, written reduction:field+field, e.g. max:subsection "
+             "or p95:subsection+weather (reductions: max, min, mean, median, pNN)"
+    )
+    parser.add_argument(
+        '--compare', nargs='*', choices=sorted(METHOD_CHOICES), metavar='METHOD',
+        help="Add a sheet comparing the distances of several interpolation methods and their spread "
+             "(default: linear cubic quadratic nearest)"
+    )
+    parser.add_argument(
+        '--compare-tolerance', type=float, default=DEFAULT_TOLERANCE, metavar='METRES',
+        help=f"Flag records whose methods differ by more than this (default: {DEFAULT_TOLERANCE:g})"
+    )
+    parser.add_argument(
+        '--db', metavar='FILE',
+        help="Also store the results and parsed curves in this SQLite database, for the query command"
+    )
+    parser.add_argument(
+        '--study', metavar='NAME', help="Study name in the database (default: the output file name)"
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, default=0,
+        help="Worker processes for parsing, 0 for one per CPU core (default: 0)"
+    )
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the parse cache")
+    parser.add_argument(
+        '--cache-max-mb', type=int, default=512, help="Parse cache size limit in MB (default: 512)"
+    )
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log every processed file")
+
+
+def analysis_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """Validate the shared options and build the pipeline configuration."""
+    if not os.path.isdir(args.input):
+        raise ValueError(f"Input folder does not exist: {args.input}")
+    export_format(args.output)
+    parse_rollups(args.rollup)
+    compare_methods = None
+    if args.compare is not None:
+        methods = [METHOD_CHOICES[name] for name in args.compare] or list(COMPARISON_METHODS)
+        compare_methods = [method.value for method in dict.fromkeys(methods)]
+        if len(compare_methods) < 2:
+            raise ValueError("--compare needs at least two interpolation methods")
+    
+    return {
+        'input_folder': args.input,
+        'recursive': args.recursive,
+        'include_patterns': args.include,
+        'exclude_patterns': args.exclude,
+        'reader': args.reader,
+        'output_file': args.output,
+        'temperature_types': [t.value for t in TEMPERATURE_TYPE_CHOICES[args.temperature_type]],
+        'temperatures_of_interest': list(dict.fromkeys(args.temperature)),
+        'interpolation_method': METHOD_CHOICES[args.method].value,
+        'observer_selection': OBSERVER_CHOICES[args.observers].value,
+        'verbose': args.verbose,
+        'decimal_places': args.decimal_places,
+        'rollups': args.rollup,
+        'compare_methods': compare_methods,
+        'compare_tolerance': args.compare_tolerance,
+        'results_db': args.db,
+        'study_name': args.study,
+        'workers': args.workers,
+        'use_cache': not args.no_cache,
+        'cache_max_mb': args.cache_max_mb
+    }
+
+
+def run_command(args: argparse.Namespace) -> int:
+    """Run an analysis and export the results, returning the exit code."""
+    config = analysis_config(args)
+    config['incremental'] = args.incremental
+    config['checkpoint'] = not args.no_checkpoint
+    config['stats_file'] = args.stats
+    config['profile_file'] = args.profile
+    
+    logger = logging.getLogger("phast-analyzer")
+    pipeline = AnalysisPipeline(config, status_callback=logger.info)
+    if hasattr(signal, 'SIGUSR1'):
+        base, ext = os.path.splitext(args.output)
+        partial_file = args.partial or f"{base}.partial{ext}"
+        export_format(partial_file)
+        
+        def request_partial(*_):
+            try:
+                pipeline.request_partial_export(partial_file)
+            except ValueError as e:
+                logger.error(f"Cannot export partial results: {e}")
+        
+        # kill -USR1 <pid> exports the results so far without stopping the run
+        signal.signal(signal.SIGUSR1, request_partial)
+    pipeline.run_export()
+    return 0
+
+
+def watch_command(args: argparse.Namespace) -> int:
+    """Watch the input folder and update the output as reports change, until interrupted."""
+    config = analysis_config(args)
+    logger = logging.getLogger("phast-analyzer")
+    watcher = FolderWatcher(
+        config,
+        status_callback=logger.info,
+        settle_seconds=args.settle,
+        poll_seconds=args.poll_interval,
+        backend=args.backend,
+        queue_size=args.queue_size
+    )
+    
+    # Ctrl+C and service managers stop the watcher cleanly, cancelling a run in progress
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: watcher.stop())
+    watcher.run()
+    return 0
+
+
+def query_command(args: argparse.Namespace) -> int:
+    """Print or save rows from a results database."""
+    if not os.path.exists(args.database):
+        raise ValueError(f"Results database does not exist: {args.database}")
+    if args.from_curves and args.temperature is None:
+        raise ValueError("--from-curves needs a temperature (-t)")
+    
+    filters = {
+        'equipment': args.equipment,
+        'scenario': args.scenario,
+        'weather': args.weather,
+        'temperature_type': TemperatureType[args.temperature_type.upper()].value if args.temperature_type else None,
+        'observer': args.observer,
+    }
+    limit = args.limit or None
+    with ResultsDatabase(args.database) as database:
+        if args.studies:
+            rows = database.studies()
+        elif args.from_curves:
+            rows = database.query_curves(
+                args.temperature, METHOD_CHOICES[args.method], args.study, args.since, limit, **filters
+            )
+        else:
+            rows = database.query_results(args.temperature, args.study, args.since, limit, **filters)
+    
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            _write_rows(f, rows, ',')
+        logging.getLogger("phast-analyzer").info(f"Wrote {len(rows)} rows to {args.output}")
+    else:
+        _write_rows(sys.stdout, rows, '\t')
+    return 0
+
+
+def _write_rows(f, rows: List[Dict[str, Any]], delimiter: str):
+    if not rows:
+        return
+    writer = csv.writer(f, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(list(rows[0]))
+    for row in rows:
+        writer.writerow(row.values())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose or args.command == 'watch' else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+    
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        logging.getLogger("phast-analyzer").error("Analysis interrupted")
+        return 130
+    except Exception as e:
+        logging.getLogger("phast-analyzer").error(f"Analysis failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,258 @@
+import re
+from array import array
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Sequence, Tuple
+
+import numpy as np
+
+from core.types import AnalysisResult
+
+
+# AnalysisResult fields results can be grouped by, with their column headers
+ROLLUP_FIELDS = {
+    'subsection': 'Subsection',
+    'scenario': 'Scenario',
+    'weather': 'Weather',
+    'temperature_type': 'Temperature Type',
+    'observer': 'Observer',
+    'source_file': 'Source File',
+}
+
+FIELD_ALIASES = {'equipment': 'subsection', 'equipment_item': 'subsection', 'file': 'source_file'}
+
+REDUCTION_PATTERN = re.compile(r'(max|min|mean|median|p(\d{1,2}(?:\.\d+)?|100))\Z')
+
+# Excel limits sheet names to 31 characters and forbids []:*?/\
+MAX_SHEET_NAME = 31
+SHEET_NAME_FORBIDDEN = re.compile(r'[\[\]:*?/\\]')
+
+# (title, header, rows) of a rollup, as written by the exporter
+RollupTable = Tuple[str, List[str], List[List[Any]]]
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    """
+    One grouped reduction of the results, e.g. the maximum distance per subsection.
+    
+    Written as "reduction:field+field", for example "max:subsection",
+    "p95:subsection+weather" or "min:scenario". Reductions are max, min,
+    mean, median and pNN percentiles; fields are the keys of ROLLUP_FIELDS
+    ("equipment" is accepted for subsection). Without fields ("max:") the
+    reduction runs over every result.
+    """
+    reduction: str
+    fields: Tuple[str, ...]
+    
+    @classmethod
+    def parse(cls, text: str) -> 'RollupSpec':
+        """
+        Raises:
+            ValueError: If the reduction or a field is not recognised
+        """
+        reduction, _, fields = text.strip().lower().partition(':')
+        reduction = 'p50' if reduction == 'median' else reduction
+        if not REDUCTION_PATTERN.match(reduction):
+            raise ValueError(
+                f"Unknown rollup reduction '{reduction}' in '{text}'; use max, min, mean, median or pNN"
+            )
+        
+        names = []
+        for name in filter(None, (field.strip() for field in fields.split('+'))):
+            name = FIELD_ALIASES.get(name, name)
+            if name not in ROLLUP_FIELDS:
+                raise ValueError(
+                    f"Unknown rollup field '{name}' in '{text}'; use one of {', '.join(ROLLUP_FIELDS)}"
+                )
+            if name not in names:
+                names.append(name)
+        return cls(reduction, tuple(names))
+    
+    def __str__(self) -> str:
+        return f"{self.reduction}:{'+'.join(self.fields)}"
+    
+    @property
+    def title(self) -> str:
+        """Sheet title, e.g. 'Max by Subsection, Weather'."""
+        if not self.fields:
+            return f"{self.reduction.capitalize()} overall"
+        return f"{self.reduction.capitalize()} by {', '.join(ROLLUP_FIELDS[field] for field in self.fields)}"
+    
+    @property
+    def percentile(self) -> Optional[float]:
+        return float(self.reduction[1:]) if self.reduction.startswith('p') else None
+
+
+def parse_rollups(texts: Iterable[str]) -> List[RollupSpec]:
+    """Parse rollup specs, dropping duplicates; see RollupSpec."""
+    specs: List[RollupSpec] = []
+    for text in texts:
+        spec = RollupSpec.parse(text)
+        if spec not in specs:
+            specs.append(spec)
+    return specs
+
+
+class ResultColumns:
+    """
+    Analysis results accumulated as columns for grouped reductions.
+    
+    Each result is stored as a block number (its distinct combination of
+    labels, whose fields are coded once), a threshold index and a distance
+    in compact arrays, so a rollup over hundreds of thousands of results is
+    a handful of NumPy sorts rather than a Python loop per group.
+    
+    Only results for the given observer are kept when one is set, so each
+    dispersion block counts once (for example only the 'Max' results when
+    the worst case across observers is reported).
+    """
+    
+    def __init__(self, thresholds: Sequence[float], observer: Optional[str] = None):
+        self.thresholds = list(thresholds)
+        self.observer = observer
+        self._threshold_index = {threshold: i for i, threshold in enumerate(self.thresholds)}
+        # Each distinct combination of labels is a block; its field codes are stored once
+        self._blocks: Dict[tuple, int] = {}
+        self._block_codes = {field: array('i') for field in ROLLUP_FIELDS}
+        self._index: Dict[str, Dict[str, int]] = {field: {} for field in ROLLUP_FIELDS}
+        self._block = array('i')
+        self._thresholds = array('i')
+        self._distances = array('d')
+    
+    def __len__(self) -> int:
+        return len(self._distances)
+    
+    def add(self, result: AnalysisResult):
+        if self.observer is not None and result.observer != self.observer:
+            return
+        threshold = self._threshold_index.get(result.temperature_of_interest)
+        if threshold is None:
+            threshold = self._threshold_index[result.temperature_of_interest] = len(self.thresholds)
+            self.thresholds.append(result.temperature_of_interest)
+        
+        # In ROLLUP_FIELDS order
+        labels = (result.subsection, result.scenario, result.weather,
+                  result.temperature_type, result.observer, result.source_file)
+        block = self._blocks.get(labels)
+        if block is None:
+            block = self._blocks[labels] = len(self._blocks)
+            for field, label in zip(ROLLUP_FIELDS, labels):
+                index = self._index[field]
+                self._block_codes[field].append(index.setdefault(label, len(index)))
+        self._block.append(block)
+        self._thresholds.append(threshold)
+        self._distances.append(result.downwind_distance)
+    
+    def extend(self, results: Iterable[AnalysisResult]):
+        for result in results:
+            self.add(result)
+    
+    def collect(self, results: Iterable[AnalysisResult]) -> Iterator[AnalysisResult]:
+        """Yield results unchanged while adding them, so a stream can be rolled up as it is exported."""
+        for result in results:
+            self.add(result)
+            yield result
+    
+    def codes(self, field: str) -> np.ndarray:
+        """Code of every result's label for a field, indexing categories(field)."""
+        if not len(self):
+            return np.zeros(0, dtype=np.int32)
+        block_codes = np.frombuffer(self._block_codes[field], dtype=np.int32)
+        return block_codes[np.frombuffer(self._block, dtype=np.int32)]
+    
+    def categories(self, field: str) -> List[str]:
+        return list(self._index[field])
+    
+    def rollup(self, spec: RollupSpec, decimal_places: Optional[int] = None) -> RollupTable:
+        """
+        Reduce the distances per group of the spec's fields, one column per threshold.
+        
+        Groups appear in the order their first result was added. A group
+        without a result for a threshold gets None in that column.
+        Percentiles interpolate linearly between results, as numpy.percentile.
+        
+        Returns:
+            (title, header, rows)
+        """
+        n_thresholds = max(len(self.thresholds), 1)
+        distances = np.frombuffer(self._distances, dtype=np.float64) if len(self) else np.empty(0)
+        thresholds = np.frombuffer(self._thresholds, dtype=np.int32) if len(self) else np.zeros(0, dtype=np.int32)
+        
+        # Number the groups in order of appearance from a mixed-radix key over the field codes
+        key = np.zeros(len(self), dtype=np.int64)
+        codes = {field: self.codes(field) for field in spec.fields}
+        for field in spec.fields:
+            key = key * max(len(self._index[field]), 1) + codes[field]
+        group_keys, first, groups = np.unique(key, return_index=True, return_inverse=True)
+        appearance = np.argsort(first, kind='stable')
+        rank = np.empty_like(appearance)
+        rank[appearance] = np.arange(len(appearance))
+        groups = rank[groups.reshape(-1)]
+        
+        cells = _reduce(groups * n_thresholds + thresholds, distances, len(group_keys) * n_thresholds, spec)
+        cells = cells.reshape(len(group_keys), n_thresholds)
+        
+        header = [ROLLUP_FIELDS[field] for field in spec.fields] + [
+            f'Downwind Distance at {threshold}°C (m)' for threshold in self.thresholds
+        ]
+        labels = {field: self.categories(field) for field in spec.fields}
+        first_rows = first[appearance]
+        rows = []
+        for group, row in enumerate(first_rows):
+            values: List[Any] = [labels[field][codes[field][row]] for field in spec.fields]
+            for value in cells[group]:
+                if np.isnan(value):
+                    values.append(None)
+                else:
+                    values.append(round(float(value), decimal_places) if decimal_places is not None else float(value))
+            rows.append(values)
+        return spec.title, header, rows
+    
+    def rollups(self, specs: Sequence[RollupSpec], decimal_places: Optional[int] = None) -> List[RollupTable]:
+        """Compute several rollups, giving them distinct sheet titles."""
+        tables = []
+        titles = set()
+        for spec in specs:
+            title, header, rows = self.rollup(spec, decimal_places)
+            title = _sheet_name(title, titles)
+            titles.add(title)
+            tables.append((title, header, rows))
+        return tables
+
+
+def _reduce(cells: np.ndarray, values: np.ndarray, n_cells: int, spec: RollupSpec) -> np.ndarray:
+    """Reduce values per cell index with a single sort; NaN for cells without values."""
+    out = np.full(n_cells, np.nan)
+    if len(values) == 0:
+        return out
+    
+    order = np.lexsort((values, cells))
+    cells, values = cells[order], values[order]
+    starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+    ends = np.r_[starts[1:], len(cells)]
+    present = cells[starts]
+    
+    if spec.reduction == 'max':
+        out[present] = values[ends - 1]
+    elif spec.reduction == 'min':
+        out[present] = values[starts]
+    elif spec.reduction == 'mean':
+        out[present] = np.add.reduceat(values, starts) / (ends - starts)
+    else:
+        position = (ends - starts - 1) * (spec.percentile / 100.0)
+        below = np.floor(position).astype(np.int64)
+        above = np.ceil(position).astype(np.int64)
+        low, high = values[starts + below], values[starts + above]
+        out[present] = low + (high - low) * (position - below)
+    return out
+
+
+def _sheet_name(title: str, taken: set) -> str:
+    """Make a title a valid Excel sheet name that is not taken yet."""
+    name = SHEET_NAME_FORBIDDEN.sub('-', title)[:MAX_SHEET_NAME]
+    candidate, number = name, 2
+    while candidate in taken:
+        suffix = f" ({number})"
+        candidate = name[:MAX_SHEET_NAME - len(suffix)] + suffix
+        number += 1
+    return candidate
\ No newline at end of file
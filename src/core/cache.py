@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from core.record_store import RecordStore, ARCHIVE_ERRORS
+
+
+def default_cache_dir() -> Path:
+    """Return the per-user cache directory for parsed report data."""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME')
+    root = Path(base) if base else Path.home() / ".cache"
+    return root / "phast-analyzer" / "parse-cache"
+
+
+def file_content_hash(file_path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of ExcelProcessor output, one entry per parsed file.
+    
+    Entries are RecordStore archives holding the flattened distance and
+    temperature arrays, record offsets and the equipment/scenario/weather
+    and temperature type labels. They are keyed by file path, size, mtime
+    and content hash within a namespace. The processor builds the namespace
+    from the parser version and the temperature types being extracted, so a
+    change to either never reuses stale entries. The cache is bounded in
+    size and evicts the least recently used entries first.
+    """
+    
+    INDEX_FILE = "index.json"
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self._index = self._load_index()
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._dirty = False
+    
+    def get(self, file_path: Path, namespace: str) -> Optional[RecordStore]:
+        """Return the cached records for a file, or None if it has no valid entry."""
+        key, size, mtime_ns = self._file_key(file_path, namespace)
+        known = self._index['files'].get(key)
+        
+        if known and known['size'] == size and known['mtime_ns'] == mtime_ns:
+            entry = known['entry']
+        else:
+            # Size or mtime changed, so fall back to the content hash
+            content_hash = self._content_hash(file_path, size, mtime_ns)
+            entry = self._entry_name(namespace, content_hash)
+            if entry not in self._index['entries']:
+                return None
+            self._index['files'][key] = {
+                'size': size, 'mtime_ns': mtime_ns, 'hash': content_hash, 'entry': entry
+            }
+        
+        if entry not in self._index['entries']:
+            return None
+        
+        try:
+            records = self._read_entry(self.cache_dir / entry)
+        except ARCHIVE_ERRORS as e:
+            self.logger.warning(f"Discarding unreadable cache entry {entry}: {e}")
+            self._remove_entry(entry)
+            return None
+        
+        self._index['entries'][entry]['last_used'] = time.time()
+        self._dirty = True
+        return records
+    
+    def put(self, file_path: Path, namespace: str, records: RecordStore):
+        """Store the parsed records for a file and evict old entries if needed."""
+        key, size, mtime_ns = self._file_key(file_path, namespace)
+        content_hash = self._content_hash(file_path, size, mtime_ns)
+        entry = self._entry_name(namespace, content_hash)
+        
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_path = self.cache_dir / entry
+        self._write_entry(entry_path, records)
+        
+        self._index['entries'][entry] = {
+            'bytes': entry_path.stat().st_size,
+            'last_used': time.time()
+        }
+        self._index['files'][key] = {
+            'size': size, 'mtime_ns': mtime_ns, 'hash': content_hash, 'entry': entry
+        }
+        self._dirty = True
+        self._evict()
+    
+    def flush(self):
+        """Write the cache index to disk if it has changed."""
+        if not self._dirty:
+            return
+        
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        index_path = self.cache_dir / self.INDEX_FILE
+        tmp_path = index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, index_path)
+        self._dirty = False
+    
+    def clear(self) -> int:
+        """Remove every cache entry and return the number of bytes freed."""
+        freed = self.size_bytes()
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
+        self._index = {'entries': {}, 'files': {}}
+        self._hashes.clear()
+        self._dirty = False
+        return freed
+    
+    def size_bytes(self) -> int:
+        """Return the total size of all cache entries."""
+        return sum(info['bytes'] for info in self._index['entries'].values())
+    
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        index_path = self.cache_dir / self.INDEX_FILE
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if 'entries' in index and 'files' in index:
+                return index
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring corrupt cache index {index_path}: {e}")
+        return {'entries': {}, 'files': {}}
+    
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its size limit."""
+        entries = self._index['entries']
+        total = self.size_bytes()
+        for entry in sorted(entries, key=lambda name: entries[name]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= entries[entry]['bytes']
+            self._remove_entry(entry)
+    
+    def _remove_entry(self, entry: str):
+        self._index['entries'].pop(entry, None)
+        self._index['files'] = {
+            key: info for key, info in self._index['files'].items() if info['entry'] != entry
+        }
+        try:
+            (self.cache_dir / entry).unlink()
+        except FileNotFoundError:
+            pass
+        self._dirty = True
+    
+    def _content_hash(self, file_path: Path, size: int, mtime_ns: int) -> str:
+        memo_key = (str(file_path), size, mtime_ns)
+        if memo_key not in self._hashes:
+            self._hashes[memo_key] = file_content_hash(file_path)
+        return self._hashes[memo_key]
+    
+    @staticmethod
+    def _file_key(file_path: Path, namespace: str) -> Tuple[str, int, int]:
+        stat = file_path.stat()
+        return f"{namespace}|{file_path.resolve()}", stat.st_size, stat.st_mtime_ns
+    
+    @staticmethod
+    def _entry_name(namespace: str, content_hash: str) -> str:
+        return f"{namespace}-{content_hash}.npz"
+    
+    @staticmethod
+    def _write_entry(entry_path: Path, store: RecordStore):
+        tmp_path = entry_path.with_suffix('.tmp.npz')
+        store.save(tmp_path)
+        os.replace(tmp_path, entry_path)
+    
+    @staticmethod
+    def _read_entry(entry_path: Path) -> RecordStore:
+        return RecordStore.load(entry_path)
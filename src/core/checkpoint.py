@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import shutil
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Iterator, Tuple
+
+import numpy as np
+
+from core.record_store import RecordStore, ARCHIVE_ERRORS
+
+
+# Seconds between two writes of the parsed records to the checkpoint
+CHECKPOINT_SECONDS = 30.0
+
+JOURNAL_FILE = "journal.jsonl"
+
+
+class RunCheckpoint:
+    """
+    Journal of the files a run has parsed, so an interrupted run can resume.
+    
+    Kept in a folder next to the output file (results.xlsx.checkpoint).
+    Parsed records are buffered and written every interval seconds as one
+    RecordStore archive per batch; only once the archive is on disk is a
+    journal line naming its files, with their size and mtime, appended.
+    A crash or failed export therefore loses at most the last interval of
+    parsing, and never leaves the journal pointing at a partial archive.
+    
+    The journal starts with the settings records depend on (parser version,
+    temperature types, input folder). A later run with the same settings
+    takes every file that is unchanged since it was journaled from the
+    checkpoint instead of parsing it again, whatever its thresholds or
+    interpolation method; other settings start a fresh checkpoint. The
+    checkpoint is removed once the run's results have been exported.
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        settings: Dict[str, Any],
+        interval: float = CHECKPOINT_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.path = Path(path)
+        self.settings = settings
+        self.interval = interval
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+        # Absolute file path -> (size, mtime_ns, source_file label, batch archive)
+        self.files: Dict[str, Tuple[int, int, str, str]] = {}
+        self._buffer: List[Tuple[str, Tuple[int, int], RecordStore]] = []
+        self._batches = 0
+        self._last_flush = clock()
+        self._loaded: Optional[Tuple[str, RecordStore, Dict[str, np.ndarray]]] = None
+    
+    @staticmethod
+    def path_for(output_file: str) -> Path:
+        return Path(str(output_file) + ".checkpoint")
+    
+    @classmethod
+    def open(
+        cls,
+        output_file: str,
+        settings: Dict[str, Any],
+        interval: float = CHECKPOINT_SECONDS
+    ) -> 'RunCheckpoint':
+        """Open the checkpoint of an output file, resuming it if its settings match."""
+        checkpoint = cls(cls.path_for(output_file), settings, interval)
+        journal = checkpoint.path / JOURNAL_FILE
+        try:
+            with open(journal, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            lines = []
+        
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # The last line may be cut short by a crash; it has no archive behind it
+                break
+        
+        if entries and entries[0].get('settings') == settings:
+            for entry in entries[1:]:
+                for file_path, (size, mtime_ns, label) in entry['files'].items():
+                    checkpoint.files[file_path] = (size, mtime_ns, label, entry['batch'])
+            checkpoint._batches = len(entries) - 1
+        else:
+            checkpoint.remove()
+        return checkpoint
+    
+    def __len__(self) -> int:
+        return len(self.files) + len(self._buffer)
+    
+    def restore(self, file_path: Path) -> Optional[RecordStore]:
+        """Return the journaled records of a file, or None if it is not journaled or has changed."""
+        entry = self.files.get(str(Path(file_path).absolute()))
+        if entry is None or _signature(file_path) != entry[:2]:
+            return None
+        size, mtime_ns, label, batch = entry
+        try:
+            records, indices = self._load_batch(batch)
+        except ARCHIVE_ERRORS as e:
+            self._discard_batch(batch, e)
+            return None
+        return records.subset(indices.get(label, np.zeros(0, dtype=np.int64)))
+    
+    def add(self, file_path: Path, records: RecordStore):
+        """
+        Record a parsed file; the buffer is written once the interval has passed.
+        
+        Files without records are not journaled, so a file that failed to
+        parse, perhaps because it was still locked, is tried again.
+        """
+        file_path = str(Path(file_path).absolute())
+        signature = _signature(Path(file_path))
+        if signature is None or len(records) == 0:
+            return
+        entry = self.files.get(file_path)
+        if entry is not None and entry[:2] == signature:
+            return
+        self._buffer.append((file_path, signature, records))
+        if self.clock() - self._last_flush >= self.interval:
+            self.flush()
+    
+    def flush(self):
+        """Write the buffered records as a new batch and journal it."""
+        self._last_flush = self.clock()
+        if not self._buffer:
+            return
+        
+        buffer, self._buffer = self._buffer, []
+        batch = f"batch-{self._batches:06d}.npz"
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            journal = self.path / JOURNAL_FILE
+            if not journal.exists():
+                self._append(journal, {'settings': self.settings})
+            
+            tmp_path = self.path / (batch + ".tmp")
+            RecordStore.concat([records for _, _, records in buffer]).save(tmp_path)
+            os.replace(tmp_path, self.path / batch)
+            files = {
+                file_path: [signature[0], signature[1], records.label('source_file', 0)]
+                for file_path, signature, records in buffer
+            }
+            self._append(journal, {'batch': batch, 'files': files})
+        except OSError as e:
+            # Checkpoints only save work; a full disk must not fail the run
+            self.logger.warning(f"Could not write checkpoint {self.path}: {e}")
+            return
+        
+        self._batches += 1
+        for file_path, (size, mtime_ns, label) in files.items():
+            self.files[file_path] = (size, mtime_ns, label, batch)
+    
+    def iter_records(self) -> Iterator[RecordStore]:
+        """Yield the records of every journaled file, one batch at a time, after flushing."""
+        self.flush()
+        batches = list(dict.fromkeys(entry[3] for entry in self.files.values()))
+        for batch in batches:
+            try:
+                records, indices = self._load_batch(batch)
+            except ARCHIVE_ERRORS as e:
+                self._discard_batch(batch, e)
+                continue
+            labels = [entry[2] for entry in self.files.values() if entry[3] == batch]
+            selected = [indices[label] for label in labels if label in indices]
+            if selected:
+                yield records.subset(np.concatenate(selected))
+    
+    def remove(self):
+        """Delete the checkpoint, once the run no longer needs it."""
+        self.files = {}
+        self._buffer = []
+        self._batches = 0
+        self._loaded = None
+        shutil.rmtree(self.path, ignore_errors=True)
+    
+    def _discard_batch(self, batch: str, error: Exception):
+        """Forget the files of an unreadable archive, so they are parsed and journaled again."""
+        self.logger.warning(f"Ignoring unreadable checkpoint archive {batch}: {error}")
+        self.files = {file_path: entry for file_path, entry in self.files.items() if entry[3] != batch}
+        if self._loaded is not None and self._loaded[0] == batch:
+            self._loaded = None
+    
+    def _load_batch(self, batch: str) -> Tuple[RecordStore, Dict[str, np.ndarray]]:
+        # Files are restored in the order they were journaled, so keeping the last batch suffices
+        if self._loaded is None or self._loaded[0] != batch:
+            records = RecordStore.load(self.path / batch)
+            codes = records.codes['source_file']
+            indices = {
+                label: np.flatnonzero(codes == code)
+                for code, label in enumerate(records.categories['source_file'])
+            }
+            self._loaded = (batch, records, indices)
+        return self._loaded[1], self._loaded[2]
+    
+    @staticmethod
+    def _append(journal: Path, entry: Dict[str, Any]):
+        with open(journal, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _signature(file_path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = Path(file_path).stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
\ No newline at end of file
@@ -0,0 +1,136 @@
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.types import InterpolationMethod, ObserverSelection, MAX_OBSERVER
+from core.interpolation import InterpolationEngine
+from core.record_store import RecordStore, LABEL_FIELDS
+
+
+# Methods compared by default: the point interpolants, which differ only in the curve between points
+COMPARISON_METHODS = (
+    InterpolationMethod.LINEAR,
+    InterpolationMethod.CUBIC,
+    InterpolationMethod.QUADRATIC,
+    InterpolationMethod.NEAREST,
+)
+
+COMPARISON_SHEET = 'Method Comparison'
+
+# Spread between methods, in metres, above which a record is flagged
+DEFAULT_TOLERANCE = 1.0
+
+# (title, header, rows) of the comparison, as written by the exporter
+ComparisonTable = Tuple[str, List[str], List[List[Any]]]
+
+
+class MethodComparison:
+    """
+    Downwind distances of every dispersion record by several interpolation methods.
+    
+    Each file's records are sorted once and every method is evaluated on
+    the same sorted curves (see InterpolationEngine.interpolate_methods()),
+    so comparing four methods costs far less than four runs. The table
+    has one column per method and threshold, the spread between the
+    methods (furthest minus nearest distance) per threshold, and a flag on
+    records whose spread exceeds the tolerance at any threshold.
+    
+    Rows follow the observer selection of the run, as the results do.
+    """
+    
+    def __init__(
+        self,
+        methods: Sequence[InterpolationMethod],
+        thresholds: Sequence[float],
+        tolerance: float = DEFAULT_TOLERANCE,
+        selection: ObserverSelection = ObserverSelection.ALL
+    ):
+        """
+        Raises:
+            ValueError: If fewer than two methods are given
+        """
+        self.methods = list(dict.fromkeys(methods))
+        if len(self.methods) < 2:
+            raise ValueError("Comparing interpolation methods needs at least two methods")
+        self.thresholds = list(thresholds)
+        self.tolerance = tolerance
+        self.selection = selection
+        # Labels, observer and distances of shape (n_methods, n_thresholds) per row
+        self._rows: List[Tuple[Tuple[str, ...], str, np.ndarray]] = []
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def add(self, records: RecordStore) -> Dict[InterpolationMethod, np.ndarray]:
+        """
+        Compare the methods on one file's records.
+        
+        Returns:
+            Distances of shape (n_records, n_thresholds) per method, so the
+            run's own method need not be interpolated again
+        """
+        if len(records) == 0:
+            return {}
+        distances = InterpolationEngine.interpolate_methods(records, self.thresholds, self.methods)
+        # (n_methods, n_records, n_thresholds)
+        stacked = np.stack([distances[method] for method in self.methods])
+        starts = records.group_starts()
+        ends = np.append(starts[1:], len(records))
+        maxima = np.fmax.reduceat(stacked, starts, axis=1)
+        
+        labels = {field: records.labels(field) for field in LABEL_FIELDS}
+        
+        def row(i: int, observer: str, values: np.ndarray):
+            if np.isnan(values).all():
+                return
+            key = (labels['equipment_item'][i], labels['scenario'][i], labels['weather'][i],
+                   labels['temperature_type'][i], labels['source_file'][i])
+            self._rows.append((key, observer, values))
+        
+        for block, (start, end) in enumerate(zip(starts, ends)):
+            if self.selection != ObserverSelection.MAXIMUM:
+                for i in range(start, end):
+                    if self.selection == ObserverSelection.FIRST and labels['observer'][i] != '1':
+                        continue
+                    row(i, labels['observer'][i], stacked[:, i])
+            if self.selection != ObserverSelection.FIRST:
+                row(start, MAX_OBSERVER, maxima[:, block])
+        return distances
+    
+    def spreads(self) -> np.ndarray:
+        """Furthest minus nearest distance across the methods, shape (n_rows, n_thresholds)."""
+        if not self._rows:
+            return np.empty((0, len(self.thresholds)))
+        values = np.stack([distances for _, _, distances in self._rows])
+        # Methods without a distance are left out; NaN where none has one
+        return np.fmax.reduce(values, axis=1) - np.fmin.reduce(values, axis=1)
+    
+    def table(self, decimal_places: Optional[int] = None) -> ComparisonTable:
+        """
+        Returns:
+            (title, header, rows)
+        """
+        header = ['Subsection', 'Scenario', 'Weather', 'Temperature Type', 'Observer']
+        for threshold in self.thresholds:
+            header.extend(
+                f'Downwind Distance at {threshold}°C, {method.value} (m)' for method in self.methods
+            )
+            header.append(f'Downwind Distance Spread at {threshold}°C (m)')
+        header.extend([f'Spread Above {self.tolerance:g} m', 'Source File'])
+        
+        def cell(value: float) -> Optional[float]:
+            if np.isnan(value):
+                return None
+            return round(float(value), decimal_places) if decimal_places is not None else float(value)
+        
+        rows = []
+        for (key, observer, distances), spread in zip(self._rows, self.spreads()):
+            subsection, scenario, weather, temperature_type, source_file = key
+            values: List[Any] = [subsection, scenario, weather, temperature_type, observer]
+            for t in range(len(self.thresholds)):
+                values.extend(cell(value) for value in distances[:, t])
+                values.append(cell(spread[t]))
+            values.append('Yes' if np.any(spread > self.tolerance) else 'No')
+            values.append(source_file)
+            rows.append(values)
+        return COMPARISON_SHEET, header, rows
\ No newline at end of file
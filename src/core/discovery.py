@@ -0,0 +1,155 @@
+import fnmatch
+import os
+import threading
+from pathlib import Path
+from queue import Queue
+from typing import List, Optional, Iterator, Iterable, Sequence, Callable, TypeVar
+
+
+T = TypeVar('T')
+
+
+# Report file types the reader backends can read
+DEFAULT_INCLUDE = ('*.xlsx', '*.xls', '*.csv', '*.txt')
+
+# Excel keeps an owner file named ~$<name>.xlsx next to every open workbook
+LOCK_FILE_PREFIX = '~$'
+
+# End of items marker used by iter_in_background()
+_DONE = object()
+
+
+def iter_report_files(
+    folder: Path,
+    recursive: bool = False,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None
+) -> Iterator[Path]:
+    """
+    Yield the report files under a folder as the folder is walked.
+    
+    Files are yielded lazily, so parsing can start on the first files of
+    a deep tree on a slow share while the rest is still being listed.
+    Each folder's files are yielded in name order before its subfolders,
+    which are then walked in name order, so the order is stable.
+    
+    Args:
+        folder: Folder to search
+        recursive: Also search subfolders
+        include: Glob patterns a file name must match (default:
+            DEFAULT_INCLUDE)
+        exclude: Glob patterns for files or folders to skip, matched
+            against the name and against the path relative to folder
+            (for example "~*", "archive" or "unit-2/old/*")
+    
+    Excel lock files (~$name.xlsx) are always skipped.
+    """
+    include = list(include or DEFAULT_INCLUDE)
+    exclude = list(exclude or [])
+    pending = [(Path(folder), "")]
+    
+    while pending:
+        directory, relative = pending.pop()
+        try:
+            with os.scandir(directory) as scan:
+                entries = sorted(scan, key=lambda entry: entry.name)
+        except OSError:
+            if relative:
+                # An unreadable subfolder is skipped, like a file that fails to parse
+                continue
+            raise
+        
+        subfolders = []
+        for entry in entries:
+            path = f"{relative}{entry.name}"
+            if _matches(entry.name, path, exclude):
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                if recursive:
+                    subfolders.append((Path(entry.path), path + "/"))
+            elif (
+                not entry.name.startswith(LOCK_FILE_PREFIX)
+                and any(fnmatch.fnmatch(entry.name, pattern) for pattern in include)
+            ):
+                yield Path(entry.path)
+        
+        # Walked depth first, in name order
+        pending.extend(reversed(subfolders))
+
+
+def is_report_file(
+    file_path: Path,
+    folder: Path,
+    recursive: bool = False,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None
+) -> bool:
+    """Whether iter_report_files() would yield a file, judged from its path alone."""
+    try:
+        parts = Path(file_path).relative_to(folder).parts
+    except ValueError:
+        return False
+    if not parts or (len(parts) > 1 and not recursive):
+        return False
+    
+    include = list(include or DEFAULT_INCLUDE)
+    exclude = list(exclude or [])
+    for depth, name in enumerate(parts, 1):
+        if _matches(name, "/".join(parts[:depth]), exclude):
+            return False
+    name = parts[-1]
+    return not name.startswith(LOCK_FILE_PREFIX) and any(fnmatch.fnmatch(name, pattern) for pattern in include)
+
+
+def _matches(name: str, path: str, patterns: List[str]) -> bool:
+    return any(
+        fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, pattern)
+        for pattern in patterns
+    )
+
+
+def iter_in_background(
+    items: Iterable[T],
+    on_item: Optional[Callable[[T], None]] = None
+) -> Iterator[T]:
+    """
+    Iterate over items in a background thread, yielding them as they arrive.
+    
+    Lets a slow producer, such as walking a folder tree on a network
+    share, run ahead of the code consuming its items. on_item is called
+    in the background thread for every item as soon as it is produced.
+    Exceptions raised by the producer are re-raised here, and closing the
+    returned generator stops the producer at its next item.
+    """
+    queue: Queue = Queue()
+    stop = threading.Event()
+    
+    def produce():
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                if on_item:
+                    on_item(item)
+                queue.put((item, None))
+        except BaseException as e:
+            queue.put((_DONE, e))
+            return
+        queue.put((_DONE, None))
+    
+    thread = threading.Thread(target=produce, name="file-discovery", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = queue.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
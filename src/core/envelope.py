@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+
+def segment_search(
+    values: np.ndarray, starts: np.ndarray, ends: np.ndarray, targets: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized binary search within sorted segments.
+    
+    Returns, for every (segment, target) pair, the index of the first
+    value in the segment greater than the target (searchsorted side='right').
+    """
+    lo = np.broadcast_to(starts[:, np.newaxis], targets.shape).copy()
+    hi = np.broadcast_to(ends[:, np.newaxis], targets.shape).copy()
+    last = max(len(values) - 1, 0)
+    
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) // 2
+        go_right = values[np.minimum(mid, last)] <= targets
+        lo = np.where(active & go_right, mid + 1, lo)
+        hi = np.where(active & ~go_right, mid, hi)
+
+
+@dataclass
+class EnvelopeTable:
+    """
+    Monotone envelope of every record's centreline temperature curve.
+    
+    Each record is sorted by downwind distance and its envelope holds, at
+    every point, the lowest temperature reached at that distance or beyond.
+    The envelope never decreases with distance, so the furthest distance
+    at which the plume is at or below a threshold is found with one binary
+    search, however the raw curve re-warms and cools again near the source.
+    
+    Record i occupies [offsets[i]:offsets[i + 1]] of the flat arrays.
+    """
+    offsets: np.ndarray
+    distances: np.ndarray
+    temperatures: np.ndarray
+    envelope: np.ndarray
+    
+    @classmethod
+    def build(
+        cls, offsets: np.ndarray, temperatures: np.ndarray, distances: np.ndarray
+    ) -> 'EnvelopeTable':
+        """Sort every record by distance and compute its envelope in one vectorized pass."""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        lengths = np.diff(offsets)
+        n_records = len(lengths)
+        record_ids = np.repeat(np.arange(n_records, dtype=np.int64), lengths)
+        
+        order = np.lexsort((distances, record_ids))
+        dists = np.asarray(distances, dtype=np.float64)[order]
+        temps = np.asarray(temperatures, dtype=np.float64)[order]
+        
+        # Segmented suffix minimum, computed exactly on integer ranks: every
+        # record is shifted below all records after it, so a running minimum
+        # taken from the end restarts at each record boundary
+        n_points = len(temps)
+        by_value = np.argsort(temps, kind='stable')
+        ranks = np.empty(n_points, dtype=np.int64)
+        ranks[by_value] = np.arange(n_points)
+        shift = (n_records - 1 - record_ids) * max(n_points, 1)
+        suffix_min = np.minimum.accumulate((ranks - shift)[::-1])[::-1] + shift
+        envelope = temps[by_value[suffix_min]] if n_points else temps.copy()
+        
+        return cls(offsets, dists, temps, envelope)
+    
+    def furthest_distance(self, target_temps: Sequence[float]) -> np.ndarray:
+        """
+        Furthest downwind distance at which each record is at or below each target.
+        
+        The distance is interpolated linearly between the last point at or
+        below the target and the next point along the curve. A record still
+        at or below the target at its last point gives that point's
+        distance; one never that cold gives NaN.
+        
+        Returns:
+            Array of shape (n_records, n_targets)
+        """
+        targets = np.asarray(target_temps, dtype=float)
+        starts, ends = self.offsets[:-1], self.offsets[1:]
+        grid = np.broadcast_to(targets, (len(starts), len(targets)))
+        results = np.full(grid.shape, np.nan)
+        if results.size == 0 or len(self.envelope) == 0:
+            return results
+        
+        upper = segment_search(self.envelope, starts, ends, grid)
+        end = np.broadcast_to(ends[:, np.newaxis], grid.shape)
+        start = np.broadcast_to(starts[:, np.newaxis], grid.shape)
+        
+        at_end = (upper == end) & (upper > start)
+        results[at_end] = self.distances[upper[at_end] - 1]
+        
+        # The envelope crosses the target between points k and k + 1, where
+        # the raw curve is at or below the target at k and above it at k + 1
+        crossing = (upper < end) & (upper > start)
+        k = upper[crossing] - 1
+        t0, t1 = self.temperatures[k], self.temperatures[k + 1]
+        d0, d1 = self.distances[k], self.distances[k + 1]
+        results[crossing] = d0 + (grid[crossing] - t0) * (d1 - d0) / (t1 - t0)
+        
+        return results
\ No newline at end of file
@@ -1,117 +1,555 @@
 import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-import openpyxl
+from collections import deque
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple, Callable, Sequence, Union, Deque
 
 from core.types import TemperatureType
+from core.cache import ParseCache
+from core.record_store import RecordStore, RecordStoreBuilder, ARCHIVE_ERRORS
+from core.instrumentation import FileStats, TimedIterator
+from core.discovery import iter_report_files
+from core.readers import ReportReader, reader_for
+
+
+# Bump whenever parsing changes what is extracted, so cached output is not reused
+PARSER_VERSION = 3
+
+DISPERSION_DATA_TITLE = "Time-varying Observer Dispersion Data (before along-wind-diffusion effects)"
+
+DISTANCE_HEADER = "Downwind distance [m]"
+
+TEMPERATURE_HEADERS = {
+    TemperatureType.VAPOUR: "C/Line vapour temperature [degC]",
+    TemperatureType.LIQUID: "C/Line liquid temperature [degC]",
+}
+
+# Section markers and the record field each one sets
+SECTION_MARKERS = {
+    "Equipment Item:": 'equipment_item',
+    "Scenario (": 'scenario',
+    "Weather:": 'weather',
+}
+
+# Files read ahead per worker process while earlier files are yielded
+FILES_IN_FLIGHT_PER_WORKER = 4
+
+# Text a PHAST report has near the top of its sheets
+REPORT_SIGNATURES = [b"Dispersion Report", DISPERSION_DATA_TITLE.encode()] + [
+    marker.encode() for marker in SECTION_MARKERS
+]
+
+
+def resolve_worker_count(workers: int) -> int:
+    """Resolve a configured worker count, where 0 or less means one per CPU core."""
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def source_file_name(file_path: Path, root: Optional[Path] = None) -> str:
+    """Return the name a file is reported under: relative to root if given."""
+    if root is None:
+        return str(file_path)
+    return file_path.relative_to(root).as_posix()
+
+
+def sniff_report(file_path: Path, reader: Optional[ReportReader] = None) -> Optional[str]:
+    """
+    Cheaply check whether a file can be a PHAST dispersion report.
+    
+    Only as much of the file is read as the reader needs to find report
+    text near its top (see ReportReader.sniff()), which costs far less
+    than parsing it.
+    
+    Args:
+        file_path: File to check
+        reader: Reader for the file (default: the fastest available one)
+    
+    Returns:
+        None if the file may be a report, otherwise the reason it is not
+    """
+    reader = reader or reader_for(file_path)
+    if reader is None:
+        return f"no available reader for {file_path.suffix or 'extensionless'} files"
+    return reader.sniff(file_path, DISPERSION_DATA_TITLE.encode(), REPORT_SIGNATURES)
+
+
+class SheetLayoutIndex:
+    """
+    Locates the section markers of a report sheet.
+    
+    PHAST writes the equipment item, scenario, weather and data block title
+    markers in one leading column. Until the first marker is found every
+    text cell of a row is checked; from then on only that column is, so
+    the wide numeric rows of the data blocks cost a single type check.
+    """
+    
+    def __init__(self):
+        self.marker_column: Optional[int] = None
+    
+    def classify(self, row: Tuple) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """
+        Classify a row by its marker.
+        
+        Returns:
+            (field, value) for a section marker, (None, None) for a data
+            block title, or None for any other row
+        """
+        if self.marker_column is not None:
+            if self.marker_column >= len(row):
+                return None
+            return self._match(row[self.marker_column])
+        
+        for column, cell_value in enumerate(row):
+            marker = self._match(cell_value)
+            if marker is not None:
+                self.marker_column = column
+                return marker
+        return None
+    
+    @staticmethod
+    def _match(cell_value: Any) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        if not isinstance(cell_value, str):
+            return None
+        value = cell_value.strip()
+        if value == DISPERSION_DATA_TITLE:
+            return None, None
+        for prefix, field in SECTION_MARKERS.items():
+            if value.startswith(prefix):
+                return field, value.partition(":")[2].strip()
+        return None
 
 
 class ExcelProcessor:
-    """Handles Excel file processing and data extraction."""
+    """
+    Handles Excel file processing and data extraction.
+    
+    Every requested temperature type is extracted in the same pass, giving
+    one record per dispersion block and temperature type. Records are
+    collected straight into a columnar RecordStore.
+    
+    Files are read through the fastest available ReportReader backend for
+    their type (.xlsx, .xls, CSV or tab-separated text) unless a backend
+    is named; every backend yields the same rows, so the records do not
+    depend on it.
+    
+    Every parsed file also produces a FileStats with its timings and row,
+    block and record counts. With instrument set, the time spent reading
+    rows, scanning for markers and extracting blocks is measured as well,
+    at the cost of timing every row.
+    """
     
-    def __init__(self, temperature_type: TemperatureType, verbose: bool = False):
-        self.temperature_type = temperature_type
+    def __init__(
+        self,
+        temperature_types: Union[TemperatureType, Sequence[TemperatureType]],
+        verbose: bool = False,
+        workers: int = 1,
+        cache: Optional[ParseCache] = None,
+        instrument: bool = False,
+        reader: str = 'auto'
+    ):
+        if isinstance(temperature_types, TemperatureType):
+            temperature_types = [temperature_types]
+        self.temperature_types = list(temperature_types)
         self.verbose = verbose
+        self.workers = workers
+        self.cache = cache
+        self.instrument = instrument
+        self.reader = reader
         self.logger = logging.getLogger(__name__)
     
-    def process_files(self, folder_path: str) -> List[Dict[str, Any]]:
-        """Process all Excel files in the given folder."""
-        excel_files = list(Path(folder_path).glob("*.xlsx"))
-        all_data = []
-        
-        for file_path in excel_files:
-            try:
-                file_data = self._process_single_file(file_path)
-                all_data.extend(file_data)
-            except Exception as e:
-                self.logger.error(f"Error processing {file_path}: {e}")
-                
-        return all_data
+    @property
+    def cache_namespace(self) -> str:
+        """Cache namespace for the current parser version and temperature types."""
+        types = "+".join(t.value for t in self.temperature_types)
+        return f"v{PARSER_VERSION}-{types}"
     
-    def _process_single_file(self, file_path: Path) -> List[Dict[str, Any]]:
-        """Process a single Excel file."""
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        file_data = []
-        
-        if self.verbose:
-            self.logger.info(f"Processing file: {file_path}")
+    def __getstate__(self):
+        # The cache stays in the parent process when files are sent to workers
+        state = self.__dict__.copy()
+        state['cache'] = None
+        return state
+    
+    def find_files(
+        self,
+        folder_path: str,
+        recursive: bool = False,
+        include: Optional[Sequence[str]] = None,
+        exclude: Optional[Sequence[str]] = None
+    ) -> Iterator[Path]:
+        """Lazily yield the report files in a folder in sorted order; see iter_report_files()."""
+        return iter_report_files(Path(folder_path), recursive, include, exclude)
+    
+    def process_files(
+        self,
+        folder_path: str,
+        progress_callback: Optional[Callable[[int, int, Path], None]] = None
+    ) -> RecordStore:
+        """
+        Process all Excel files in the given folder.
         
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            sheet_data = self._analyze_sheet(ws)
-            file_data.extend(sheet_data)
+        Args:
+            folder_path: Folder containing the PHAST dispersion reports
+            progress_callback: Called as (completed, total, file_path) after
+                each file finishes, whether it succeeded or not
             
-        wb.close()
-        return file_data
-    
-    def _analyze_sheet(self, ws) -> List[Dict[str, Any]]:
-        """Analyze a single worksheet for dispersion data."""
-        sheet_data = []
-        equipment_item = None
-        scenario = None
-        weather = None
-        
-        for row in ws.iter_rows(min_row=1, max_col=ws.max_column, max_row=ws.max_row):
-            for cell in row:
-                value = str(cell.value).strip() if cell.value else ""
-                
-                if value.startswith("Equipment Item:"):
-                    equipment_item = value.split(":", 1)[1].strip()
-                elif value.startswith("Scenario ("):
-                    scenario = value.split(":", 1)[1].strip()
-                elif value.startswith("Weather:"):
-                    weather = value.split(":", 1)[1].strip()
-                elif value == "Time-varying Observer Dispersion Data (before along-wind-diffusion effects)":
-                    data = self._extract_dispersion_data(ws, cell.row)
-                    if data and equipment_item and scenario and weather:
-                        sheet_data.append({
-                            'equipment_item': equipment_item,
-                            'scenario': scenario,
-                            'weather': weather,
-                            'distances': data['distances'],
-                            'temperatures': data['temperatures']
-                        })
-        
-        return sheet_data
-    
-    def _extract_dispersion_data(self, ws, start_row: int) -> Optional[Dict[str, List]]:
-        """Extract dispersion data from the worksheet."""
+        Returns:
+            Dispersion records from all files
+        """
+        files = self.find_files(folder_path)
+        return RecordStore.concat([
+            file_data for _, file_data in self.iter_files(files, progress_callback, Path(folder_path))
+        ])
+    
+    def iter_files(
+        self,
+        files: Iterable[Path],
+        progress_callback: Optional[Callable[[int, int, Path], None]] = None,
+        root: Optional[Path] = None,
+        stats_callback: Optional[Callable[[FileStats], None]] = None,
+        restore: Optional[Callable[[Path], Optional[RecordStore]]] = None
+    ) -> Iterator[Tuple[Path, RecordStore]]:
+        """
+        Parse files and yield (file_path, records) in the given order.
+        
+        files may be a lazy iterable such as find_files(); it is consumed
+        only as far as FILES_IN_FLIGHT_PER_WORKER files per worker ahead of
+        the file being yielded, so parsing starts while discovery is still
+        running and parsed results waiting to be yielded stay bounded.
+        
+        Each record's source_file label is the file path relative to root
+        when one is given, otherwise the path as passed in. The stats
+        callback receives the FileStats of each file as it completes.
+        
+        Files for which restore() returns records, such as files journaled
+        by an interrupted run, and files with a valid cache entry are not
+        parsed again. The remaining files are parsed in a process pool when
+        more than one worker is configured. The progress callback fires as
+        each file completes, with the number of files seen so far as the
+        total, while results are always yielded in file order. A file that
+        fails to parse is logged and yields no records without affecting the
+        others. Closing the generator early cancels files not yet started.
+        """
+        workers = resolve_worker_count(self.workers)
+        # Pool processes are only started as files are submitted
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        window = workers * FILES_IN_FLIGHT_PER_WORKER if executor else 1
+        
+        # [file_path, records, stats] in file order; records is None until parsed
+        queue: Deque[list] = deque()
+        futures: Dict[Any, list] = {}
+        source = iter(files)
+        seen = completed = 0
+        
+        def file_done(entry: list, records: RecordStore, stats: FileStats):
+            nonlocal completed
+            completed += 1
+            entry[1] = records
+            if stats_callback:
+                stats.file = source_file_name(entry[0], root)
+                stats_callback(stats)
+            if progress_callback:
+                progress_callback(completed, seen, entry[0])
+        
         try:
-            # Get headers (2 rows after the title)
-            headers = [cell.value for cell in ws[start_row + 2]]
-            
-            # Find column indices
-            distance_col = headers.index("Downwind distance [m]")
-            temp_header = (
-                "C/Line vapour temperature [degC]" if self.temperature_type == TemperatureType.VAPOUR
-                else "C/Line liquid temperature [degC]"
-            )
-            temp_col = headers.index(temp_header)
-            
-            # Extract data
-            distances, temperatures = [], []
-            
-            for row_num in range(start_row + 3, ws.max_row + 1):
-                row_data = [cell.value for cell in ws[row_num]]
+            while True:
+                while len(queue) < window:
+                    file_path = next(source, None)
+                    if file_path is None:
+                        break
+                    seen += 1
+                    entry = [file_path, None]
+                    queue.append(entry)
+                    
+                    start = time.perf_counter()
+                    restored = restore(file_path) if restore else None
+                    cached = restored if restored is not None else self._load_cached(file_path)
+                    if cached is not None:
+                        stats = FileStats(
+                            str(file_path), time.perf_counter() - start, records=len(cached), cached=True,
+                            reader='checkpoint' if restored is not None else None
+                        )
+                        file_done(entry, cached, stats)
+                    elif executor:
+                        futures[executor.submit(self._process_single_file, file_path)] = entry
                 
-                if not row_data or row_data[0] != 1:
+                if not queue:
                     break
                 
-                distance = row_data[distance_col]
-                temperature = row_data[temp_col]
-                
-                if distance is not None and temperature is not None:
-                    try:
-                        distances.append(float(distance))
-                        temperatures.append(float(temperature))
-                    except (ValueError, TypeError):
+                entry = queue[0]
+                while entry[1] is None:
+                    if not executor:
+                        file_done(entry, *self._parse_file(entry[0]))
                         continue
+                    
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        done_entry = futures.pop(future)
+                        try:
+                            records, stats = future.result()
+                            self._store_cached(done_entry[0], records)
+                        except Exception as e:
+                            self.logger.error(f"Error processing {done_entry[0]}: {e}")
+                            records = RecordStore.empty()
+                            stats = FileStats(str(done_entry[0]), error=str(e))
+                        file_done(done_entry, records, stats)
+                
+                queue.popleft()
+                file_path, file_data = entry
+                file_data.set_label('source_file', source_file_name(file_path, root))
+                yield file_path, file_data
+        finally:
+            if executor:
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=True)
+            if self.cache:
+                self.cache.flush()
+    
+    def _parse_file(self, file_path: Path) -> Tuple[RecordStore, FileStats]:
+        """Parse a file in this process, caching the result; logs and returns no records on failure."""
+        start = time.perf_counter()
+        try:
+            records, stats = self._process_single_file(file_path)
+        except Exception as e:
+            self.logger.error(f"Error processing {file_path}: {e}")
+            return RecordStore.empty(), FileStats(str(file_path), time.perf_counter() - start, error=str(e))
+        self._store_cached(file_path, records)
+        return records, stats
+    
+    def _load_cached(self, file_path: Path) -> Optional[RecordStore]:
+        """Return cached records for a file, or None on a miss or without a cache."""
+        if not self.cache:
+            return None
+        try:
+            records = self.cache.get(file_path, self.cache_namespace)
+        except ARCHIVE_ERRORS as e:
+            self.logger.warning(f"Cache lookup failed for {file_path}: {e}")
+            return None
+        if records is not None and self.verbose:
+            self.logger.info(f"Using cached data for: {file_path}")
+        return records
+    
+    def _store_cached(self, file_path: Path, records: RecordStore):
+        """Store parsed records in the cache, if one is configured."""
+        if not self.cache:
+            return
+        try:
+            self.cache.put(file_path, self.cache_namespace, records)
+        except OSError as e:
+            self.logger.warning(f"Could not cache {file_path}: {e}")
+    
+    def _process_single_file(self, file_path: Path) -> Tuple[RecordStore, FileStats]:
+        """Process a single report file, streaming its rows."""
+        start = time.perf_counter()
+        stats = FileStats(str(file_path))
+        
+        reader = reader_for(file_path, self.reader)
+        if reader is None:
+            backend = "reader" if self.reader == 'auto' else f"{self.reader} reader"
+            rejected = f"no available {backend} for {file_path.suffix or 'extensionless'} files"
+        else:
+            rejected = sniff_report(file_path, reader)
+        if rejected:
+            if self.verbose:
+                self.logger.info(f"Skipping {file_path}: {rejected}")
+            stats.rejected = rejected
+            stats.seconds = time.perf_counter() - start
+            return RecordStore.empty(), stats
+        
+        stats.reader = reader.name
+        if self.instrument:
+            stats.read_seconds = stats.scan_seconds = stats.extract_seconds = 0.0
+        file_data = RecordStoreBuilder()
+        
+        if self.verbose:
+            self.logger.info(f"Processing file: {file_path} ({reader.name})")
+        
+        sheets = reader.iter_sheets(file_path)
+        try:
+            sheet = next(sheets, None)
+            stats.open_seconds = time.perf_counter() - start
+            while sheet is not None:
+                self._analyze_sheet(sheet[1], file_data, stats)
+                stats.sheets += 1
+                sheet = next(sheets, None)
+        finally:
+            sheets.close()
+        
+        records = file_data.build()
+        stats.records = len(records)
+        stats.seconds = time.perf_counter() - start
+        return records, stats
+    
+    def _analyze_sheet(self, rows: Iterator[Tuple], builder: RecordStoreBuilder, stats: Optional[FileStats] = None):
+        """
+        Analyze the rows of a single worksheet for dispersion data, adding its records to builder.
+        
+        Rows are streamed once from top to bottom. Marker rows update the
+        current equipment item, scenario and weather, and each dispersion
+        data block is read in place as soon as its title row is reached.
+        Markers are located through a SheetLayoutIndex, so only the marker
+        column of each row is inspected.
+        
+        Rows, blocks and skipped or failed blocks are counted into stats.
+        """
+        stats = stats or FileStats("")
+        labels = {'equipment_item': None, 'scenario': None, 'weather': None}
+        layout = SheetLayoutIndex()
+        
+        start = time.perf_counter()
+        extract_seconds = extract_read_seconds = 0.0
+        if self.instrument:
+            rows = TimedIterator(rows)
+        row = next(rows, None)
+        
+        while row is not None:
+            stats.rows += 1
+            pending_row = None
+            marker = layout.classify(row)
+            
+            if marker is not None:
+                field, value = marker
+                if field is not None:
+                    labels[field] = value
+                else:
+                    stats.blocks += 1
+                    failed_before = stats.failed_blocks
+                    if self.instrument:
+                        extract_start, read_start = time.perf_counter(), rows.seconds
+                    data, pending_row = self._extract_dispersion_data(rows, stats)
+                    if self.instrument:
+                        extract_seconds += time.perf_counter() - extract_start
+                        extract_read_seconds += rows.seconds - read_start
+                    
+                    if data and all(labels.values()):
+                        for temperature_type, observers in data.items():
+                            for observer, curve in observers.items():
+                                builder.append(
+                                    curve['distances'],
+                                    curve['temperatures'],
+                                    temperature_type=temperature_type.value,
+                                    observer=str(observer),
+                                    **labels
+                                )
+                    elif stats.failed_blocks == failed_before:
+                        # No data rows, or no equipment item, scenario or weather to label them
+                        stats.skipped_blocks += 1
             
-            return {
-                'distances': distances,
-                'temperatures': temperatures
-            } if distances and temperatures else None
+            # The row that ended a data block may itself hold a marker
+            row = pending_row if pending_row is not None else next(rows, None)
+        
+        if self.instrument:
+            # Rows fetched inside a block count towards extraction, the rest towards scanning
+            scan_read_seconds = rows.seconds - extract_read_seconds
+            stats.read_seconds += rows.seconds
+            stats.extract_seconds += extract_seconds - extract_read_seconds
+            stats.scan_seconds += time.perf_counter() - start - extract_seconds - scan_read_seconds
+    
+    def _extract_dispersion_data(
+        self, rows: Iterator[Tuple], stats: Optional[FileStats] = None
+    ) -> Tuple[Optional[Dict[TemperatureType, Dict[int, Dict[str, List]]]], Optional[Tuple]]:
+        """
+        Extract dispersion data from the rows following a block title.
+        
+        Every observer's rows are read in the same pass. Data rows start
+        with the observer number; the blank rows PHAST writes between
+        observers are skipped, and the block ends at the first other row.
+        
+        Args:
+            rows: Row iterator positioned just after the title row
+            stats: Counts the rows consumed, except the row returned as
+                pending, and blocks that fail for missing columns
             
-        except (ValueError, IndexError) as e:
+        Returns:
+            Tuple of (curves per temperature type and observer number, in
+            the order the observers appear, or None; first row after the
+            block or None)
+        """
+        stats = stats or FileStats("")
+        
+        # Skip the averaging-time line, headers follow it
+        next(rows, None)
+        headers = list(next(rows, None) or ())
+        stats.rows += 2
+        
+        # Find column indices
+        try:
+            distance_col = headers.index(DISTANCE_HEADER)
+        except ValueError as e:
             self.logger.error(f"Error extracting dispersion data: {e}")
-            return None 
\ No newline at end of file
+            stats.failed_blocks += 1
+            return None, None
+        
+        temp_cols = {
+            temperature_type: headers.index(TEMPERATURE_HEADERS[temperature_type])
+            for temperature_type in self.temperature_types
+            if TEMPERATURE_HEADERS[temperature_type] in headers
+        }
+        if not temp_cols:
+            missing = ", ".join(TEMPERATURE_HEADERS[t] for t in self.temperature_types)
+            self.logger.error(f"Error extracting dispersion data: no column for {missing}")
+            stats.failed_blocks += 1
+            return None, None
+        
+        # Extract data
+        curves: Dict[TemperatureType, Dict[int, Dict[str, List]]] = {
+            temperature_type: {} for temperature_type in temp_cols
+        }
+        observer = None
+        current: Dict[TemperatureType, Dict[str, List]] = {}
+        pending_row = None
+        
+        for row_data in rows:
+            number = row_data[0] if row_data else None
+            if not _is_observer_number(number):
+                if _is_blank_row(row_data):
+                    stats.rows += 1
+                    continue
+                pending_row = row_data
+                break
+            stats.rows += 1
+            
+            if number != observer:
+                observer = int(number)
+                current = {
+                    temperature_type: observers.setdefault(observer, {'distances': [], 'temperatures': []})
+                    for temperature_type, observers in curves.items()
+                }
+            
+            distance = row_data[distance_col] if distance_col < len(row_data) else None
+            if distance is None:
+                continue
+            
+            for temperature_type, temp_col in temp_cols.items():
+                temperature = row_data[temp_col] if temp_col < len(row_data) else None
+                if temperature is None:
+                    continue
+                try:
+                    point = float(distance), float(temperature)
+                except (ValueError, TypeError):
+                    continue
+                current[temperature_type]['distances'].append(point[0])
+                current[temperature_type]['temperatures'].append(point[1])
+        
+        data = {}
+        for temperature_type, observers in curves.items():
+            observers = {number: curve for number, curve in observers.items() if curve['distances']}
+            if observers:
+                data[temperature_type] = observers
+        
+        return data or None, pending_row
+
+
+def _is_observer_number(value: Any) -> bool:
+    return (
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        and value >= 1 and float(value).is_integer()
+    )
+
+
+def _is_blank_row(row: Tuple) -> bool:
+    return all(value is None or (isinstance(value, str) and not value.strip()) for value in row)
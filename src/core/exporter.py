@@ -0,0 +1,342 @@
+import os
+import re
+import csv
+import importlib.util
+from itertools import groupby, chain
+from typing import List, Dict, Any, Optional, Sequence, Iterable, Iterator, Callable, Tuple
+
+from core.types import AnalysisResult
+
+
+RESULTS_SHEET = 'Analysis Results'
+
+
+MAX_COLUMN_WIDTH = 50
+
+
+# Rows buffered before the write-only sheet's column widths are fixed
+WIDTH_SAMPLE_ROWS = 1000
+
+
+# Rows per Parquet row group
+PARQUET_BATCH_ROWS = 10000
+
+
+EXPORT_FORMATS = {'.xlsx': 'xlsx', '.csv': 'csv', '.parquet': 'parquet'}
+
+
+# An extra table written next to the results: (sheet title, header, rows)
+Table = Tuple[str, List[str], List[List[Any]]]
+
+
+def export_format(output_file: str) -> str:
+    """
+    Return the export format for an output file, chosen by its extension.
+    
+    Raises:
+        ValueError: If the extension is not .xlsx, .csv or .parquet, or
+            Parquet is requested without pyarrow installed
+    """
+    extension = os.path.splitext(output_file)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Unsupported output format '{extension}', use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    if EXPORT_FORMATS[extension] == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        raise ValueError("Parquet export requires the pyarrow package")
+    return EXPORT_FORMATS[extension]
+
+
+def iter_rows(
+    results: Iterable[AnalysisResult],
+    decimal_places: int = 2,
+    thresholds: Optional[Sequence[float]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Pivot results to one row per dispersion record, one column per temperature of interest.
+    
+    Results are consumed lazily, so rows can be written while the analysis
+    is still running. Thresholds default to those present in the results,
+    which requires reading every result first; pass them explicitly to
+    stream, and to get a column even where no record reaches a threshold.
+    """
+    if thresholds is None:
+        results = list(results)
+        thresholds = list(dict.fromkeys(result.temperature_of_interest for result in results))
+    
+    def record_key(result: AnalysisResult):
+        return (result.source_file, result.subsection, result.scenario,
+                result.weather, result.temperature_type, result.observer)
+    
+    for _, group in groupby(results, key=record_key):
+        group = list(group)
+        first = group[0]
+        row = {
+            'Subsection': first.subsection,
+            'Scenario': first.scenario,
+            'Weather': first.weather,
+            'Temperature Type': first.temperature_type,
+            'Observer': first.observer,
+        }
+        distances = {result.temperature_of_interest: result.downwind_distance for result in group}
+        for threshold in thresholds:
+            distance = distances.get(threshold)
+            row[f'Downwind Distance at {threshold}°C (m)'] = (
+                round(distance, decimal_places) if distance is not None else None
+            )
+        row['Interpolation Method'] = first.interpolation_method
+        row['Source File'] = first.source_file
+        yield row
+
+
+def results_to_rows(
+    results: Iterable[AnalysisResult],
+    decimal_places: int = 2,
+    thresholds: Optional[Sequence[float]] = None
+) -> List[Dict[str, Any]]:
+    """Pivot results into a list of rows; see iter_rows()."""
+    return list(iter_rows(results, decimal_places, thresholds))
+
+
+def export_results(
+    results: Iterable[AnalysisResult],
+    output_file: str,
+    decimal_places: int = 2,
+    thresholds: Optional[Sequence[float]] = None,
+    stale_files: Optional[Sequence[str]] = None,
+    extra_tables: Optional[Callable[[], List[Table]]] = None
+) -> int:
+    """
+    Export results to an Excel, CSV or Parquet file, chosen by extension.
+    
+    Rows are streamed to a temporary file as the results arrive, so memory
+    use does not grow with the number of results, and the output file is
+    only replaced once the export has finished. With stale_files set and an
+    existing workbook, the workbook is updated in place instead: rows from
+    the stale source files are removed and the new results are appended.
+    
+    extra_tables is called once every result has been written and returns
+    further tables, such as rollups; they become extra sheets of a workbook
+    and, for CSV and Parquet, files next to the output (see table_path()).
+    
+    Returns:
+        Number of rows written
+    
+    Raises:
+        ValueError: If there are no results or the format is unsupported
+    """
+    file_format = export_format(output_file)
+    if stale_files is not None and file_format == 'xlsx' and os.path.exists(output_file):
+        return merge_results(results, output_file, stale_files, decimal_places, thresholds, extra_tables)
+    
+    rows = iter_rows(results, decimal_places, thresholds)
+    first_row = next(rows, None)
+    if first_row is None:
+        raise ValueError("No results to export")
+    header = list(first_row)
+    rows = chain([first_row], rows)
+    
+    if file_format == 'xlsx':
+        return _write_file(output_file, lambda tmp_file: _write_xlsx(tmp_file, header, rows, extra_tables))
+    
+    writer = _write_csv if file_format == 'csv' else _write_parquet
+    count = _write_file(output_file, lambda tmp_file: writer(tmp_file, header, rows))
+    for title, table_header, table_rows in (extra_tables() if extra_tables else []):
+        _write_file(
+            table_path(output_file, title),
+            lambda tmp_file: writer(tmp_file, table_header, (dict(zip(table_header, row)) for row in table_rows))
+        )
+    return count
+
+
+def table_path(output_file: str, title: str) -> str:
+    """Path of an extra table exported next to a CSV or Parquet file, e.g. results.max-by-subsection.csv."""
+    base, extension = os.path.splitext(output_file)
+    slug = re.sub(r'[^0-9a-z]+', '-', title.lower()).strip('-')
+    return f"{base}.{slug}{extension}"
+
+
+def _write_file(output_file: str, write: Callable[[str], int]) -> int:
+    """Write through a temporary file, replacing output_file only once write() succeeds."""
+    tmp_file = output_file + ".tmp"
+    try:
+        count = write(tmp_file)
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    return count
+
+
+def _write_xlsx(
+    output_file: str,
+    header: List[str],
+    rows: Iterator[Dict[str, Any]],
+    extra_tables: Optional[Callable[[], List[Table]]] = None
+) -> int:
+    """
+    Write rows with a write-only workbook, then any extra tables as further sheets.
+    
+    Write-only sheets need their column widths before the first row, so
+    widths are measured over the header and the first WIDTH_SAMPLE_ROWS
+    rows, which are buffered; the remaining rows go straight to disk.
+    """
+    import openpyxl
+    
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(RESULTS_SHEET)
+    
+    sample = []
+    for row in rows:
+        sample.append([row[column] for column in header])
+        if len(sample) >= WIDTH_SAMPLE_ROWS:
+            break
+    
+    _set_widths(ws, header, sample)
+    ws.append(header)
+    for values in sample:
+        ws.append(values)
+    count = len(sample)
+    for row in rows:
+        ws.append([row[column] for column in header])
+        count += 1
+    
+    for title, table_header, table_rows in (extra_tables() if extra_tables else []):
+        ws = wb.create_sheet(title)
+        _set_widths(ws, table_header, table_rows[:WIDTH_SAMPLE_ROWS])
+        ws.append(table_header)
+        for values in table_rows:
+            ws.append(values)
+    
+    wb.save(output_file)
+    return count
+
+
+def _set_widths(ws, header: List[str], sample: List[List[Any]]):
+    """Size each column to the widest of its header and sample values."""
+    from openpyxl.utils import get_column_letter
+    
+    widths = [len(column) for column in header]
+    for values in sample:
+        for index, value in enumerate(values):
+            widths[index] = max(widths[index], len(str(value)))
+    for index, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(index)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+
+def _write_csv(output_file: str, header: List[str], rows: Iterator[Dict[str, Any]]) -> int:
+    count = 0
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow([row[column] for column in header])
+            count += 1
+    return count
+
+
+def _write_parquet(output_file: str, header: List[str], rows: Iterator[Dict[str, Any]]) -> int:
+    """Write rows to Parquet in row groups of PARQUET_BATCH_ROWS (requires pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export requires the pyarrow package")
+    
+    schema = pa.schema([
+        (column, pa.float64() if column.startswith('Downwind Distance') else pa.string())
+        for column in header
+    ])
+    
+    count = 0
+    batch = []
+    with pq.ParquetWriter(output_file, schema) as writer:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def merge_results(
+    results: Iterable[AnalysisResult],
+    output_file: str,
+    stale_files: Sequence[str],
+    decimal_places: int = 2,
+    thresholds: Optional[Sequence[float]] = None,
+    extra_tables: Optional[Callable[[], List[Table]]] = None
+):
+    """
+    Merge results into an existing results workbook.
+    
+    Rows whose Source File is stale are deleted (rows from one file are
+    contiguous, so each file costs a single delete), then the new rows are
+    appended and the column widths widened where needed. Extra tables
+    replace the sheets of the same title, as they summarise every result.
+    
+    Returns:
+        Number of rows written
+    
+    Raises:
+        ValueError: If the workbook's columns do not match the new rows
+    """
+    rows = results_to_rows(results, decimal_places, thresholds)
+    if not rows and not stale_files and not extra_tables:
+        return 0
+    
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+    
+    wb = openpyxl.load_workbook(output_file)
+    try:
+        ws = wb[RESULTS_SHEET]
+        header = [cell.value for cell in ws[1]]
+        if rows and list(rows[0]) != header:
+            raise ValueError("Existing workbook columns do not match the analysis settings")
+        
+        source_col = header.index('Source File') + 1
+        stale = set(stale_files)
+        stale_rows = [
+            row_num for row_num in range(2, ws.max_row + 1)
+            if ws.cell(row=row_num, column=source_col).value in stale
+        ]
+        
+        # Delete contiguous runs from the bottom up so row numbers stay valid
+        runs = []
+        for row_num in stale_rows:
+            if runs and runs[-1][0] + runs[-1][1] == row_num:
+                runs[-1][1] += 1
+            else:
+                runs.append([row_num, 1])
+        for start, count in reversed(runs):
+            ws.delete_rows(start, count)
+        
+        for row in rows:
+            ws.append([row[column] for column in header])
+            for index, value in enumerate(row.values(), 1):
+                letter = get_column_letter(index)
+                width = min(len(str(value)) + 2, MAX_COLUMN_WIDTH)
+                if width > (ws.column_dimensions[letter].width or 0):
+                    ws.column_dimensions[letter].width = width
+        
+        for title, table_header, table_rows in (extra_tables() if extra_tables else []):
+            if title in wb.sheetnames:
+                del wb[title]
+            table = wb.create_sheet(title)
+            _set_widths(table, table_header, table_rows[:WIDTH_SAMPLE_ROWS])
+            table.append(table_header)
+            for values in table_rows:
+                table.append(values)
+        
+        tmp_file = output_file + ".tmp"
+        wb.save(tmp_file)
+    finally:
+        wb.close()
+    os.replace(tmp_file, output_file)
+    return len(rows)
\ No newline at end of file
@@ -0,0 +1,205 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterator, Iterable
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Functions listed in the text summary written next to a profile dump
+PROFILE_SUMMARY_LINES = 40
+
+
+@dataclass
+class FileStats:
+    """
+    Parsing statistics of one input file.
+    
+    The time split into reading rows (the reader decoding the file),
+    scanning for markers and extracting blocks is only measured when the
+    processor is instrumented, as it times every row; otherwise those
+    fields are None.
+    """
+    file: str
+    seconds: float = 0.0
+    open_seconds: float = 0.0
+    read_seconds: Optional[float] = None
+    scan_seconds: Optional[float] = None
+    extract_seconds: Optional[float] = None
+    sheets: int = 0
+    rows: int = 0
+    blocks: int = 0
+    records: int = 0
+    skipped_blocks: int = 0
+    failed_blocks: int = 0
+    cached: bool = False
+    reader: Optional[str] = None
+    rejected: Optional[str] = None
+    error: Optional[str] = None
+
+
+class TimedIterator:
+    """Iterator wrapper that adds the time spent fetching items to `seconds`."""
+    
+    def __init__(self, items: Iterable):
+        self._items = iter(items)
+        self.seconds = 0.0
+    
+    def __iter__(self) -> 'TimedIterator':
+        return self
+    
+    def __next__(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return next(self._items)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+class RunStats:
+    """
+    Per-stage wall time, counters and per-file statistics of one analysis run.
+    
+    Stage times accumulate, so a stage entered once per file reports its
+    total. report() returns everything as a JSON-serialisable dict.
+    """
+    
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.files: List[FileStats] = []
+        self.started = datetime.now()
+        self._start = time.perf_counter()
+        self._finished: Optional[float] = None
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block of code under a stage name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+    
+    def add_time(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+    
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def add_file(self, stats: FileStats):
+        self.files.append(stats)
+        self.count('files')
+        self.count('cached_files' if stats.cached else 'parsed_files')
+        if stats.rejected:
+            self.count('rejected_files')
+        if stats.error:
+            self.count('failed_files')
+        self.count('rows', stats.rows)
+        self.count('blocks', stats.blocks)
+        self.count('records', stats.records)
+        self.count('skipped_blocks', stats.skipped_blocks)
+        self.count('failed_blocks', stats.failed_blocks)
+    
+    def finish(self):
+        self._finished = time.perf_counter()
+    
+    @property
+    def total_seconds(self) -> float:
+        return (self._finished or time.perf_counter()) - self._start
+    
+    def report(self) -> Dict[str, Any]:
+        """Return the statistics as a JSON-serialisable dict."""
+        total = self.total_seconds
+        parse_seconds = self.stages.get('parse', 0.0)
+        parsed = [stats for stats in self.files if not stats.cached]
+        
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'total_seconds': round(total, 6),
+            'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            'counters': dict(self.counters),
+            'throughput': {
+                'rows_per_second': _rate(sum(stats.rows for stats in parsed), parse_seconds),
+                'records_per_second': _rate(self.counters.get('records', 0), parse_seconds),
+                'results_per_second': _rate(self.counters.get('results', 0), total)
+            },
+            'parse_breakdown': _parse_breakdown(parsed),
+            'peak_memory_mb': peak_memory_mb(),
+            'files': [asdict(stats) for stats in self.files]
+        }
+    
+    def save(self, path: str):
+        """Write report() to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+def peak_memory_mb() -> Dict[str, Optional[float]]:
+    """
+    Peak resident memory of this process and of its finished worker processes.
+    
+    Returns None values where the platform does not report it (Windows).
+    """
+    if resource is None:
+        return {'process': None, 'workers': None}
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'process': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 3),
+        'workers': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 3)
+    }
+
+
+@contextmanager
+def profiled(output_file: Optional[str]) -> Iterator[None]:
+    """
+    Run a block under cProfile and dump the profile to output_file.
+    
+    The dump can be opened with pstats, snakeviz or similar tools; a text
+    summary of the slowest functions is written next to it with a .txt
+    suffix. Nothing is profiled when output_file is None.
+    """
+    if not output_file:
+        yield
+        return
+    
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(output_file)
+        with open(os.path.splitext(output_file)[0] + ".txt", 'w', encoding='utf-8') as f:
+            stats = pstats.Stats(profiler, stream=f)
+            stats.sort_stats('cumulative').print_stats(PROFILE_SUMMARY_LINES)
+
+
+def _rate(amount: float, seconds: float) -> Optional[float]:
+    return round(amount / seconds, 1) if amount and seconds > 0 else None
+
+
+def _parse_breakdown(files: List[FileStats]) -> Dict[str, Optional[float]]:
+    """Total parsing time split by step, over files parsed in this run."""
+    def total(field: str) -> Optional[float]:
+        values = [getattr(stats, field) for stats in files]
+        if not values or any(value is None for value in values):
+            return None
+        return round(sum(values), 6)
+    
+    return {
+        'open_seconds': total('open_seconds'),
+        'read_seconds': total('read_seconds'),
+        'scan_seconds': total('scan_seconds'),
+        'extract_seconds': total('extract_seconds'),
+        'file_seconds': total('seconds')
+    }
\ No newline at end of file
@@ -1,9 +1,107 @@
 import numpy as np
-from scipy import interpolate
 import logging
-from typing import Optional
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Sequence
 
 from core.types import InterpolationMethod
+from core.envelope import EnvelopeTable, segment_search
+from core.splines import batch_spline
+from core.record_store import RecordStore
+
+
+# Points a record needs for each spline; shorter records are interpolated linearly
+SPLINE_DEGREES = {InterpolationMethod.CUBIC: 3, InterpolationMethod.QUADRATIC: 2}
+
+
+@dataclass
+class SortedCurves:
+    """
+    Every record sorted by ascending temperature, shared by the interpolation methods.
+    
+    Sorting and checking the records is the part of a batch interpolation
+    that does not depend on the method, so it is done once here and each
+    method only evaluates its interpolant on the sorted arrays.
+    
+    Record i occupies [starts[i]:ends[i]] of the flat arrays; valid marks
+    records with at least two points. The sort is stable, so tied
+    temperatures keep the record's order and resolve as in
+    InterpolationEngine.interpolate_many().
+    """
+    starts: np.ndarray
+    ends: np.ndarray
+    temperatures: np.ndarray
+    distances: np.ndarray
+    valid: np.ndarray
+    
+    @classmethod
+    def build(cls, offsets: np.ndarray, temperatures: np.ndarray, distances: np.ndarray) -> 'SortedCurves':
+        """Sort every record by temperature in a single pass."""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        starts, ends = offsets[:-1], offsets[1:]
+        record_ids = np.repeat(np.arange(len(starts)), ends - starts)
+        order = np.lexsort((temperatures, record_ids))
+        return cls(
+            starts,
+            ends,
+            np.asarray(temperatures, dtype=float)[order],
+            np.asarray(distances, dtype=float)[order],
+            (ends - starts) >= 2
+        )
+    
+    def interpolate(self, target_temps: Sequence[float], method: InterpolationMethod) -> np.ndarray:
+        """
+        Interpolate every record at the targets; see InterpolationEngine.interpolate_batch().
+        
+        Returns:
+            Array of shape (n_records, n_targets), NaN where no distance applies
+        """
+        targets = np.asarray(target_temps, dtype=float)
+        starts, ends = self.starts, self.ends
+        temps, dists, valid = self.temperatures, self.distances, self.valid
+        n_records = len(starts)
+        results = np.full((n_records, len(targets)), np.nan)
+        
+        if n_records == 0 or len(targets) == 0:
+            return results
+        
+        lowest = np.where(valid, starts, 0)
+        highest = np.where(valid, ends - 1, 0)
+        t_min = temps[lowest][:, np.newaxis] if len(temps) else np.zeros((n_records, 1))
+        t_max = temps[highest][:, np.newaxis] if len(temps) else np.zeros((n_records, 1))
+        grid = np.broadcast_to(targets, results.shape)
+        
+        # Targets below every temperature take the distance at the coldest point;
+        # targets above every temperature stay NaN (beyond the dispersion cloud)
+        below = valid[:, np.newaxis] & (grid < t_min)
+        results[below] = np.broadcast_to(dists[lowest][:, np.newaxis], results.shape)[below]
+        inside = valid[:, np.newaxis] & (grid >= t_min) & (grid <= t_max)
+        
+        if not inside.any():
+            return results
+        
+        if method == InterpolationMethod.LINEAR:
+            results[inside] = InterpolationEngine._batch_linear(
+                temps, dists, starts, ends, grid, inside
+            )
+        elif method == InterpolationMethod.NEAREST:
+            results[inside] = InterpolationEngine._batch_nearest(
+                temps, dists, starts, ends, grid, inside
+            )
+        elif method in SPLINE_DEGREES:
+            degree = SPLINE_DEGREES[method]
+            # Too short for the spline; interpolate_many() falls back to linear too
+            short = inside & ((ends - starts) <= degree)[:, np.newaxis]
+            spline = inside & ~short
+            if short.any():
+                results[short] = InterpolationEngine._batch_linear(
+                    temps, dists, starts, ends, grid, short
+                )
+            if spline.any():
+                results[spline] = batch_spline(temps, dists, starts, ends, grid, spline, degree)
+        else:
+            raise ValueError(f"Unsupported interpolation method: {method}")
+        
+        return results
 
 
 class InterpolationEngine:
@@ -24,77 +122,262 @@ class InterpolationEngine:
             distances: Array of corresponding distance values
             target_temp: Target temperature for interpolation
             method: Interpolation method to use
-            
+        
         Returns:
             Interpolated distance or None if interpolation fails
         """
+        return InterpolationEngine.interpolate_many(
+            temperatures, distances, [target_temp], method
+        )[0]
+    
+    @staticmethod
+    def interpolate_many(
+        temperatures: np.ndarray,
+        distances: np.ndarray,
+        target_temps: Sequence[float],
+        method: InterpolationMethod
+    ) -> List[Optional[float]]:
+        """
+        Interpolate downwind distances for several target temperatures at once.
+        
+        The curve is sorted once and every target is evaluated in a single
+        vectorized call, so a record can answer any number of thresholds
+        for the cost of one.
+        
+        Points with the same temperature are ordered as they appear in the
+        record, and wherever a tied temperature is looked up (a target at
+        that temperature, or the nearest point to a target) the last of
+        them counts; below the lowest temperature the first coldest point
+        does. Spline methods give no in-range distances for such records,
+        as interp1d rejects repeated temperatures.
+        
+        Args:
+            temperatures: Array of temperature values
+            distances: Array of corresponding distance values
+            target_temps: Target temperatures for interpolation
+            method: Interpolation method to use
+        
+        Returns:
+            Interpolated distance per target, None where interpolation fails
+        """
+        targets = np.asarray(target_temps, dtype=float)
+        
+        if method == InterpolationMethod.ENVELOPE:
+            table = EnvelopeTable.build([0, len(temperatures)], temperatures, distances)
+            return [
+                None if np.isnan(result) else float(result)
+                for result in table.furthest_distance(targets)[0]
+            ]
+        
         try:
             if len(temperatures) < 2 or len(distances) < 2:
-                return None
-                
-            # Ensure arrays are sorted by temperature (descending for dispersion)
-            sorted_indices = np.argsort(temperatures)[::-1]
+                return [None] * len(targets)
+            
+            # Ensure arrays are sorted by temperature (descending for dispersion);
+            # stable, so tied temperatures keep the record's order reversed
+            sorted_indices = np.argsort(temperatures, kind='stable')[::-1]
             temp_sorted = temperatures[sorted_indices]
             dist_sorted = distances[sorted_indices]
             
-            # Check if target temperature is within range
-            if target_temp > temp_sorted[0] or target_temp < temp_sorted[-1]:
-                return InterpolationEngine._handle_extrapolation(
-                    temp_sorted, dist_sorted, target_temp
-                )
+            results = np.full(len(targets), np.nan)
             
-            if method == InterpolationMethod.LINEAR:
-                return InterpolationEngine._linear_interpolation(
-                    temp_sorted, dist_sorted, target_temp
-                )
-            elif method == InterpolationMethod.CUBIC:
-                return InterpolationEngine._cubic_interpolation(
-                    temp_sorted, dist_sorted, target_temp
-                )
-            elif method == InterpolationMethod.QUADRATIC:
-                return InterpolationEngine._quadratic_interpolation(
-                    temp_sorted, dist_sorted, target_temp
-                )
-            elif method == InterpolationMethod.NEAREST:
-                return InterpolationEngine._nearest_interpolation(
-                    temp_sorted, dist_sorted, target_temp
-                )
+            # Targets outside the data range are handled by extrapolation rules
+            outside = (targets > temp_sorted[0]) | (targets < temp_sorted[-1])
+            results[outside] = InterpolationEngine._handle_extrapolation(
+                temp_sorted, dist_sorted, targets[outside]
+            )
+            
+            inside = ~outside
+            if inside.any():
+                if method == InterpolationMethod.LINEAR:
+                    interpolator = InterpolationEngine._linear_interpolation
+                elif method == InterpolationMethod.CUBIC:
+                    interpolator = InterpolationEngine._cubic_interpolation
+                elif method == InterpolationMethod.QUADRATIC:
+                    interpolator = InterpolationEngine._quadratic_interpolation
+                elif method == InterpolationMethod.NEAREST:
+                    interpolator = InterpolationEngine._nearest_interpolation
+                else:
+                    raise ValueError(f"Unsupported interpolation method: {method}")
                 
+                # A failing interpolator only loses the in-range targets
+                try:
+                    results[inside] = interpolator(temp_sorted, dist_sorted, targets[inside])
+                except ValueError as e:
+                    logging.error(f"Interpolation failed: {e}")
+            
+            return [None if np.isnan(result) else float(result) for result in results]
+        
         except Exception as e:
             logging.error(f"Interpolation failed: {e}")
-            return None
+            return [None] * len(targets)
+    
+    @staticmethod
+    def interpolate_batch(
+        offsets: np.ndarray,
+        temperatures: np.ndarray,
+        distances: np.ndarray,
+        target_temps: Sequence[float],
+        method: InterpolationMethod
+    ) -> np.ndarray:
+        """
+        Interpolate downwind distances for every record at once.
+        
+        Records are stored ragged: record i is temperatures/distances
+        [offsets[i]:offsets[i + 1]]. All records are sorted in one pass and
+        located with a vectorized binary search, and spline coefficients
+        are solved for batches of records at once (see batch_spline()), so
+        there is no per-record Python overhead. Results match
+        interpolate_many(), which remains the per-record reference
+        implementation.
+        
+        Args:
+            offsets: Record boundaries into the flat arrays (length n_records + 1)
+            temperatures: Flat array of temperature values
+            distances: Flat array of corresponding distance values
+            target_temps: Target temperatures for interpolation
+            method: Interpolation method to use
+            
+        Returns:
+            Array of shape (n_records, n_targets), NaN where no distance applies
+        """
+        if method == InterpolationMethod.ENVELOPE:
+            return EnvelopeTable.build(offsets, temperatures, distances).furthest_distance(target_temps)
+        return SortedCurves.build(offsets, temperatures, distances).interpolate(target_temps, method)
+    
+    @staticmethod
+    def interpolate_store(
+        records: RecordStore,
+        target_temps: Sequence[float],
+        method: InterpolationMethod
+    ) -> np.ndarray:
+        """
+        Interpolate downwind distances for every record of a store.
+        
+        The store's arrays are used in place. For the monotone envelope the
+        table cached on the store is reused, so repeated queries with new
+        thresholds only cost a binary search per record.
+        
+        Returns:
+            Array of shape (n_records, n_targets), NaN where no distance applies
+        """
+        if method == InterpolationMethod.ENVELOPE:
+            return records.envelope().furthest_distance(target_temps)
+        return InterpolationEngine.interpolate_batch(
+            records.offsets, records.temperatures, records.distances, target_temps, method
+        )
+    
+    @staticmethod
+    def interpolate_methods(
+        records: RecordStore,
+        target_temps: Sequence[float],
+        methods: Sequence[InterpolationMethod]
+    ) -> Dict[InterpolationMethod, np.ndarray]:
+        """
+        Interpolate every record of a store with several methods.
+        
+        The records are sorted once and every method is evaluated on the
+        same SortedCurves, so comparing methods costs one sort rather than
+        one per method.
+        
+        Returns:
+            Array of shape (n_records, n_targets) per method
+        """
+        curves = None
+        distances = {}
+        for method in methods:
+            if method == InterpolationMethod.ENVELOPE:
+                distances[method] = records.envelope().furthest_distance(target_temps)
+                continue
+            if curves is None:
+                curves = SortedCurves.build(records.offsets, records.temperatures, records.distances)
+            distances[method] = curves.interpolate(target_temps, method)
+        return distances
+    
+    @staticmethod
+    def group_maximum(distances: np.ndarray, starts: Sequence[int]) -> np.ndarray:
+        """
+        Furthest distance within each group of consecutive records.
+        
+        Used for the worst case across the observers of a dispersion block
+        (see RecordStore.group_starts()). A record without a distance for a
+        target is ignored; the maximum is NaN only if no record of the
+        group has one.
+        
+        Args:
+            distances: Array of shape (n_records, n_targets) from interpolate_batch()
+            starts: Index of the first record of every group, ascending
+            
+        Returns:
+            Array of shape (n_groups, n_targets)
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        if len(starts) == 0:
+            return np.empty((0, distances.shape[1]))
+        return np.fmax.reduceat(distances, starts, axis=0)
+    
+    @staticmethod
+    def _batch_linear(temps, dists, starts, ends, grid, inside) -> np.ndarray:
+        upper = segment_search(temps, starts, ends, grid)[inside]
+        target = grid[inside]
+        end = np.broadcast_to(ends[:, np.newaxis], grid.shape)[inside]
+        
+        # A target equal to the highest temperature takes that point's distance
+        at_top = upper >= end
+        upper = np.where(at_top, end - 1, upper)
+        lower = np.where(at_top, end - 1, upper - 1)
+        
+        t0, t1 = temps[lower], temps[upper]
+        d0, d1 = dists[lower], dists[upper]
+        span = np.where(t1 > t0, t1 - t0, 1.0)
+        return np.where(at_top, d1, d0 + (target - t0) * (d1 - d0) / span)
+    
+    @staticmethod
+    def _batch_nearest(temps, dists, starts, ends, grid, inside) -> np.ndarray:
+        upper = segment_search(temps, starts, ends, grid)[inside]
+        target = grid[inside]
+        end = np.broadcast_to(ends[:, np.newaxis], grid.shape)[inside]
+        
+        lower = upper - 1
+        upper = np.minimum(upper, end - 1)
+        # Ties go to the warmer point, as argmin over the descending curve does
+        take_upper = (temps[upper] - target) <= (target - temps[lower])
+        # lower is already the last point at its temperature; upper is the first
+        start = np.broadcast_to(starts[:, np.newaxis], grid.shape)[inside]
+        upper = segment_search(temps, start, end, temps[upper][:, np.newaxis])[:, 0] - 1
+        return np.where(take_upper, dists[upper], dists[lower])
     
     @staticmethod
-    def _linear_interpolation(temps: np.ndarray, dists: np.ndarray, target: float) -> float:
-        return float(np.interp(target, temps[::-1], dists[::-1]))
+    def _linear_interpolation(temps: np.ndarray, dists: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        return np.interp(targets, temps[::-1], dists[::-1])
     
     @staticmethod
-    def _cubic_interpolation(temps: np.ndarray, dists: np.ndarray, target: float) -> float:
+    def _cubic_interpolation(temps: np.ndarray, dists: np.ndarray, targets: np.ndarray) -> np.ndarray:
         if len(temps) < 4:
-            return InterpolationEngine._linear_interpolation(temps, dists, target)
+            return InterpolationEngine._linear_interpolation(temps, dists, targets)
         
+        # SciPy takes a while to import and only the spline methods need it
+        from scipy import interpolate
         f = interpolate.interp1d(temps, dists, kind='cubic', bounds_error=False)
-        result = f(target)
-        return float(result) if not np.isnan(result) else None
+        return f(targets)
     
     @staticmethod
-    def _quadratic_interpolation(temps: np.ndarray, dists: np.ndarray, target: float) -> float:
+    def _quadratic_interpolation(temps: np.ndarray, dists: np.ndarray, targets: np.ndarray) -> np.ndarray:
         if len(temps) < 3:
-            return InterpolationEngine._linear_interpolation(temps, dists, target)
+            return InterpolationEngine._linear_interpolation(temps, dists, targets)
         
+        from scipy import interpolate
         f = interpolate.interp1d(temps, dists, kind='quadratic', bounds_error=False)
-        result = f(target)
-        return float(result) if not np.isnan(result) else None
+        return f(targets)
     
     @staticmethod
-    def _nearest_interpolation(temps: np.ndarray, dists: np.ndarray, target: float) -> float:
-        idx = np.argmin(np.abs(temps - target))
-        return float(dists[idx])
+    def _nearest_interpolation(temps: np.ndarray, dists: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        idx = np.argmin(np.abs(temps[np.newaxis, :] - targets[:, np.newaxis]), axis=1)
+        return dists[idx]
     
     @staticmethod
-    def _handle_extrapolation(temps: np.ndarray, dists: np.ndarray, target: float) -> Optional[float]:
-        """Handle cases where target temperature is outside the data range."""
-        if target > temps[0]:  # Target higher than all temperatures
-            return None  # Cannot extrapolate beyond dispersion cloud
-        else:  # Target lower than all temperatures
-            return float(dists[-1])  # Return maximum distance 
\ No newline at end of file
+    def _handle_extrapolation(temps: np.ndarray, dists: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Handle targets outside the data range (NaN where no distance applies)."""
+        # Targets higher than all temperatures cannot be extrapolated beyond
+        # the dispersion cloud; lower targets take the maximum distance
+        return np.where(targets > temps[0], np.nan, dists[-1])
@@ -0,0 +1,256 @@
+import json
+import logging
+import os
+import uuid
+import zipfile
+import hashlib
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from core.types import AnalysisResult
+from core.cache import file_content_hash
+from core.record_store import RecordStore, MISSING_LABEL
+
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Folder next to the manifest holding each file's records and results as NumPy archives
+DATA_SUFFIX = ".manifest"
+
+# Numeric fields of AnalysisResult; the others are labels
+RESULT_FLOATS = ('downwind_distance', 'temperature_of_interest')
+
+
+@dataclass
+class ManifestDiff:
+    """Input files grouped by how they changed since the manifest was written."""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+
+class AnalysisManifest:
+    """
+    Record of the input files behind a results workbook.
+    
+    The manifest lives next to the output file and stores, per input file,
+    its size, mtime and content hash. The records extracted from the file
+    and the results computed from them are kept as NumPy archives in a
+    folder beside it (results.xlsx.manifest), so the JSON index stays
+    small and a re-run only reads the archives of the files it reuses. A
+    re-run can then parse only files that were added or changed and merge
+    their rows into the existing workbook.
+    
+    New records and results are held in memory until save(), which writes
+    them to new archives before the index that names them and then
+    deletes archives the index no longer uses, so an interrupted run
+    never leaves the index pointing at newer data than it describes.
+    """
+    
+    def __init__(self, path: Path, settings: Dict[str, Any]):
+        self.path = path
+        self.data_path = path.with_name(path.name[:-len(MANIFEST_SUFFIX)] + DATA_SUFFIX)
+        self.settings = settings
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.logger = logging.getLogger(__name__)
+        self._records: Dict[str, RecordStore] = {}
+        self._results: Dict[str, List[AnalysisResult]] = {}
+    
+    @staticmethod
+    def path_for(output_file: str) -> Path:
+        """Return the manifest path for a results workbook."""
+        return Path(output_file + MANIFEST_SUFFIX)
+    
+    @classmethod
+    def load(cls, output_file: str) -> 'AnalysisManifest':
+        """Load the manifest for an output file, or return an empty one."""
+        path = cls.path_for(output_file)
+        manifest = cls(path, {})
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            manifest.settings = data['settings']
+            manifest.files = data['files']
+            if any('records_file' not in entry for entry in manifest.files.values()):
+                raise ValueError("written by an earlier version")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            manifest.logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+            manifest.settings, manifest.files = {}, {}
+        return manifest
+    
+    def reset(self, settings: Dict[str, Any]):
+        """Forget every file and start over with new settings."""
+        self.settings = settings
+        self.files = {}
+        self._records, self._results = {}, {}
+    
+    def diff(self, files: Dict[str, Path]) -> ManifestDiff:
+        """
+        Compare the current input files with the manifest.
+        
+        Args:
+            files: Input files keyed by their source file name
+        
+        Returns:
+            Files grouped as added, changed, removed or unchanged. A file
+            whose size or mtime moved but whose content hash did not is
+            unchanged.
+        """
+        diff = ManifestDiff()
+        
+        for key, file_path in files.items():
+            entry = self.files.get(key)
+            if entry is None:
+                diff.added.append(key)
+                continue
+            if not self._stored(key):
+                diff.changed.append(key)
+                continue
+            
+            stat = file_path.stat()
+            if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                diff.unchanged.append(key)
+            elif entry['hash'] == file_content_hash(file_path):
+                entry['size'], entry['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+                diff.unchanged.append(key)
+            else:
+                diff.changed.append(key)
+        
+        diff.removed = [key for key in self.files if key not in files]
+        return diff
+    
+    def update_file(
+        self,
+        key: str,
+        file_path: Path,
+        records: RecordStore,
+        results: List[AnalysisResult]
+    ):
+        """Store the records and results for one input file."""
+        stat = file_path.stat()
+        self.files[key] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': file_content_hash(file_path),
+            'record_count': len(records)
+        }
+        self._records[key] = records
+        self._results[key] = list(results)
+    
+    def set_results(self, key: str, results: List[AnalysisResult]):
+        """Replace the stored results for a file whose records are unchanged."""
+        self._results[key] = list(results)
+    
+    def remove_file(self, key: str):
+        self.files.pop(key, None)
+        self._records.pop(key, None)
+        self._results.pop(key, None)
+    
+    def records(self, key: str) -> RecordStore:
+        if key in self._records:
+            return self._records[key]
+        return RecordStore.load(self.data_path / self.files[key]['records_file'])
+    
+    def results(self, key: str) -> List[AnalysisResult]:
+        if key in self._results:
+            return self._results[key]
+        return _load_results(self.data_path / self.files[key]['results_file'])
+    
+    def save(self):
+        """Write new archives, then the index atomically, then drop unused archives."""
+        self.data_path.mkdir(parents=True, exist_ok=True)
+        for key, records in self._records.items():
+            self.files[key]['records_file'] = _archive_name(key, "records")
+            records.save(self.data_path / self.files[key]['records_file'])
+        for key, results in self._results.items():
+            self.files[key]['results_file'] = _archive_name(key, "results")
+            _save_results(self.data_path / self.files[key]['results_file'], results)
+        self._records, self._results = {}, {}
+        
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'settings': self.settings, 'files': self.files}, f)
+        os.replace(tmp_path, self.path)
+        
+        used = {entry[name] for entry in self.files.values() for name in ('records_file', 'results_file')}
+        for archive in self.data_path.glob("*.npz"):
+            if archive.name not in used:
+                try:
+                    archive.unlink()
+                except OSError as e:
+                    self.logger.warning(f"Could not remove {archive}: {e}")
+    
+    def _stored(self, key: str) -> bool:
+        """Whether both archives of a file are on disk and not cut short."""
+        entry = self.files[key]
+        for name in ('records_file', 'results_file'):
+            archive = self.data_path / entry[name] if name in entry else None
+            # A truncated or overwritten archive has no zip directory at its end
+            if archive is None or not archive.is_file() or not zipfile.is_zipfile(archive):
+                if archive is not None and archive.is_file():
+                    self.logger.warning(f"Ignoring unreadable manifest archive {archive}")
+                return False
+        return True
+
+
+def _archive_name(key: str, kind: str) -> str:
+    """A new archive name for a file; never reused, so an older index never sees newer data."""
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return f"{digest}-{uuid.uuid4().hex[:8]}.{kind}.npz"
+
+
+def _save_results(path: Path, results: List[AnalysisResult]):
+    """Write results column by column, labels as codes into their distinct values."""
+    arrays = {}
+    for result_field in fields(AnalysisResult):
+        values = [getattr(result, result_field.name) for result in results]
+        if result_field.name in RESULT_FLOATS:
+            arrays[result_field.name] = np.array(values, dtype=np.float64)
+            continue
+        index: Dict[str, int] = {}
+        arrays[f'{result_field.name}.codes'] = np.array(
+            [MISSING_LABEL if value is None else index.setdefault(value, len(index)) for value in values],
+            dtype=np.int32
+        )
+        arrays[f'{result_field.name}.categories'] = np.array(list(index), dtype=str)
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _load_results(path: Path) -> List[AnalysisResult]:
+    with np.load(path, allow_pickle=False) as data:
+        columns = {}
+        for result_field in fields(AnalysisResult):
+            if result_field.name in RESULT_FLOATS:
+                columns[result_field.name] = data[result_field.name].tolist()
+                continue
+            categories = data[f'{result_field.name}.categories'].tolist()
+            columns[result_field.name] = [
+                None if code == MISSING_LABEL else categories[code]
+                for code in data[f'{result_field.name}.codes'].tolist()
+            ]
+    names = list(columns)
+    return [AnalysisResult(**dict(zip(names, values))) for values in zip(*columns.values())]
+
+
+@dataclass
+class IncrementalUpdate:
+    """Outcome of an incremental run, used to update the results workbook."""
+    manifest: AnalysisManifest
+    diff: ManifestDiff
+    full_rewrite: bool
+    
+    @property
+    def stale_files(self) -> Optional[List[str]]:
+        """Source files whose rows must be replaced, or None for a full rewrite."""
+        if self.full_rewrite:
+            return None
+        return self.diff.changed + self.diff.removed
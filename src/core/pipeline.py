@@ -0,0 +1,686 @@
+import os
+import time
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Optional, Iterator, Tuple, Set
+
+from core.types import TemperatureType, InterpolationMethod, ObserverSelection, AnalysisResult, MAX_OBSERVER
+from core.excel_processor import ExcelProcessor, PARSER_VERSION, source_file_name
+from core.manifest import AnalysisManifest, IncrementalUpdate
+from core.cache import ParseCache
+from core.interpolation import InterpolationEngine
+from core.record_store import RecordStore, LABEL_FIELDS
+from core.exporter import export_results, export_format
+from core.aggregation import ResultColumns, parse_rollups
+from core.comparison import MethodComparison, DEFAULT_TOLERANCE
+from core.results_db import ResultsDatabase
+from core.checkpoint import RunCheckpoint
+from core.progress import ProgressTracker
+from core.instrumentation import RunStats, TimedIterator, profiled
+from core.discovery import iter_in_background
+
+
+# Share of the overall progress bar taken by each stage of a run
+STAGE_WEIGHTS = {'parse': 0.75, 'analyse': 0.15, 'export': 0.10}
+
+
+class AnalysisCancelled(Exception):
+    """Raised when an analysis run is cancelled before it finishes."""
+
+
+class AnalysisPipeline:
+    """
+    Qt-free analysis engine: parses the input folder and interpolates
+    distances for every dispersion record.
+    
+    Status and weighted progress are reported through optional callbacks, results
+    are yielded file by file as they become available, and a run can be
+    cancelled from another thread with cancel(). The GUI worker thread and
+    the command-line runner are thin adapters over this class.
+    
+    Stage timings, counters and per-file parsing statistics of the last
+    run are collected in stats. The 'stats_file' option writes them as a
+    JSON report after run_export(), and 'profile_file' dumps a cProfile
+    profile of it.
+    """
+    
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        status_callback: Optional[Callable[[str], None]] = None,
+        progress_callback: Optional[Callable[[int, Optional[float]], None]] = None
+    ):
+        """
+        Args:
+            config: Analysis configuration (input folder, temperature types,
+                temperatures of interest, interpolation method, options)
+            status_callback: Receives human-readable status messages
+            progress_callback: Receives progress as a percentage and the
+                estimated seconds left (None until it can be estimated),
+                throttled by ProgressTracker
+        """
+        self.config = config
+        self.status_callback = status_callback
+        self.progress_callback = progress_callback
+        self.incremental_update: Optional[IncrementalUpdate] = None
+        self.records: Optional[RecordStore] = None
+        self.progress = ProgressTracker({})
+        self.stats = RunStats()
+        self.checkpoint: Optional[RunCheckpoint] = None
+        self.comparison: Optional[MethodComparison] = None
+        self._export_pending = False
+        self._partial_export: Optional[str] = None
+        self._cancel_event = threading.Event()
+    
+    def cancel(self):
+        """Request cancellation; the run stops at the next file boundary."""
+        self._cancel_event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def request_partial_export(self, output_file: str):
+        """
+        Export the results of the files analysed so far, while the run goes on.
+        
+        Safe to call from another thread or a signal handler: the export is
+        written by the analysis thread at the next file boundary, from the
+        kept records or, without them, from the checkpoint.
+        
+        Raises:
+            ValueError: If the format is unsupported or the file is the run's output
+        """
+        export_format(output_file)
+        if self.config.get('output_file') and Path(output_file).resolve() == Path(self.config['output_file']).resolve():
+            raise ValueError("Partial results cannot be written to the run's output file")
+        self._partial_export = output_file
+    
+    def run(self) -> List[AnalysisResult]:
+        """
+        Run the full analysis and return every result.
+        
+        Raises:
+            ValueError: If no dispersion data is found in the input folder
+            AnalysisCancelled: If the run was cancelled
+        """
+        return list(self.iter_results())
+    
+    def iter_results(self) -> Iterator[AnalysisResult]:
+        """
+        Yield analysis results incrementally, one input file at a time.
+        
+        In incremental mode only added or changed files are parsed. If the
+        existing workbook can be updated in place, only their results are
+        yielded; otherwise results for every file are yielded, taking
+        unchanged files from the manifest. incremental_update describes
+        which case applies.
+        
+        Input files are found by walking the input folder, into subfolders
+        with the 'recursive' option and filtered by 'include_patterns' and
+        'exclude_patterns', unless 'input_files' lists the files to analyse
+        (paths under the input folder). Outside incremental mode the walk
+        runs in a background thread and files are parsed as they are found.
+        
+        With the 'keep_records' option the parsed records of every input
+        file are kept in records once the run completes, so results can be
+        recomputed for other thresholds or methods without parsing again.
+        
+        With the 'checkpoint' option, when exporting, parsed records are
+        journaled next to the output file (see RunCheckpoint); files already
+        journaled by an interrupted run with the same settings are restored
+        from it instead of being parsed again.
+        
+        With 'compare_methods' listing interpolation methods, every input
+        file is also compared across them into comparison (see
+        MethodComparison), flagging spreads above 'compare_tolerance'.
+        
+        Raises:
+            ValueError: If no dispersion data is found in the input folder
+            AnalysisCancelled: If the run was cancelled
+        """
+        self._status("Initializing analysis...")
+        
+        stages = STAGE_WEIGHTS if self._export_pending else {
+            stage: weight for stage, weight in STAGE_WEIGHTS.items() if stage != 'export'
+        }
+        self.progress = ProgressTracker(stages, self.progress_callback)
+        self.stats = stats = RunStats()
+        
+        processor = self._create_processor()
+        targets = self.config['temperatures_of_interest']
+        method = InterpolationMethod(self.config['interpolation_method'])
+        
+        input_folder = Path(self.config['input_folder'])
+        if self.config.get('input_files') is not None:
+            discovered = iter([Path(file_path) for file_path in self.config['input_files']])
+        else:
+            discovered = processor.find_files(
+                input_folder,
+                self.config.get('recursive', False),
+                self.config.get('include_patterns'),
+                self.config.get('exclude_patterns')
+            )
+        reused: Dict[str, List[AnalysisResult]] = {}
+        checkpoint = self.checkpoint = self._open_checkpoint(processor)
+        comparison = self.comparison = self._create_comparison(targets)
+        manifest = None
+        walker = None
+        found_data = False
+        
+        self._status("Processing Excel files...")
+        if self.config.get('incremental'):
+            # Comparing with the manifest needs every file, so discovery finishes first
+            with stats.stage('discover'):
+                files = {source_file_name(file_path, input_folder): file_path for file_path in discovered}
+            with stats.stage('plan_incremental'):
+                to_parse, reused = self._plan_incremental(files, targets, method)
+            manifest = self.incremental_update.manifest
+            found_data = any(manifest.files[key]['record_count'] for key in files if key not in to_parse)
+            
+            # Parsing time grows with file size, so weight its progress by bytes
+            self.progress.set_total('parse', sum(_file_size(files[key]) for key in to_parse))
+            self.progress.set_total('analyse', len(files))
+            to_process = [files[key] for key in to_parse]
+        else:
+            # Files are parsed while the folder tree is still being walked
+            walker = TimedIterator(discovered)
+            to_process = iter_in_background(walker, self._on_file_found)
+        
+        file_results = processor.iter_files(
+            to_process,
+            progress_callback=self._on_file_processed,
+            root=input_folder,
+            stats_callback=stats.add_file,
+            restore=checkpoint.restore if checkpoint is not None else None
+        )
+        if manifest:
+            work = self._incremental_work(files, set(to_parse), file_results)
+        else:
+            work = (
+                (source_file_name(file_path, input_folder), file_path, file_data)
+                for file_path, file_data in file_results
+            )
+        
+        keep_records = self.config.get('keep_records') or self.config.get('results_db')
+        kept: Optional[List[RecordStore]] = [] if keep_records else None
+        reused_done: List[str] = []
+        try:
+            while True:
+                self._check_cancelled()
+                if self._partial_export:
+                    self._write_partial(kept, reused_done, targets, method)
+                with stats.stage('parse'):
+                    item = next(work, None)
+                if item is None:
+                    break
+                key, file_path, file_data = item
+                
+                if file_data is None:
+                    if kept is not None:
+                        kept.append(manifest.records(key))
+                    else:
+                        reused_done.append(key)
+                    if comparison is not None:
+                        with stats.stage('interpolate'):
+                            comparison.add(manifest.records(key))
+                    stats.count('reused_files')
+                    stats.count('results', len(reused.get(key, [])))
+                    yield from reused.get(key, [])
+                    self.progress.advance('analyse')
+                    continue
+                
+                if kept is not None:
+                    kept.append(file_data)
+                if checkpoint is not None:
+                    with stats.stage('checkpoint'):
+                        checkpoint.add(file_path, file_data)
+                with stats.stage('interpolate'):
+                    # The comparison interpolates the run's method too, if it is one of its methods
+                    distances = comparison.add(file_data).get(method) if comparison is not None else None
+                    results = list(self._interpolate_records(file_data, targets, method, distances))
+                if manifest:
+                    with stats.stage('manifest'):
+                        manifest.update_file(key, file_path, file_data, results)
+                
+                found_data = found_data or len(file_data) > 0
+                stats.count('results', len(results))
+                yield from results
+                self.progress.advance('analyse')
+                if self._streams_export:
+                    # Resumed once the exporter has taken every row of the file
+                    self.progress.advance('export')
+        finally:
+            file_results.close()
+            if checkpoint is not None:
+                # Whatever was parsed before a failure or cancellation is kept for the next run
+                with stats.stage('checkpoint'):
+                    checkpoint.flush()
+            if walker:
+                to_process.close()
+                # Walking ran alongside parsing, so this overlaps the parse stage
+                stats.add_time('discover', walker.seconds)
+        
+        self._check_cancelled()
+        if not found_data:
+            raise ValueError("No valid data found in Excel files")
+        
+        if manifest:
+            for key in self.incremental_update.diff.removed:
+                manifest.remove_file(key)
+        if kept is not None:
+            self.records = RecordStore.concat(kept)
+        
+        self._status("Analysis complete")
+        if self._export_pending:
+            self.progress.complete('parse')
+            self.progress.complete('analyse')
+        else:
+            stats.finish()
+            self.progress.finish()
+    
+    def run_export(self) -> int:
+        """
+        Run the analysis and stream the results into the output file.
+        
+        Rows are written as each input file is analysed, so results are
+        never held in memory as a whole. Incremental runs collect their
+        results first, as the rows to replace are only known once the
+        input folder has been compared with the manifest. The manifest is
+        saved, and the checkpoint of the run removed, after a successful
+        export.
+        
+        With 'results_db' set to a SQLite file, the results and parsed
+        curves are also stored there as the study of this output file
+        (named by 'study_name'), replacing its previous rows; see
+        ResultsDatabase.
+        
+        The 'rollups' option lists RollupSpec strings (e.g. "max:subsection");
+        results are collected in compact columns while they are written and
+        each rollup is exported as an extra sheet or file once they are all in.
+        A method comparison ('compare_methods') is exported the same way.
+        
+        The statistics report is written even if the run fails, so a slow
+        or failing run can still be diagnosed.
+        
+        Returns:
+            Number of rows exported
+        
+        Raises:
+            ValueError: If no data is found or the output format is unsupported
+            AnalysisCancelled: If the run was cancelled
+        """
+        output_file = self.config['output_file']
+        export_format(output_file)
+        
+        try:
+            with profiled(self.config.get('profile_file')):
+                exported = self._export(output_file)
+        finally:
+            self.stats.finish()
+            if self.config.get('stats_file'):
+                self._save_stats(self.config['stats_file'])
+        
+        self._status(f"Exported {exported} rows to {output_file}")
+        return exported
+    
+    def _export(self, output_file: str) -> int:
+        self._export_pending = True
+        rollups = parse_rollups(self.config.get('rollups') or [])
+        database = writer = None
+        if self.config.get('results_db'):
+            database = ResultsDatabase(self.config['results_db'])
+        try:
+            results = self.iter_results()
+            if self.config.get('incremental'):
+                results = self._track_export(list(results))
+            update = self.incremental_update
+            # An in-place update only writes the changed files; summaries cover every file in the manifest
+            in_place = update is not None and not update.full_rewrite
+            
+            extra_tables = None
+            table_seconds = 0.0
+            if rollups:
+                columns = ResultColumns(self.config['temperatures_of_interest'], self._rollup_observer())
+                if in_place:
+                    for key in update.manifest.files:
+                        columns.extend(update.manifest.results(key))
+                else:
+                    results = columns.collect(results)
+            
+            if rollups or self.config.get('compare_methods'):
+                def extra_tables():
+                    nonlocal table_seconds
+                    decimal_places = self.config.get('decimal_places', 2)
+                    start = time.perf_counter()
+                    tables = columns.rollups(rollups, decimal_places) if rollups else []
+                    self.stats.add_time('rollup', time.perf_counter() - start)
+                    if self.comparison is not None:
+                        with self.stats.stage('compare_table'):
+                            tables.append(self.comparison.table(decimal_places))
+                    table_seconds = time.perf_counter() - start
+                    return tables
+            
+            if database:
+                writer = database.begin_study(
+                    output_file,
+                    self.config.get('study_name'),
+                    dict(self.config, observer_selection=self._observer_selection().value)
+                )
+                if in_place:
+                    for key in update.manifest.files:
+                        writer.add_results(update.manifest.results(key))
+                else:
+                    results = writer.collect(results)
+            
+            # Streamed results are produced while the exporter pulls them; time
+            # spent producing them is already counted in the earlier stages
+            results = TimedIterator(results)
+            start = time.perf_counter()
+            exported = export_results(
+                results,
+                output_file,
+                self.config.get('decimal_places', 2),
+                self.config['temperatures_of_interest'],
+                stale_files=update.stale_files if update else None,
+                extra_tables=extra_tables
+            )
+            self.stats.add_time('export', time.perf_counter() - start - results.seconds - table_seconds)
+            self.stats.count('exported_rows', exported)
+            
+            with self.stats.stage('commit'):
+                self.commit()
+                if self.checkpoint is not None:
+                    self.checkpoint.remove()
+            if writer:
+                writer.add_curves(self.records)
+                writer.commit()
+                self.stats.add_time('database', writer.seconds)
+                self._status(f"Stored {writer.count} results in {self.config['results_db']}")
+        except BaseException:
+            if writer:
+                writer.rollback()
+            raise
+        finally:
+            if database:
+                database.close()
+        
+        self.progress.finish()
+        return exported
+    
+    def _save_stats(self, stats_file: str):
+        try:
+            self.stats.save(stats_file)
+        except OSError as e:
+            self._status(f"Could not write statistics to {stats_file}: {e}")
+            return
+        self._status(f"Statistics written to {stats_file}")
+    
+    def commit(self):
+        """Save the incremental manifest once the results have been exported."""
+        if self.incremental_update:
+            self.incremental_update.manifest.save()
+    
+    def _plan_incremental(
+        self,
+        files: Dict[str, Path],
+        targets: List[float],
+        method: InterpolationMethod
+    ) -> Tuple[List[str], Dict[str, List[AnalysisResult]]]:
+        """
+        Decide which files to parse and which results can be reused.
+        
+        Returns:
+            Tuple of (files to parse, results to re-emit per unchanged file)
+        """
+        output_file = self.config['output_file']
+        manifest = AnalysisManifest.load(output_file)
+        settings = {
+            'parse': {
+                'parser_version': PARSER_VERSION,
+                'temperature_types': list(self.config['temperature_types'])
+            },
+            'analysis': {
+                'temperatures_of_interest': list(targets),
+                'interpolation_method': method.value,
+                'observer_selection': self._observer_selection().value
+            },
+            'export': {
+                'decimal_places': self.config.get('decimal_places', 2),
+                'rollups': [str(spec) for spec in parse_rollups(self.config.get('rollups') or [])],
+                'compare_methods': list(self.config.get('compare_methods') or []),
+                'compare_tolerance': self.config.get('compare_tolerance', DEFAULT_TOLERANCE)
+            }
+        }
+        
+        same_analysis = manifest.settings.get('analysis') == settings['analysis']
+        # Only workbooks can be updated in place; other formats are rewritten
+        full_rewrite = (
+            manifest.settings != settings
+            or not os.path.exists(output_file)
+            or export_format(output_file) != 'xlsx'
+        )
+        if manifest.settings.get('parse') != settings['parse']:
+            manifest.reset(settings)
+        manifest.settings = settings
+        
+        diff = manifest.diff(files)
+        self.incremental_update = IncrementalUpdate(manifest, diff, full_rewrite)
+        self._status(
+            f"Incremental run: {len(diff.added)} added, {len(diff.changed)} changed, "
+            f"{len(diff.removed)} removed, {len(diff.unchanged)} unchanged"
+        )
+        
+        # A full rewrite still needs rows for unchanged files; recompute them
+        # from the stored records if only the analysis settings changed
+        reused = {}
+        if full_rewrite:
+            for key in diff.unchanged:
+                if same_analysis:
+                    reused[key] = manifest.results(key)
+                else:
+                    results = list(self._interpolate_records(manifest.records(key), targets, method))
+                    manifest.set_results(key, results)
+                    reused[key] = results
+        
+        # Files are parsed and paired with their keys in folder order (see _incremental_work())
+        pending = set(diff.added + diff.changed)
+        return [key for key in files if key in pending], reused
+    
+    def _open_checkpoint(self, processor: ExcelProcessor) -> Optional[RunCheckpoint]:
+        """Open the output file's checkpoint when the run exports and checkpointing is on."""
+        if not (self.config.get('checkpoint') and self._export_pending and self.config.get('output_file')):
+            return None
+        settings = {
+            'parser': processor.cache_namespace,
+            'input_folder': os.path.abspath(self.config['input_folder'])
+        }
+        checkpoint = RunCheckpoint.open(self.config['output_file'], settings)
+        if checkpoint.files:
+            self._status(f"Resuming from checkpoint: {len(checkpoint.files)} file(s) already parsed")
+        return checkpoint
+    
+    def _create_comparison(self, targets: List[float]) -> Optional[MethodComparison]:
+        methods = self.config.get('compare_methods')
+        if not methods:
+            return None
+        return MethodComparison(
+            [InterpolationMethod(method) for method in methods],
+            targets,
+            self.config.get('compare_tolerance', DEFAULT_TOLERANCE),
+            self._observer_selection()
+        )
+    
+    def _write_partial(
+        self,
+        kept: Optional[List[RecordStore]],
+        reused_done: List[str],
+        targets: List[float],
+        method: InterpolationMethod
+    ):
+        """Export the results of the files analysed so far to the requested partial output."""
+        output_file, self._partial_export = self._partial_export, None
+        if kept is not None:
+            parts = iter(kept)
+        elif self.checkpoint is not None:
+            parts = self.checkpoint.iter_records()
+        else:
+            self._status("Partial results need checkpointing or kept records; none were written")
+            return
+        
+        def partial_results() -> Iterator[AnalysisResult]:
+            # Unchanged files of an incremental run are only in the manifest
+            for key in reused_done:
+                yield from self.incremental_update.manifest.results(key)
+            for records in parts:
+                yield from self._interpolate_records(records, targets, method)
+        
+        self._status(f"Writing partial results to {output_file}...")
+        try:
+            with self.stats.stage('partial_export'):
+                exported = export_results(
+                    partial_results(), output_file, self.config.get('decimal_places', 2), targets
+                )
+        except (ValueError, OSError) as e:
+            self._status(f"Could not write partial results to {output_file}: {e}")
+            return
+        self._status(f"Exported {exported} partial rows to {output_file}")
+    
+    def _create_processor(self) -> ExcelProcessor:
+        cache = None
+        if self.config.get('use_cache'):
+            cache = ParseCache(
+                self.config.get('cache_dir'),
+                self.config.get('cache_max_mb', 512) * 1024 * 1024
+            )
+        
+        workers = self.config.get('workers', 1)
+        if self.config.get('profile_file') and workers != 1:
+            # cProfile only sees this process, so parse here to profile the parser
+            self._status("Profiling: parsing files in a single process")
+            workers = 1
+        
+        return ExcelProcessor(
+            [TemperatureType(t) for t in self.config['temperature_types']],
+            self.config.get('verbose', False),
+            workers,
+            cache,
+            instrument=bool(self.config.get('stats_file')),
+            reader=self.config.get('reader', 'auto')
+        )
+    
+    def _interpolate_records(
+        self,
+        records: RecordStore,
+        targets: List[float],
+        method: InterpolationMethod,
+        distances: Optional[np.ndarray] = None
+    ) -> Iterator[AnalysisResult]:
+        """
+        Interpolate every record of one file in a single batch call on the store.
+        
+        Each dispersion block yields results for its observers and for the
+        furthest distance across them (observer MAX_OBSERVER), or only one
+        of the two, following the 'observer_selection' option. distances
+        may hold every record's distances already interpolated with method.
+        """
+        if len(records) == 0:
+            return
+        if distances is None:
+            distances = InterpolationEngine.interpolate_store(records, targets, method)
+        rows = records.result_rows(self._observer_selection())
+        row_distances = rows.distances(distances)
+        observers = rows.observers(records)
+        labels = {field: records.labels(field) for field in LABEL_FIELDS}
+        
+        for row, i in enumerate(rows.records):
+            for target, distance in zip(targets, row_distances[row]):
+                if np.isnan(distance):
+                    continue
+                yield AnalysisResult(
+                    subsection=labels['equipment_item'][i],
+                    scenario=labels['scenario'][i],
+                    weather=labels['weather'][i],
+                    downwind_distance=float(distance),
+                    interpolation_method=method.value,
+                    temperature_of_interest=target,
+                    temperature_type=labels['temperature_type'][i],
+                    observer=observers[row],
+                    source_file=labels['source_file'][i]
+                )
+    
+    def _observer_selection(self) -> ObserverSelection:
+        return ObserverSelection(self.config.get('observer_selection', ObserverSelection.ALL.value))
+    
+    def _rollup_observer(self) -> str:
+        """Observer whose results are rolled up, so each dispersion block counts once."""
+        return '1' if self._observer_selection() == ObserverSelection.FIRST else MAX_OBSERVER
+    
+    def _incremental_work(
+        self,
+        files: Dict[str, Path],
+        to_parse: Set[str],
+        file_results: Iterator[Tuple[Path, RecordStore]]
+    ) -> Iterator[Tuple[str, Path, Optional[RecordStore]]]:
+        """
+        Yield (key, file_path, records) for every file, with None for files not parsed.
+        
+        file_results must yield the files in to_parse in the order of files.
+        """
+        for key, file_path in files.items():
+            if key in to_parse:
+                parsed_path, file_data = next(file_results)
+                if Path(parsed_path) != Path(file_path):
+                    raise RuntimeError(f"Parsed {parsed_path} while expecting {file_path}")
+                yield key, file_path, file_data
+            else:
+                yield key, file_path, None
+    
+    @property
+    def _streams_export(self) -> bool:
+        """Whether rows are written as files are parsed, so export progress is counted in files."""
+        return self._export_pending and not self.config.get('incremental')
+    
+    def _track_export(self, results: List[AnalysisResult]) -> Iterator[AnalysisResult]:
+        """Yield collected results, advancing the export stage as they are written."""
+        self.progress.set_total('export', len(results))
+        for result in results:
+            yield result
+            self.progress.advance('export')
+    
+    def _on_file_found(self, file_path: Path):
+        # Called from the discovery thread
+        self.progress.add_total('parse', _file_size(file_path))
+        self.progress.add_total('analyse', 1)
+        if self._streams_export:
+            self.progress.add_total('export', 1)
+    
+    def _on_file_processed(self, completed: int, total: int, file_path: Path):
+        self._status(f"Processed {file_path.name} ({completed}/{total})")
+        self.progress.advance('parse', _file_size(file_path))
+    
+    def _check_cancelled(self):
+        if self.cancelled:
+            self._status("Analysis cancelled")
+            raise AnalysisCancelled("Analysis was cancelled")
+    
+    def _status(self, message: str):
+        if self.status_callback:
+            self.status_callback(message)
+
+
+def _file_size(file_path: Path) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+
+def run_analysis(
+    config: Dict[str, Any],
+    status_callback: Optional[Callable[[str], None]] = None,
+    progress_callback: Optional[Callable[[int, Optional[float]], None]] = None
+) -> List[AnalysisResult]:
+    """Run a complete analysis; see AnalysisPipeline for the arguments."""
+    return AnalysisPipeline(config, status_callback, progress_callback).run()
\ No newline at end of file
@@ -0,0 +1,141 @@
+import threading
+import time
+from typing import Dict, Callable, Optional
+
+
+# Minimum seconds between two progress reports
+REPORT_INTERVAL = 0.1
+
+# Fraction of the work and seconds elapsed before an ETA is estimated
+ETA_MIN_FRACTION = 0.02
+ETA_MIN_SECONDS = 1.0
+
+
+class ProgressTracker:
+    """
+    Overall progress of a run made of weighted stages, with an ETA.
+    
+    Each stage has a weight, its share of the whole run, and a total in
+    any unit (bytes, files, rows). Stages may advance concurrently, as
+    parsing and writing do when results are streamed. Reports go to the
+    callback as (percent, eta_seconds), at most once per interval and only
+    when the percentage changes, so per-item calls to advance() stay cheap
+    and never flood the receiver.
+    
+    Totals may grow while a stage runs, for example while files are still
+    being discovered; the reported percentage never goes backwards. Stages
+    may be updated from several threads.
+    """
+    
+    def __init__(
+        self,
+        weights: Dict[str, float],
+        callback: Optional[Callable[[int, Optional[float]], None]] = None,
+        interval: float = REPORT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            weights: Relative weight of each stage; normalised to sum to 1
+            callback: Receives (percent, eta_seconds); eta is None until
+                enough of the run has completed to estimate it
+            interval: Minimum seconds between reports
+            clock: Time source, in seconds
+        """
+        total_weight = sum(weights.values()) or 1.0
+        self.weights = {stage: weight / total_weight for stage, weight in weights.items()}
+        self.callback = callback
+        self.interval = interval
+        self.clock = clock
+        self._totals: Dict[str, float] = {}
+        self._done: Dict[str, float] = {stage: 0.0 for stage in weights}
+        self._started = clock()
+        self._last_report = None
+        self._last_percent = -1
+        self._lock = threading.Lock()
+    
+    def set_total(self, stage: str, total: float):
+        """Set the amount of work in a stage; a stage with nothing to do counts as complete."""
+        with self._lock:
+            self._totals[stage] = total
+            self._report()
+    
+    def add_total(self, stage: str, amount: float):
+        """Add work to a stage whose total is not known up front."""
+        with self._lock:
+            self._totals[stage] = self._totals.get(stage, 0.0) + amount
+            self._report()
+    
+    def advance(self, stage: str, amount: float = 1):
+        """Record progress within a stage."""
+        with self._lock:
+            self._done[stage] += amount
+            self._report()
+    
+    def complete(self, stage: str):
+        """Mark a stage as finished, whatever its total."""
+        with self._lock:
+            self._complete(stage)
+            self._report()
+    
+    def finish(self):
+        """Mark every stage as finished and report 100 %."""
+        with self._lock:
+            for stage in self.weights:
+                self._complete(stage)
+            self._report(force=True)
+    
+    @property
+    def fraction(self) -> float:
+        """Completed fraction of the whole run, between 0 and 1."""
+        fraction = 0.0
+        for stage, weight in self.weights.items():
+            total = self._totals.get(stage)
+            if total is None:
+                continue
+            fraction += weight * (min(self._done[stage] / total, 1.0) if total > 0 else 1.0)
+        # Rounded so that float error in the weighted sum cannot leave a finished run at 99 %
+        return min(round(fraction, 9), 1.0)
+    
+    @property
+    def elapsed(self) -> float:
+        return self.clock() - self._started
+    
+    def eta(self) -> Optional[float]:
+        """Estimated seconds left, assuming the remaining work runs at the average rate so far."""
+        fraction, elapsed = self.fraction, self.elapsed
+        if fraction >= 1.0:
+            return 0.0
+        if fraction < ETA_MIN_FRACTION or elapsed < ETA_MIN_SECONDS:
+            return None
+        return elapsed * (1.0 - fraction) / fraction
+    
+    def _complete(self, stage: str):
+        self._totals[stage] = max(self._totals.get(stage, 0.0), 1.0)
+        self._done[stage] = self._totals[stage]
+    
+    def _report(self, force: bool = False):
+        if not self.callback:
+            return
+        percent = max(int(self.fraction * 100), self._last_percent)
+        now = self.clock()
+        if not force:
+            if percent == self._last_percent:
+                return
+            if self._last_report is not None and now - self._last_report < self.interval:
+                return
+        self._last_report = now
+        self._last_percent = percent
+        self.callback(percent, self.eta())
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration for display, e.g. '45 s', '3 min 20 s', '2 h 05 min'."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} min {seconds:02d} s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes:02d} min"
\ No newline at end of file
@@ -0,0 +1,433 @@
+import abc
+import codecs
+import csv
+import importlib.util
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Sequence, Type
+
+
+# Decompressed bytes at the top of each sheet or text file inspected by sniff()
+SNIFF_BYTES = 64 * 1024
+
+SHARED_STRINGS_PART = 'xl/sharedStrings.xml'
+
+WORKBOOK_PART = 'xl/workbook.xml'
+
+WORKBOOK_RELS_PART = 'xl/_rels/workbook.xml.rels'
+
+RELATIONSHIP_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+# Text cells read as numbers, like numeric cells in a workbook
+NUMBER_PATTERN = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\Z')
+
+# Encodings tried in order for CSV and text reports
+TEXT_ENCODINGS = ('utf-8-sig', 'cp1252')
+
+Rows = Iterator[Tuple]
+
+
+class ReportReader(abc.ABC):
+    """
+    Reads the rows of a report file, one sheet at a time.
+    
+    A backend yields every sheet as (name, rows), where rows are tuples of
+    cell values in the form openpyxl returns them with values_only: None
+    for an empty cell, int or float for a number and str for text, with
+    an empty tuple for an empty row. ExcelProcessor parses these rows the
+    same way whatever the backend, so every backend produces identical
+    records for the same report.
+    
+    Backends reading the same file type are ranked by speed; reader_for()
+    picks the fastest one that is available.
+    """
+    
+    name = ""
+    extensions: Tuple[str, ...] = ()
+    # Higher is faster
+    rank = 0
+    
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the libraries this backend needs are installed."""
+        return True
+    
+    def sniff(self, file_path: Path, title: bytes, signatures: Sequence[bytes]) -> Optional[str]:
+        """
+        Cheaply check whether a file can be a PHAST dispersion report.
+        
+        Args:
+            file_path: File to check
+            title: Text every report contains (the dispersion data title)
+            signatures: Text a report has near the top of its sheets
+        
+        Returns:
+            None if the file may be a report, otherwise the reason it is not
+        """
+        return None
+    
+    @abc.abstractmethod
+    def iter_sheets(self, file_path: Path) -> Iterator[Tuple[str, Rows]]:
+        """Yield (sheet name, rows) for every sheet in workbook order."""
+
+
+class XlsxReader(ReportReader):
+    """
+    Streams .xlsx worksheets straight from their XML with ElementTree.
+    
+    Much faster than openpyxl: cells are decoded without building cell
+    objects or applying styles, and each sheet is parsed once (openpyxl's
+    read-only mode scans a sheet for its dimensions before reading it).
+    Numbers stay numbers whatever their number format, so a date cell
+    reads as its serial number.
+    """
+    
+    name = 'xlsx'
+    extensions = ('.xlsx', '.xlsm')
+    rank = 1
+    
+    def sniff(self, file_path: Path, title: bytes, signatures: Sequence[bytes]) -> Optional[str]:
+        """
+        Only the zip directory, the shared-strings table and the first
+        SNIFF_BYTES of each worksheet are read, which costs far less than
+        loading the workbook. A workbook whose strings are shared but lack
+        the title is rejected, as is one with inline strings (as PHAST
+        writes them) where no sheet starts with report text.
+        """
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                names = set(archive.namelist())
+                if WORKBOOK_PART not in names:
+                    return "not an Excel workbook"
+                
+                if SHARED_STRINGS_PART in names and archive.getinfo(SHARED_STRINGS_PART).file_size > 0:
+                    return _sniff_shared_strings(archive, title)
+                
+                sheets = sorted(name for name in names if name.startswith('xl/worksheets/sheet'))
+                for sheet in sheets:
+                    with archive.open(sheet) as f:
+                        head = f.read(SNIFF_BYTES)
+                    if any(signature in head for signature in signatures):
+                        return None
+                return "no PHAST report text at the top of any sheet"
+        except (zipfile.BadZipFile, OSError) as e:
+            return f"not a readable .xlsx file ({e})"
+    
+    def iter_sheets(self, file_path: Path) -> Iterator[Tuple[str, Rows]]:
+        with zipfile.ZipFile(file_path) as archive:
+            names = set(archive.namelist())
+            shared_strings = _read_shared_strings(archive) if SHARED_STRINGS_PART in names else []
+            for sheet_name, part in _workbook_sheets(archive):
+                with archive.open(part) as f:
+                    yield sheet_name, _iter_sheet_rows(f, shared_strings)
+
+
+class OpenpyxlReader(ReportReader):
+    """Reads .xlsx workbooks through openpyxl's read-only mode; the reference backend."""
+    
+    name = 'openpyxl'
+    extensions = ('.xlsx', '.xlsm')
+    
+    @classmethod
+    def available(cls) -> bool:
+        return importlib.util.find_spec('openpyxl') is not None
+    
+    def sniff(self, file_path: Path, title: bytes, signatures: Sequence[bytes]) -> Optional[str]:
+        return XlsxReader().sniff(file_path, title, signatures)
+    
+    def iter_sheets(self, file_path: Path) -> Iterator[Tuple[str, Rows]]:
+        import openpyxl
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for sheet_name in wb.sheetnames:
+                yield sheet_name, wb[sheet_name].iter_rows(values_only=True)
+        finally:
+            wb.close()
+
+
+class XlsReader(ReportReader):
+    """Reads legacy .xls workbooks through xlrd, when it is installed."""
+    
+    name = 'xls'
+    extensions = ('.xls',)
+    
+    @classmethod
+    def available(cls) -> bool:
+        return importlib.util.find_spec('xlrd') is not None
+    
+    def iter_sheets(self, file_path: Path) -> Iterator[Tuple[str, Rows]]:
+        import xlrd
+        book = xlrd.open_workbook(str(file_path), on_demand=True)
+        try:
+            for index, sheet_name in enumerate(book.sheet_names()):
+                sheet = book.sheet_by_index(index)
+                yield sheet_name, _iter_xls_rows(sheet, xlrd)
+                book.unload_sheet(index)
+        finally:
+            book.release_resources()
+
+
+class CsvReader(ReportReader):
+    """
+    Streams a report exported as comma-separated text, one sheet per file.
+    
+    Cells that parse as numbers become int or float, as in a workbook, and
+    empty cells become None.
+    """
+    
+    name = 'csv'
+    extensions = ('.csv',)
+    delimiter = ','
+    
+    def sniff(self, file_path: Path, title: bytes, signatures: Sequence[bytes]) -> Optional[str]:
+        try:
+            with open(file_path, 'rb') as f:
+                head = f.read(SNIFF_BYTES)
+        except OSError as e:
+            return f"not a readable file ({e})"
+        if any(signature in head for signature in signatures):
+            return None
+        return "no PHAST report text at the top of the file"
+    
+    def iter_sheets(self, file_path: Path) -> Iterator[Tuple[str, Rows]]:
+        with open(file_path, 'r', encoding=_text_encoding(file_path), newline='') as f:
+            yield Path(file_path).stem, _iter_text_rows(csv.reader(f, delimiter=self.delimiter))
+
+
+class TextReader(CsvReader):
+    """Streams a report exported as tab-separated text."""
+    
+    name = 'text'
+    extensions = ('.txt', '.tsv')
+    delimiter = '\t'
+
+
+# Every backend, in order of preference among equally ranked ones
+READERS: List[Type[ReportReader]] = [XlsxReader, OpenpyxlReader, XlsReader, CsvReader, TextReader]
+
+
+def reader_names() -> List[str]:
+    return [reader.name for reader in READERS]
+
+
+def reader_for(file_path: Path, backend: Optional[str] = None) -> Optional[ReportReader]:
+    """
+    Return the reader for a file.
+    
+    Args:
+        file_path: File to read; its extension selects the backends
+        backend: Name of the backend to use, or None (or 'auto') for the
+            fastest available one
+    
+    Returns:
+        A reader, or None if no available backend reads this file type
+    
+    Raises:
+        ValueError: If backend is not a known backend name
+    """
+    extension = Path(file_path).suffix.lower()
+    candidates = [reader for reader in READERS if extension in reader.extensions]
+    if backend and backend != 'auto':
+        if backend not in reader_names():
+            raise ValueError(f"Unknown reader '{backend}'; expected one of {', '.join(reader_names())}")
+        candidates = [reader for reader in candidates if reader.name == backend]
+    
+    candidates = [reader for reader in candidates if reader.available()]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda reader: reader.rank)()
+
+
+def _sniff_shared_strings(archive: zipfile.ZipFile, title: bytes) -> Optional[str]:
+    """Search the shared-strings table for the title without parsing it."""
+    overlap = len(title) - 1
+    tail = b""
+    with archive.open(SHARED_STRINGS_PART) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            text = tail + chunk
+            if title in text:
+                return None
+            # Rich text splits a string into runs the byte search cannot see across
+            if b"<r>" in text:
+                return None
+            tail = text[-overlap:]
+    return "no dispersion data in shared strings"
+
+
+def _local_name(tag: str) -> str:
+    return tag.rpartition('}')[2]
+
+
+def _workbook_sheets(archive: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """Return (sheet name, zip part) of every worksheet in workbook order."""
+    targets = {}
+    for rel in ElementTree.fromstring(archive.read(WORKBOOK_RELS_PART)):
+        target = rel.get('Target', '')
+        # Targets are relative to xl/ unless absolute within the package
+        part = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        targets[rel.get('Id')] = part
+    
+    sheets = []
+    for element in ElementTree.fromstring(archive.read(WORKBOOK_PART)).iter():
+        if _local_name(element.tag) == 'sheet':
+            part = targets.get(element.get(RELATIONSHIP_ID))
+            if part:
+                sheets.append((element.get('name'), part))
+    return sheets
+
+
+def _read_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    """Return the shared-strings table; rich text runs are joined, phonetic runs dropped."""
+    strings = []
+    with archive.open(SHARED_STRINGS_PART) as f:
+        for _, element in ElementTree.iterparse(f):
+            if _local_name(element.tag) == 'si':
+                strings.append(_element_text(element))
+                element.clear()
+    return strings
+
+
+def _element_text(element: ElementTree.Element) -> str:
+    """Join the text runs of a string item or inline string."""
+    parts = []
+    for child in element:
+        name = _local_name(child.tag)
+        if name == 't':
+            parts.append(child.text or "")
+        elif name == 'r':
+            parts.extend(t.text or "" for t in child if _local_name(t.tag) == 't')
+    return "".join(parts)
+
+
+def _column_index(reference: str, cache: Dict[str, int]) -> int:
+    """Zero-based column of a cell reference such as 'AB12'."""
+    letters = reference.rstrip('0123456789')
+    index = cache.get(letters)
+    if index is None:
+        index = 0
+        for letter in letters:
+            index = index * 26 + ord(letter) - 64
+        index -= 1
+        cache[letters] = index
+    return index
+
+
+def _number(text: str) -> Any:
+    # Same rule as openpyxl: integers unless the text has a decimal point or exponent
+    if '.' in text or 'E' in text or 'e' in text:
+        return float(text)
+    return int(text)
+
+
+def _iter_sheet_rows(f, shared_strings: List[str]) -> Rows:
+    """
+    Yield the rows of a worksheet XML stream as value tuples.
+    
+    Rows missing from the XML, which is how Excel stores empty rows, are
+    yielded as empty tuples so row numbering matches the sheet.
+    """
+    parser = ElementTree.iterparse(f, events=('start', 'end'))
+    tags = {}
+    columns: Dict[str, int] = {}
+    sheet_data = None
+    last_row = 0
+    
+    for event, element in parser:
+        if event == 'start':
+            if sheet_data is None and _local_name(element.tag) == 'sheetData':
+                sheet_data = element
+                namespace = element.tag[:-len('sheetData')]
+                tags = {name: namespace + name for name in ('row', 'c', 'v', 'is')}
+            continue
+        if sheet_data is None or element.tag != tags['row']:
+            continue
+        
+        row_number = element.get('r')
+        row_number = int(row_number) if row_number else last_row + 1
+        for _ in range(last_row + 1, row_number):
+            yield ()
+        last_row = row_number
+        
+        values: List[Any] = []
+        for cell in element:
+            if cell.tag != tags['c']:
+                continue
+            reference = cell.get('r')
+            column = _column_index(reference, columns) if reference else len(values)
+            if column > len(values):
+                values.extend([None] * (column - len(values)))
+            
+            cell_type = cell.get('t', 'n')
+            if cell_type == 'inlineStr':
+                inline = cell.find(tags['is'])
+                value = _element_text(inline) if inline is not None else None
+            else:
+                text = cell.findtext(tags['v'])
+                if text is None:
+                    value = None
+                elif cell_type == 'n':
+                    value = _number(text)
+                elif cell_type == 's':
+                    value = shared_strings[int(text)]
+                elif cell_type == 'b':
+                    value = text == '1'
+                else:
+                    # 'str' formula results, 'e' errors and 'd' ISO dates stay text
+                    value = text
+            values.append(value)
+        
+        # Drop rows already yielded so a long sheet is not kept in memory
+        sheet_data.clear()
+        yield tuple(values)
+
+
+def _iter_text_rows(reader: Iterator[List[str]]) -> Rows:
+    for row in reader:
+        values = [_text_value(cell) for cell in row]
+        while values and values[-1] is None:
+            values.pop()
+        yield tuple(values)
+
+
+def _text_value(cell: str) -> Any:
+    if not cell:
+        return None
+    if NUMBER_PATTERN.match(cell):
+        return _number(cell)
+    return cell
+
+
+def _text_encoding(file_path: Path) -> str:
+    """Return the first of TEXT_ENCODINGS that decodes the top of the file."""
+    with open(file_path, 'rb') as f:
+        head = f.read(SNIFF_BYTES)
+    for encoding in TEXT_ENCODINGS[:-1]:
+        try:
+            # Not final, so a character cut off at the end of head is not an error
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return TEXT_ENCODINGS[-1]
+
+
+def _iter_xls_rows(sheet, xlrd) -> Rows:
+    empty = (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK)
+    for index in range(sheet.nrows):
+        values = []
+        for cell in sheet.row(index):
+            if cell.ctype in empty:
+                values.append(None)
+            elif cell.ctype == xlrd.XL_CELL_NUMBER:
+                # xlrd returns every number as a float; whole numbers read as int like in .xlsx
+                values.append(int(cell.value) if cell.value.is_integer() else cell.value)
+            elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                values.append(bool(cell.value))
+            else:
+                values.append(cell.value)
+        while values and values[-1] is None:
+            values.pop()
+        yield tuple(values)
\ No newline at end of file
@@ -0,0 +1,362 @@
+import os
+import zipfile
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Sequence, Tuple, Union
+
+import numpy as np
+
+from core.envelope import EnvelopeTable
+from core.types import ObserverSelection, MAX_OBSERVER
+
+
+LABEL_FIELDS = ('equipment_item', 'scenario', 'weather', 'temperature_type', 'observer', 'source_file')
+
+# Labels shared by the observers of one dispersion block
+BLOCK_FIELDS = tuple(field for field in LABEL_FIELDS if field != 'observer')
+
+# Code of a record that has no value for a label field
+MISSING_LABEL = -1
+
+# Raised by np.load on a missing, truncated or corrupt archive
+ARCHIVE_ERRORS = (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile)
+
+
+class RecordStore:
+    """
+    Columnar storage for dispersion records.
+    
+    The curves of all records share two flat float64 arrays: record i is
+    distances[offsets[i]:offsets[i + 1]] and the same slice of
+    temperatures. Labels are categorical, one integer code per record
+    indexing the distinct values of each field, so an equipment item,
+    scenario or weather name repeated across records is stored once.
+    
+    The arrays can be passed straight to InterpolationEngine.interpolate_batch
+    and the store pickles and saves as a handful of arrays rather than one
+    object per value.
+    """
+    
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        distances: np.ndarray,
+        temperatures: np.ndarray,
+        codes: Optional[Dict[str, np.ndarray]] = None,
+        categories: Optional[Dict[str, List[str]]] = None
+    ):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.distances = np.asarray(distances, dtype=np.float64)
+        self.temperatures = np.asarray(temperatures, dtype=np.float64)
+        codes = codes or {}
+        categories = categories or {}
+        n_records = len(self.offsets) - 1
+        self.codes = {
+            field: np.asarray(codes[field], dtype=np.int32) if field in codes
+            else np.full(n_records, MISSING_LABEL, dtype=np.int32)
+            for field in LABEL_FIELDS
+        }
+        self.categories = {field: list(categories.get(field, [])) for field in LABEL_FIELDS}
+        self._envelope: Optional[EnvelopeTable] = None
+    
+    @classmethod
+    def empty(cls) -> 'RecordStore':
+        return cls(np.zeros(1, dtype=np.int64), np.empty(0), np.empty(0))
+    
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'RecordStore':
+        """Build a store from record dicts with distances, temperatures and labels."""
+        builder = RecordStoreBuilder()
+        for record in records:
+            builder.append(
+                record['distances'],
+                record['temperatures'],
+                **{field: record[field] for field in LABEL_FIELDS if record.get(field) is not None}
+            )
+        return builder.build()
+    
+    @classmethod
+    def concat(cls, stores: Sequence['RecordStore']) -> 'RecordStore':
+        """Join several stores into one, merging their label categories."""
+        if not stores:
+            return cls.empty()
+        
+        lengths = np.concatenate([np.diff(store.offsets) for store in stores])
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        
+        codes, categories = {}, {}
+        for field in LABEL_FIELDS:
+            index: Dict[str, int] = {}
+            field_codes = []
+            for store in stores:
+                mapping = np.array(
+                    [index.setdefault(value, len(index)) for value in store.categories[field]] + [MISSING_LABEL],
+                    dtype=np.int32
+                )
+                # MISSING_LABEL (-1) picks the trailing MISSING_LABEL entry
+                field_codes.append(mapping[store.codes[field]])
+            codes[field] = np.concatenate(field_codes)
+            categories[field] = list(index)
+        
+        return cls(
+            offsets,
+            np.concatenate([store.distances for store in stores]),
+            np.concatenate([store.temperatures for store in stores]),
+            codes,
+            categories
+        )
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays of the store."""
+        return (
+            self.offsets.nbytes + self.distances.nbytes + self.temperatures.nbytes
+            + sum(codes.nbytes for codes in self.codes.values())
+        )
+    
+    def curve(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (distances, temperatures) of one record as views into the store."""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.distances[start:end], self.temperatures[start:end]
+    
+    def subset(self, indices: Sequence[int]) -> 'RecordStore':
+        """Return a new store holding the given records, in the given order."""
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.offsets[indices]
+        lengths = self.offsets[indices + 1] - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        points = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return RecordStore(
+            offsets,
+            self.distances[points],
+            self.temperatures[points],
+            {field: self.codes[field][indices] for field in LABEL_FIELDS},
+            self.categories
+        )
+    
+    def group_starts(self, fields: Sequence[str] = BLOCK_FIELDS) -> np.ndarray:
+        """
+        Return the index of the first record of every run of consecutive
+        records with the same labels in the given fields.
+        
+        With the default fields each run is one dispersion block and
+        temperature type, holding one record per observer.
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64)
+        changed = np.zeros(len(self), dtype=bool)
+        changed[0] = True
+        for field in fields:
+            codes = self.codes[field]
+            changed[1:] |= codes[1:] != codes[:-1]
+        return np.flatnonzero(changed)
+    
+    def result_rows(self, selection: ObserverSelection = ObserverSelection.ALL) -> 'ResultRows':
+        """Return the result rows of the store under an observer selection; see ResultRows."""
+        return ResultRows.select(self, selection)
+    
+    def envelope(self) -> EnvelopeTable:
+        """Monotone envelope of every curve, built on first use and kept with the store."""
+        if self._envelope is None:
+            self._envelope = EnvelopeTable.build(self.offsets, self.temperatures, self.distances)
+        return self._envelope
+    
+    def label(self, field: str, index: int) -> Optional[str]:
+        code = self.codes[field][index]
+        return None if code == MISSING_LABEL else self.categories[field][code]
+    
+    def labels(self, field: str) -> List[Optional[str]]:
+        """Return one label value per record."""
+        values = self.categories[field] + [None]
+        return [values[code] for code in self.codes[field]]
+    
+    def set_label(self, field: str, value: str):
+        """Give every record the same value for a label field."""
+        self.codes[field] = np.zeros(len(self), dtype=np.int32)
+        self.categories[field] = [value]
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Return the records as dicts of labels and lists of floats."""
+        labels = {field: self.labels(field) for field in LABEL_FIELDS}
+        records = []
+        for i in range(len(self)):
+            distances, temperatures = self.curve(i)
+            record = {field: labels[field][i] for field in LABEL_FIELDS if labels[field][i] is not None}
+            record['distances'] = distances.tolist()
+            record['temperatures'] = temperatures.tolist()
+            records.append(record)
+        return records
+    
+    def save(self, path: Union[str, Path]):
+        """Write the store to an uncompressed NumPy archive (.npz), synced to disk."""
+        arrays = {
+            'offsets': self.offsets,
+            'distances': self.distances,
+            'temperatures': self.temperatures,
+        }
+        for field in LABEL_FIELDS:
+            arrays[f'{field}.codes'] = self.codes[field]
+            arrays[f'{field}.categories'] = np.array(self.categories[field], dtype=str)
+        
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+            f.flush()
+            # Archives are renamed into place; a crash must not leave a renamed, empty file
+            os.fsync(f.fileno())
+    
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'RecordStore':
+        """
+        Read a store written by save().
+        
+        Archives holding one label string per record instead of codes and
+        categories, as earlier parse cache entries do, are also accepted.
+        
+        Raises:
+            One of ARCHIVE_ERRORS if the archive is missing or damaged
+        """
+        with np.load(path, allow_pickle=False) as data:
+            codes, categories = {}, {}
+            for field in LABEL_FIELDS:
+                if f'{field}.codes' in data:
+                    codes[field] = data[f'{field}.codes']
+                    categories[field] = data[f'{field}.categories'].tolist()
+                elif field in data:
+                    values, codes[field] = np.unique(data[field], return_inverse=True)
+                    categories[field] = values.tolist()
+            return cls(data['offsets'], data['distances'], data['temperatures'], codes, categories)
+
+
+@dataclass
+class ResultRows:
+    """
+    Rows of the results of a store, in the order they are exported.
+    
+    Each dispersion block gives a row per observer and a row for the
+    furthest distance across them (observer MAX_OBSERVER), or only one of
+    the two, following the observer selection. records is the record whose
+    labels a row shows (the block's first record for a maximum row),
+    blocks the row's block and maximum marks the maximum rows.
+    """
+    records: np.ndarray
+    blocks: np.ndarray
+    maximum: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    
+    @classmethod
+    def select(cls, store: RecordStore, selection: ObserverSelection) -> 'ResultRows':
+        starts = store.group_starts()
+        ends = np.append(starts[1:], len(store)).astype(np.int64)
+        observers = store.labels('observer')
+        records, blocks, maximum = [], [], []
+        for block, (start, end) in enumerate(zip(starts, ends)):
+            if selection != ObserverSelection.MAXIMUM:
+                for i in range(start, end):
+                    if selection == ObserverSelection.FIRST and observers[i] != '1':
+                        continue
+                    records.append(i)
+                    blocks.append(block)
+                    maximum.append(False)
+            if selection != ObserverSelection.FIRST:
+                records.append(start)
+                blocks.append(block)
+                maximum.append(True)
+        return cls(
+            np.array(records, dtype=np.int64),
+            np.array(blocks, dtype=np.int64),
+            np.array(maximum, dtype=bool),
+            starts,
+            ends
+        )
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def observers(self, store: RecordStore) -> List[Optional[str]]:
+        """Observer label of every row."""
+        labels = store.labels('observer')
+        return [MAX_OBSERVER if maximum else labels[i] for i, maximum in zip(self.records, self.maximum)]
+    
+    def distances(self, record_distances: np.ndarray) -> np.ndarray:
+        """
+        Distances of every row from those of every record.
+        
+        A maximum row takes the furthest distance of its block's records,
+        ignoring records without one.
+        
+        Args:
+            record_distances: Array of shape (n_records, n_targets)
+        
+        Returns:
+            Array of shape (n_rows, n_targets)
+        """
+        if len(self) == 0:
+            return np.empty((0,) + record_distances.shape[1:])
+        maxima = np.fmax.reduceat(record_distances, self.starts, axis=0)
+        return np.where(
+            self.maximum[:, np.newaxis], maxima[self.blocks], record_distances[self.records]
+        )
+    
+    def members(self, row: int) -> np.ndarray:
+        """Records a row's distance comes from: its block for a maximum row, else its record."""
+        if self.maximum[row]:
+            block = self.blocks[row]
+            return np.arange(self.starts[block], self.ends[block])
+        return self.records[row:row + 1]
+
+
+class RecordStoreBuilder:
+    """Accumulates records into growable buffers and builds a RecordStore."""
+    
+    def __init__(self):
+        self._lengths = array('q')
+        self._distances = array('d')
+        self._temperatures = array('d')
+        self._codes = {field: array('i') for field in LABEL_FIELDS}
+        self._index: Dict[str, Dict[str, int]] = {field: {} for field in LABEL_FIELDS}
+    
+    def __len__(self) -> int:
+        return len(self._lengths)
+    
+    def append(self, distances: Sequence[float], temperatures: Sequence[float], **labels: str):
+        """
+        Add one record.
+        
+        Args:
+            distances: Downwind distances of the curve
+            temperatures: Temperatures at those distances
+            **labels: Label values keyed by field name (see LABEL_FIELDS);
+                fields not given are missing for this record
+        """
+        if len(distances) != len(temperatures):
+            raise ValueError("distances and temperatures must have the same length")
+        
+        self._lengths.append(len(distances))
+        self._distances.extend(distances)
+        self._temperatures.extend(temperatures)
+        for field in LABEL_FIELDS:
+            value = labels.get(field)
+            if value is None:
+                self._codes[field].append(MISSING_LABEL)
+            else:
+                index = self._index[field]
+                self._codes[field].append(index.setdefault(value, len(index)))
+    
+    def build(self) -> RecordStore:
+        lengths = np.array(self._lengths, dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return RecordStore(
+            offsets,
+            np.array(self._distances, dtype=np.float64),
+            np.array(self._temperatures, dtype=np.float64),
+            {field: np.array(self._codes[field], dtype=np.int32) for field in LABEL_FIELDS},
+            {field: list(self._index[field]) for field in LABEL_FIELDS}
+        )
\ No newline at end of file
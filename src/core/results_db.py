@@ -0,0 +1,436 @@
+import os
+import time
+import sqlite3
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+import numpy as np
+
+from core.types import AnalysisResult, InterpolationMethod, MAX_OBSERVER
+from core.record_store import RecordStore, RecordStoreBuilder, LABEL_FIELDS
+from core.interpolation import InterpolationEngine
+
+
+# Rows sent to SQLite per executemany() call
+DB_BATCH_ROWS = 10000
+
+# Seconds to wait for another run that is writing to the same database
+DB_TIMEOUT_SECONDS = 300.0
+
+# Bumped when the tables change; older databases are refused rather than misread
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS studies (
+    study_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    output_file TEXT NOT NULL UNIQUE,
+    input_folder TEXT,
+    interpolation_method TEXT,
+    observer_selection TEXT,
+    updated TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    study_id INTEGER NOT NULL REFERENCES studies(study_id) ON DELETE CASCADE,
+    subsection TEXT,
+    scenario TEXT,
+    weather TEXT,
+    temperature_type TEXT,
+    observer TEXT,
+    threshold REAL NOT NULL,
+    distance REAL NOT NULL,
+    interpolation_method TEXT,
+    source_file TEXT
+);
+CREATE TABLE IF NOT EXISTS curves (
+    study_id INTEGER NOT NULL REFERENCES studies(study_id) ON DELETE CASCADE,
+    equipment_item TEXT,
+    scenario TEXT,
+    weather TEXT,
+    temperature_type TEXT,
+    observer TEXT,
+    source_file TEXT,
+    distances BLOB NOT NULL,
+    temperatures BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_study ON results(study_id);
+CREATE INDEX IF NOT EXISTS results_subsection ON results(subsection COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS results_scenario ON results(scenario COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS results_weather ON results(weather COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS results_threshold ON results(temperature_type, threshold);
+CREATE INDEX IF NOT EXISTS curves_study ON curves(study_id);
+CREATE INDEX IF NOT EXISTS curves_equipment_item ON curves(equipment_item COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS curves_scenario ON curves(scenario COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS curves_weather ON curves(weather COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS curves_temperature_type ON curves(temperature_type);
+"""
+
+RESULT_COLUMNS = (
+    'subsection', 'scenario', 'weather', 'temperature_type', 'observer',
+    'threshold', 'distance', 'interpolation_method', 'source_file'
+)
+
+# Label filters of the query methods and the column each one applies to
+FILTER_COLUMNS = {
+    'equipment': ('subsection', 'equipment_item'),
+    'scenario': ('scenario', 'scenario'),
+    'weather': ('weather', 'weather'),
+    'temperature_type': ('temperature_type', 'temperature_type'),
+    'observer': ('observer', 'observer'),
+}
+
+
+class ResultsDatabase:
+    """
+    Local SQLite store of analysis results and parsed curves across studies.
+    
+    A study is one analysed output file. Storing it again, for example
+    after an incremental or watch-mode run, replaces its rows, so the
+    database always holds the latest results of every study. Both the
+    AnalysisResult rows and the parsed curves are kept, so results for
+    thresholds that were never exported can be interpolated from the
+    curves without the original reports.
+    
+    Label filters take exact values or patterns with * and ? wildcards,
+    matched case-insensitively, e.g. equipment='*LNG*pump*'.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Raises:
+            ValueError: If the file is a database of a newer schema
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=DB_TIMEOUT_SECONDS, isolation_level=None)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        # Readers keep working while a study is being written
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self.connection.close()
+            raise ValueError(f"{path} was written by a newer version (schema {version})")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def close(self):
+        self.connection.close()
+    
+    def __enter__(self) -> 'ResultsDatabase':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def begin_study(
+        self,
+        output_file: str,
+        name: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None
+    ) -> 'StudyWriter':
+        """
+        Start replacing a study's rows; see StudyWriter.
+        
+        Args:
+            output_file: Output file of the study, which identifies it
+            name: Name to query the study by (default: the output file name
+                without extension)
+            config: Analysis configuration, for the study's metadata
+        """
+        return StudyWriter(self, os.path.abspath(output_file), name, config or {})
+    
+    def studies(self) -> List[Dict[str, Any]]:
+        """Return every study with its number of results, most recently updated first."""
+        cursor = self.connection.execute(
+            "SELECT s.study_id, s.name, s.output_file, s.input_folder, s.interpolation_method, "
+            "s.observer_selection, s.updated, "
+            "(SELECT COUNT(*) FROM results r WHERE r.study_id = s.study_id) AS results "
+            "FROM studies s ORDER BY s.updated DESC"
+        )
+        return _dicts(cursor)
+    
+    def query_results(
+        self,
+        threshold: Optional[float] = None,
+        study: Optional[str] = None,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+        **filters: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Return stored results, furthest distance first.
+        
+        Args:
+            threshold: Only results for this temperature of interest
+            study: Study name (wildcards allowed)
+            since: Only studies updated on or after this ISO date or time
+            limit: Maximum number of rows
+            **filters: Label filters: equipment, scenario, weather,
+                temperature_type, observer
+        """
+        where, parameters = self._where('r', 0, study, since, filters)
+        if threshold is not None:
+            where.append("r.threshold = ?")
+            parameters.append(float(threshold))
+        sql = (
+            "SELECT s.name AS study, s.updated, "
+            + ", ".join(f"r.{column}" for column in RESULT_COLUMNS)
+            + " FROM results r JOIN studies s ON s.study_id = r.study_id"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY r.distance DESC"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return _dicts(self.connection.execute(sql, parameters))
+    
+    def load_curves(
+        self,
+        study: Optional[str] = None,
+        since: Optional[str] = None,
+        **filters: Optional[str]
+    ) -> RecordStore:
+        """
+        Load stored curves into a RecordStore, filtered like query_results().
+        
+        The study name goes into the source_file label as 'study:file', so
+        curves of different studies stay apart.
+        """
+        where, parameters = self._where('c', 1, study, since, filters)
+        cursor = self.connection.execute(
+            "SELECT s.name, c.equipment_item, c.scenario, c.weather, c.temperature_type, c.observer, "
+            "c.source_file, c.distances, c.temperatures "
+            "FROM curves c JOIN studies s ON s.study_id = c.study_id"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY c.rowid",
+            parameters
+        )
+        builder = RecordStoreBuilder()
+        for name, *labels, distances, temperatures in cursor:
+            labels = dict(zip(LABEL_FIELDS, labels))
+            labels['source_file'] = f"{name}:{labels['source_file']}"
+            builder.append(
+                np.frombuffer(distances, dtype='<f8'),
+                np.frombuffer(temperatures, dtype='<f8'),
+                **{field: value for field, value in labels.items() if value is not None}
+            )
+        return builder.build()
+    
+    def query_curves(
+        self,
+        threshold: float,
+        method: InterpolationMethod = InterpolationMethod.LINEAR,
+        study: Optional[str] = None,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+        **filters: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Interpolate the distance to a threshold on stored curves, furthest first.
+        
+        Answers thresholds that were never exported, without the original
+        reports. One row is returned per stored curve (per observer) that
+        reaches the threshold, or per dispersion block with observer='Max'
+        for the furthest distance across its observers; filters are those
+        of query_results().
+        """
+        worst_case = (filters.get('observer') or '').lower() == MAX_OBSERVER.lower()
+        if worst_case:
+            filters = dict(filters, observer=None)
+        records = self.load_curves(study, since, **filters)
+        if len(records) == 0:
+            return []
+        distances = InterpolationEngine.interpolate_store(records, [threshold], method)
+        if worst_case:
+            starts = records.group_starts()
+            distances = InterpolationEngine.group_maximum(distances, starts)[:, 0]
+        else:
+            starts = np.arange(len(records))
+            distances = distances[:, 0]
+        order = [i for i in np.argsort(-distances, kind='stable') if not np.isnan(distances[i])]
+        if limit is not None:
+            order = order[:limit]
+        
+        labels = {field: records.labels(field) for field in LABEL_FIELDS}
+        rows = []
+        for i in order:
+            record = starts[i]
+            # File names are relative paths, so the last ':' separates the study
+            study_name, _, source_file = labels['source_file'][record].rpartition(':')
+            rows.append({
+                'study': study_name,
+                'subsection': labels['equipment_item'][record],
+                'scenario': labels['scenario'][record],
+                'weather': labels['weather'][record],
+                'temperature_type': labels['temperature_type'][record],
+                'observer': MAX_OBSERVER if worst_case else labels['observer'][record],
+                'threshold': float(threshold),
+                'distance': float(distances[i]),
+                'interpolation_method': method.value,
+                'source_file': source_file,
+            })
+        return rows
+    
+    def _where(
+        self,
+        alias: str,
+        column: int,
+        study: Optional[str],
+        since: Optional[str],
+        filters: Dict[str, Optional[str]]
+    ):
+        """SQL conditions and parameters for the query filters; column picks the results or curves name."""
+        where, parameters = [], []
+        for key, value in filters.items():
+            if key not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown filter '{key}', use one of: {', '.join(FILTER_COLUMNS)}")
+            if value is not None:
+                _match(where, parameters, f"{alias}.{FILTER_COLUMNS[key][column]}", value)
+        if study is not None:
+            _match(where, parameters, "s.name", study)
+        if since is not None:
+            where.append("s.updated >= ?")
+            parameters.append(since)
+        return where, parameters
+
+
+class StudyWriter:
+    """
+    Replaces the rows of one study in a single short transaction.
+    
+    Results can be added while they are exported (collect()) or all at
+    once (add_results()); both insert in batches of DB_BATCH_ROWS into
+    temporary staging tables of this connection, which take no lock on
+    the database. commit() then replaces the study's rows from the staging
+    tables in one transaction, so the database is locked for the copy
+    only, not for the whole analysis, and other runs can store their
+    studies meanwhile. Nothing is visible to readers until commit(), and
+    rollback() leaves the previous rows of the study in place. seconds is
+    the time spent inserting.
+    """
+    
+    def __init__(self, database: ResultsDatabase, output_file: str, name: Optional[str], config: Dict[str, Any]):
+        self.connection = database.connection
+        self.output_file = output_file
+        self.name = name or os.path.splitext(os.path.basename(output_file))[0]
+        self.config = config
+        self.count = 0
+        self.seconds = 0.0
+        self.study_id: Optional[int] = None
+        self.connection.executescript(
+            "DROP TABLE IF EXISTS temp.staged_results;"
+            "DROP TABLE IF EXISTS temp.staged_curves;"
+            f"CREATE TEMP TABLE staged_results ({', '.join(RESULT_COLUMNS)});"
+            f"CREATE TEMP TABLE staged_curves ({', '.join(LABEL_FIELDS)}, distances, temperatures);"
+        )
+    
+    def add_results(self, results: Iterable[AnalysisResult]):
+        rows = (
+            (result.subsection, result.scenario, result.weather, result.temperature_type,
+             result.observer, result.temperature_of_interest, result.downwind_distance,
+             result.interpolation_method, result.source_file)
+            for result in results
+        )
+        while True:
+            batch = list(islice(rows, DB_BATCH_ROWS))
+            if not batch:
+                break
+            start = time.perf_counter()
+            self.connection.executemany(
+                f"INSERT INTO temp.staged_results VALUES ({', '.join('?' * len(RESULT_COLUMNS))})", batch
+            )
+            self.seconds += time.perf_counter() - start
+            self.count += len(batch)
+    
+    def collect(self, results: Iterable[AnalysisResult]) -> Iterator[AnalysisResult]:
+        """Yield results unchanged while inserting them in batches."""
+        batch = []
+        for result in results:
+            batch.append(result)
+            if len(batch) >= DB_BATCH_ROWS:
+                self.add_results(batch)
+                batch = []
+            yield result
+        self.add_results(batch)
+    
+    def add_curves(self, records: RecordStore):
+        """Store the parsed curves of the study."""
+        labels = [records.labels(field) for field in LABEL_FIELDS]
+        distances = records.distances.astype('<f8', copy=False)
+        temperatures = records.temperatures.astype('<f8', copy=False)
+        rows = (
+            (*(values[i] for values in labels),
+             distances[start:end].tobytes(), temperatures[start:end].tobytes())
+            for i, (start, end) in enumerate(zip(records.offsets[:-1], records.offsets[1:]))
+        )
+        while True:
+            batch = list(islice(rows, DB_BATCH_ROWS))
+            if not batch:
+                break
+            start = time.perf_counter()
+            self.connection.executemany(
+                f"INSERT INTO temp.staged_curves VALUES ({', '.join('?' * (len(LABEL_FIELDS) + 2))})", batch
+            )
+            self.seconds += time.perf_counter() - start
+    
+    def commit(self):
+        """Replace the study's rows with the staged ones."""
+        start = time.perf_counter()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute("DELETE FROM studies WHERE output_file = ?", (self.output_file,))
+            cursor = self.connection.execute(
+                "INSERT INTO studies (name, output_file, input_folder, interpolation_method, observer_selection, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.name,
+                    self.output_file,
+                    self.config.get('input_folder'),
+                    self.config.get('interpolation_method'),
+                    self.config.get('observer_selection'),
+                    datetime.now().isoformat(timespec='seconds')
+                )
+            )
+            self.study_id = cursor.lastrowid
+            self.connection.execute(
+                f"INSERT INTO results (study_id, {', '.join(RESULT_COLUMNS)}) "
+                f"SELECT ?, {', '.join(RESULT_COLUMNS)} FROM temp.staged_results",
+                (self.study_id,)
+            )
+            columns = ', '.join(LABEL_FIELDS)
+            self.connection.execute(
+                f"INSERT INTO curves (study_id, {columns}, distances, temperatures) "
+                f"SELECT ?, {columns}, distances, temperatures FROM temp.staged_curves",
+                (self.study_id,)
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        finally:
+            self.seconds += time.perf_counter() - start
+        self._drop_staging()
+    
+    def rollback(self):
+        """Discard the staged rows; the study keeps its previous rows."""
+        self._drop_staging()
+    
+    def _drop_staging(self):
+        self.connection.executescript(
+            "DROP TABLE IF EXISTS temp.staged_results; DROP TABLE IF EXISTS temp.staged_curves;"
+        )
+
+
+def _match(where: List[str], parameters: List[Any], column: str, value: str):
+    """Add an exact or wildcard (* and ?) condition, case-insensitive."""
+    if '*' in value or '?' in value:
+        escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        where.append(f"{column} LIKE ? ESCAPE '\\'")
+        parameters.append(escaped.replace('*', '%').replace('?', '_'))
+    else:
+        where.append(f"{column} = ? COLLATE NOCASE")
+        parameters.append(value)
+
+
+def _dicts(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor]
\ No newline at end of file
@@ -0,0 +1,223 @@
+import logging
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from core.envelope import segment_search
+
+
+# Padded points solved per batch; a batch holds 2 * degree + 1 band entries per point
+SPLINE_BATCH_POINTS = 1 << 20
+
+
+def batch_spline(
+    temps: np.ndarray,
+    dists: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    grid: np.ndarray,
+    inside: np.ndarray,
+    degree: int
+) -> np.ndarray:
+    """
+    Interpolating spline of every record, evaluated at the targets inside its range.
+    
+    Gives the same splines as scipy.interpolate.interp1d with kind='cubic'
+    (degree 3, not-a-knot end conditions) or 'quadratic' (degree 2, knots
+    between the data points), without building one interpolator per
+    record. Records are padded to a common length in batches of similar
+    length, and the banded collocation systems of a batch are solved
+    together, one row at a time across every record. Collocation matrices
+    of distinct points are totally positive, so elimination needs no
+    pivoting.
+    
+    Records must be sorted by ascending temperature and have more than
+    degree points. As with interp1d, records with repeated temperatures
+    have no spline and give NaN.
+    
+    Args:
+        temps: Flat temperatures, ascending within each record
+        dists: Flat distances in the same order
+        starts: Index of each record's first point
+        ends: Index after each record's last point
+        grid: Targets of shape (n_records, n_targets)
+        inside: Mask of the grid cells to evaluate
+        degree: 2 or 3
+    
+    Returns:
+        Distances for the inside cells, in grid order
+    """
+    lengths = ends - starts
+    records = np.flatnonzero(inside.any(axis=1))
+    out = np.full(grid.shape, np.nan)
+    
+    repeated = np.zeros(len(starts), dtype=bool)
+    if len(temps) > 1:
+        same = np.flatnonzero(temps[1:] == temps[:-1])
+        # A repeat counts only within one record, not across a record boundary
+        owner = np.searchsorted(ends, same, side='right')
+        within = same + 1 < ends[np.minimum(owner, len(ends) - 1)]
+        repeated[owner[within]] = True
+    if repeated[records].any():
+        logging.error(
+            f"Interpolation failed for {int(repeated[records].sum())} record(s): "
+            f"Expect x to not have duplicates"
+        )
+        records = records[~repeated[records]]
+    
+    for batch in _batches(records, lengths):
+        width = int(lengths[batch].max())
+        x, y, n = _padded(temps, dists, starts[batch], lengths[batch], width)
+        knots = _knots(x, n, degree)
+        coefficients = _solve(x, y, n, knots, degree)
+        mask = inside[batch]
+        rows, columns = np.nonzero(mask)
+        out[batch[rows], columns] = _evaluate(x, n, knots, coefficients, rows, grid[batch][mask], degree)
+    return out[inside]
+
+
+def _batches(records: np.ndarray, lengths: np.ndarray) -> Iterator[np.ndarray]:
+    """
+    Split records into batches solved together, longest first.
+    
+    Solving costs a Python step per point of the longest record in the
+    batch, so few wide batches are fastest; a batch ends once it holds
+    SPLINE_BATCH_POINTS padded points or the next record is less than a
+    quarter of its width, which bounds both memory and padding.
+    """
+    records = records[np.argsort(-lengths[records], kind='stable')]
+    first = 0
+    while first < len(records):
+        width = lengths[records[first]]
+        last = first + 1
+        while (
+            last < len(records)
+            and (last - first + 1) * width <= SPLINE_BATCH_POINTS
+            and lengths[records[last]] * 4 >= width
+        ):
+            last += 1
+        yield records[first:last]
+        first = last
+
+
+def _padded(
+    temps: np.ndarray, dists: np.ndarray, starts: np.ndarray, lengths: np.ndarray, width: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Copy ragged records into (n_records, width) arrays, repeating each record's last point."""
+    position = np.minimum(np.arange(width), (lengths - 1)[:, np.newaxis])
+    index = starts[:, np.newaxis] + position
+    return temps[index], dists[index], lengths
+
+
+def _knots(x: np.ndarray, n: np.ndarray, degree: int) -> np.ndarray:
+    """
+    Knot vectors as interp1d (make_interp_spline) chooses them.
+    
+    Both ends repeat degree + 1 times. Cubic splines use the data points
+    except the second and second to last (not-a-knot); quadratic splines
+    use the midpoints between data points except the first and last.
+    """
+    n_records, width = x.shape
+    j = np.arange(width + degree + 1)
+    lower = np.clip(j - 2, 0, width - 1)
+    if degree == 3:
+        interior = x[:, lower]
+    else:
+        interior = (x[:, lower] + x[:, np.minimum(lower + 1, width - 1)]) / 2
+    first = x[:, :1]
+    last = x[np.arange(n_records), n - 1][:, np.newaxis]
+    knots = np.where(j <= degree, first, interior)
+    return np.where(j >= n[:, np.newaxis], last, knots)
+
+
+def _interval(knots: np.ndarray, n: np.ndarray, rows: np.ndarray, point: np.ndarray,
+              below: np.ndarray, degree: int) -> np.ndarray:
+    """
+    Knot interval l with knots[l] <= point < knots[l + 1], clamped to [degree, n - 1].
+    
+    below is the index of the last data point at or below the point; the
+    interval is then one of two candidates given by the knot layout.
+    """
+    last = n[rows] - 1
+    interval = np.clip(below + degree - 1, degree, last)
+    step = np.minimum(interval + 1, knots.shape[1] - 1)
+    return np.where((interval < last) & (knots[rows, step] <= point), interval + 1, interval)
+
+
+def _basis(knots: np.ndarray, rows: np.ndarray, interval: np.ndarray, point: np.ndarray, degree: int) -> np.ndarray:
+    """Values of the degree + 1 B-splines that are non-zero at each point (Cox-de Boor)."""
+    flat = knots.reshape(-1)
+    base = rows * knots.shape[1] + interval
+    left = [None] + [point - flat[base + 1 - j] for j in range(1, degree + 1)]
+    right = [None] + [flat[base + j] - point for j in range(1, degree + 1)]
+    values = [np.ones(len(point))]
+    for j in range(1, degree + 1):
+        saved = np.zeros(len(point))
+        for r in range(j):
+            temp = values[r] / (right[r + 1] + left[j - r])
+            values[r] = saved + right[r + 1] * temp
+            saved = left[j - r] * temp
+        values.append(saved)
+    return np.stack(values, axis=1)
+
+
+def _solve(x: np.ndarray, y: np.ndarray, n: np.ndarray, knots: np.ndarray, degree: int) -> np.ndarray:
+    """
+    B-spline coefficients interpolating every record, shape (n_records, width).
+    
+    Row i of a record's collocation matrix holds the B-splines non-zero at
+    its point i, which lie within degree columns of the diagonal, so the
+    matrices are stored by column as bands of 2 * degree + 1 entries, as
+    LAPACK does, with the records along the last axis so every step of the
+    elimination is one contiguous operation over all of them. Rows past a
+    record's length are identity rows, so padding solves to zero.
+    """
+    n_records, width = x.shape
+    # band[degree + i - j, j] holds entry (i, j)
+    band = np.zeros((2 * degree + 1, width, n_records))
+    band[degree] = 1.0
+    rhs = np.where(np.arange(width) < n[:, np.newaxis], y, 0.0).T.copy()
+    
+    records, points = np.nonzero(np.arange(width) < n[:, np.newaxis])
+    interval = np.clip(points + degree - 1, degree, n[records] - 1)
+    values = _basis(knots, records, interval, x[records, points], degree)
+    band[degree, points, records] = 0.0
+    for r in range(degree + 1):
+        column = interval - degree + r
+        band[degree + points - column, column, records] = values[:, r]
+    
+    for i in range(width - 1):
+        below = min(degree, width - 1 - i)
+        factors = band[degree + 1:degree + 1 + below, i] / band[degree, i]
+        for column in range(i + 1, i + below + 1):
+            row = degree + i - column
+            band[row + 1:row + 1 + below, column] -= factors * band[row, column]
+        rhs[i + 1:i + 1 + below] -= factors * rhs[i]
+    
+    coefficients = np.zeros((width, n_records))
+    for i in range(width - 1, -1, -1):
+        coefficients[i] = rhs[i] / band[degree, i]
+        above = min(degree, i)
+        rhs[i - above:i] -= band[degree - above:degree, i] * coefficients[i]
+    return coefficients.T
+
+
+def _evaluate(
+    x: np.ndarray,
+    n: np.ndarray,
+    knots: np.ndarray,
+    coefficients: np.ndarray,
+    rows: np.ndarray,
+    point: np.ndarray,
+    degree: int
+) -> np.ndarray:
+    """Evaluate the splines of the given rows at one point each."""
+    width = x.shape[1]
+    record_starts = np.arange(len(x), dtype=np.int64) * width
+    upper = segment_search(
+        x.reshape(-1), record_starts[rows], record_starts[rows] + n[rows], point[:, np.newaxis]
+    )[:, 0] - record_starts[rows]
+    interval = _interval(knots, n, rows, point, upper - 1, degree)
+    values = _basis(knots, rows, interval, point, degree)
+    columns = interval[:, np.newaxis] - degree + np.arange(degree + 1)
+    return (coefficients[rows[:, np.newaxis], columns] * values).sum(axis=1)
\ No newline at end of file
@@ -7,6 +7,7 @@ class InterpolationMethod(Enum):
     CUBIC = "Cubic Spline"
     QUADRATIC = "Quadratic"
     NEAREST = "Nearest Neighbor"
+    ENVELOPE = "Monotone Envelope"
 
 
 class TemperatureType(Enum):
@@ -14,6 +15,16 @@ class TemperatureType(Enum):
     LIQUID = "Liquid"
 
 
+class ObserverSelection(Enum):
+    ALL = "Every observer and maximum"
+    MAXIMUM = "Maximum across observers"
+    FIRST = "Observer 1 only"
+
+
+# Observer of the results holding the furthest distance across a block's observers
+MAX_OBSERVER = "Max"
+
+
 @dataclass
 class AnalysisResult:
     subsection: str
@@ -21,4 +32,7 @@ class AnalysisResult:
     weather: str
     downwind_distance: float
     interpolation_method: str
-    temperature_of_interest: float 
\ No newline at end of file
+    temperature_of_interest: float
+    temperature_type: str
+    observer: str
+    source_file: str 
\ No newline at end of file
@@ -0,0 +1,297 @@
+import os
+import time
+import logging
+import threading
+import importlib.util
+from pathlib import Path
+from queue import Queue, Empty, Full
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from core.discovery import iter_report_files, is_report_file
+from core.pipeline import AnalysisPipeline, AnalysisCancelled
+
+
+# Seconds a file's size and modification time must stay unchanged before it is analysed
+SETTLE_SECONDS = 5.0
+
+# Seconds between scans of the input folder when polling
+POLL_SECONDS = 2.0
+
+# Seconds between safety-net scans when file events come from the operating
+# system, which can drop events when its own queue overflows
+RESCAN_SECONDS = 600.0
+
+# File events buffered before the event thread has to wait
+WATCH_QUEUE_SIZE = 1000
+
+# Longest sleep of the watch loop, so a stop request is noticed promptly
+MAX_WAIT_SECONDS = 1.0
+
+WATCH_BACKENDS = ('auto', 'native', 'poll')
+
+# Queued instead of a path when a whole folder changed and must be rescanned
+_RESCAN = None
+
+# (size, mtime_ns) of a file, or None once it is gone
+Signature = Optional[Tuple[int, int]]
+
+
+class FolderWatcher:
+    """
+    Keep a results file up to date while reports arrive in the input folder.
+    
+    Runs an incremental AnalysisPipeline whenever reports are added,
+    changed or removed, so only those files are parsed and the existing
+    output is updated in place. File changes come from the operating
+    system (inotify on Linux, through the optional watchdog package) or,
+    without it, from scanning the folder every poll interval.
+    
+    A file is only analysed once its size and modification time have
+    stayed unchanged for settle_seconds, so reports still being copied or
+    exported are not read half written. New files that have not settled
+    are left out of a run; a run waits while a file already in the output
+    is being rewritten.
+    
+    Memory stays bounded for unattended use: the watcher keeps one
+    signature per input file, each run uses a fresh pipeline, and file
+    events pass through a queue of queue_size entries whose producer waits
+    while it is full. stop() ends watching from another thread or a signal
+    handler, cancelling a run in progress without touching the output.
+    """
+    
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        status_callback: Optional[Callable[[str], None]] = None,
+        settle_seconds: float = SETTLE_SECONDS,
+        poll_seconds: float = POLL_SECONDS,
+        backend: str = 'auto',
+        queue_size: int = WATCH_QUEUE_SIZE,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            config: AnalysisPipeline configuration; runs are always incremental
+            status_callback: Receives human-readable status messages
+            settle_seconds: Quiet time before a changed file is analysed
+            poll_seconds: Seconds between folder scans when polling
+            backend: 'native' for operating system file events, 'poll' to
+                scan the folder, or 'auto' for native when available
+            queue_size: File events buffered before the producer waits
+            clock: Time source, in seconds
+        
+        Raises:
+            ValueError: If the backend is unknown or unavailable
+        """
+        if backend not in WATCH_BACKENDS:
+            raise ValueError(f"Unknown watch backend '{backend}', use one of: {', '.join(WATCH_BACKENDS)}")
+        native_available = importlib.util.find_spec('watchdog') is not None
+        if backend == 'native' and not native_available:
+            raise ValueError("Native file watching requires the watchdog package")
+        
+        # Absolute, so paths from file events and from scans compare equal
+        self._folder = Path(os.path.abspath(config['input_folder']))
+        self.config = dict(config, input_folder=str(self._folder), incremental=True, keep_records=False)
+        self.status_callback = status_callback
+        self.settle_seconds = settle_seconds
+        self.backend = 'native' if backend == 'native' or (backend == 'auto' and native_available) else 'poll'
+        self.scan_seconds = RESCAN_SECONDS if self.backend == 'native' else poll_seconds
+        self.clock = clock
+        self.runs = 0
+        self.logger = logging.getLogger(__name__)
+        
+        self._output = Path(config['output_file']).resolve()
+        self._events: Queue = Queue(maxsize=queue_size)
+        # Settled input files, as last analysed, and changes still settling
+        self._files: Dict[Path, Tuple[int, int]] = {}
+        self._pending: Dict[Path, Tuple[Signature, float]] = {}
+        self._pipeline: Optional[AnalysisPipeline] = None
+        self._stop_event = threading.Event()
+    
+    def stop(self):
+        """Stop watching; a run in progress is cancelled at its next file boundary."""
+        self._stop_event.set()
+        pipeline = self._pipeline
+        if pipeline:
+            pipeline.cancel()
+    
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+    
+    def run(self):
+        """Watch the input folder until stop() is called."""
+        observer = self._start_observer() if self.backend == 'native' else None
+        self._status(f"Watching {self._folder} ({self.backend})")
+        try:
+            self._rescan()
+            next_scan = self.clock() + self.scan_seconds
+            while not self.stopped:
+                self._wait_for_events(min(next_scan - self.clock(), MAX_WAIT_SECONDS))
+                if self.clock() >= next_scan:
+                    self._rescan()
+                    next_scan = self.clock() + self.scan_seconds
+                self._process_settled()
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()
+            self._status("Stopped watching")
+    
+    def _start_observer(self):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+        
+        watcher = self
+        
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in ('opened', 'closed_no_write'):
+                    return
+                if event.is_directory:
+                    # Files moved in or out with a folder raise no events of their own
+                    if event.event_type != 'modified':
+                        watcher._put(_RESCAN)
+                    return
+                for path in (event.src_path, getattr(event, 'dest_path', '')):
+                    if path and watcher._is_input(Path(os.fsdecode(path))):
+                        watcher._put(Path(os.fsdecode(path)))
+        
+        observer = Observer()
+        observer.schedule(Handler(), str(self._folder), recursive=self.config.get('recursive', False))
+        observer.daemon = True
+        observer.start()
+        return observer
+    
+    def _put(self, item: Optional[Path]):
+        """Queue a file event, waiting while the queue is full unless watching stops."""
+        while not self.stopped:
+            try:
+                self._events.put(item, timeout=MAX_WAIT_SECONDS)
+                return
+            except Full:
+                continue
+    
+    def _wait_for_events(self, timeout: float):
+        try:
+            item = self._events.get(timeout=max(timeout, 0.0))
+        except Empty:
+            return
+        rescan = False
+        while True:
+            if item is _RESCAN:
+                rescan = True
+            else:
+                self._note(item, _signature(item))
+            try:
+                item = self._events.get_nowait()
+            except Empty:
+                break
+        if rescan:
+            self._rescan()
+    
+    def _is_input(self, file_path: Path) -> bool:
+        return not self._is_output(file_path) and is_report_file(
+            file_path,
+            self._folder,
+            self.config.get('recursive', False),
+            self.config.get('include_patterns'),
+            self.config.get('exclude_patterns')
+        )
+    
+    def _is_output(self, file_path: Path) -> bool:
+        """Whether a file is the output, its temporary file or a rollup file, when written inside the folder."""
+        file_path = file_path.resolve()
+        return file_path.parent == self._output.parent and (
+            file_path.name == self._output.name or file_path.name.startswith(self._output.stem + ".")
+        )
+    
+    def _rescan(self):
+        """Compare the folder with the known files and note every difference."""
+        current = {}
+        for file_path in iter_report_files(
+            self._folder,
+            self.config.get('recursive', False),
+            self.config.get('include_patterns'),
+            self.config.get('exclude_patterns')
+        ):
+            signature = _signature(file_path)
+            if signature is not None and not self._is_output(file_path):
+                current[file_path] = signature
+        for file_path, signature in current.items():
+            self._note(file_path, signature)
+        for file_path in list(self._files):
+            if file_path not in current:
+                self._note(file_path, None)
+    
+    def _note(self, file_path: Path, signature: Signature):
+        """Record a file's latest signature; changes restart its settle time."""
+        pending = self._pending.get(file_path)
+        if pending is not None:
+            if pending[0] != signature:
+                self._pending[file_path] = (signature, self.clock())
+        elif self._files.get(file_path) != signature:
+            self._pending[file_path] = (signature, self.clock())
+    
+    def _process_settled(self):
+        """Apply settled changes and run an analysis if any file changed."""
+        now = self.clock()
+        settled = []
+        for file_path, (signature, since) in list(self._pending.items()):
+            if now - since < self.settle_seconds:
+                continue
+            current = _signature(file_path)
+            if current != signature:
+                self._pending[file_path] = (current, now)
+                continue
+            settled.append(file_path)
+        
+        # A file in the output that is being rewritten would be read half written
+        if not settled or any(file_path in self._files for file_path in set(self._pending) - set(settled)):
+            return
+        
+        changed = 0
+        for file_path in settled:
+            signature, _ = self._pending.pop(file_path)
+            if self._files.get(file_path) == signature:
+                continue
+            if signature is None:
+                self._files.pop(file_path, None)
+            else:
+                self._files[file_path] = signature
+            changed += 1
+        if changed:
+            self._analyse(changed)
+    
+    def _analyse(self, changed: int):
+        if not self._files:
+            self._status("No reports left to analyse")
+            return
+        
+        self._status(f"{changed} report(s) changed, updating {self.config['output_file']}")
+        config = dict(self.config, input_files=sorted(self._files))
+        self._pipeline = AnalysisPipeline(config, status_callback=self.status_callback)
+        try:
+            if self.stopped:
+                return
+            self._pipeline.run_export()
+            self.runs += 1
+        except AnalysisCancelled:
+            pass
+        except Exception as e:
+            # Keep watching; the next change retries the affected files
+            self.logger.error(f"Analysis failed: {e}")
+        finally:
+            self._pipeline = None
+    
+    def _status(self, message: str):
+        if self.status_callback:
+            self.status_callback(message)
+
+
+def _signature(file_path: Path) -> Signature:
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
\ No newline at end of file
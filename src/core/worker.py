@@ -1,73 +1,45 @@
-import logging
-import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional
 from PyQt5.QtCore import QThread, pyqtSignal
 
-from core.types import TemperatureType, InterpolationMethod, AnalysisResult
-from core.excel_processor import ExcelProcessor
-from core.interpolation import InterpolationEngine
+from core.pipeline import AnalysisPipeline, AnalysisCancelled
+
+
+UNKNOWN_ETA = -1.0
 
 
 class AnalysisWorker(QThread):
-    """Worker thread for performing analysis without blocking the GUI."""
+    """Worker thread running AnalysisPipeline and its export, reporting through Qt signals."""
     
-    progress_updated = pyqtSignal(int)
+    # Percentage and estimated seconds left, or UNKNOWN_ETA
+    progress_updated = pyqtSignal(int, float)
     status_updated = pyqtSignal(str)
-    analysis_completed = pyqtSignal(list)
+    analysis_completed = pyqtSignal(int)
+    analysis_cancelled = pyqtSignal()
     error_occurred = pyqtSignal(str)
     
     def __init__(self, config: Dict[str, Any]):
         super().__init__()
         self.config = config
+        self.pipeline = AnalysisPipeline(
+            config,
+            status_callback=self.status_updated.emit,
+            progress_callback=self._emit_progress
+        )
+    
+    def cancel(self):
+        """Ask the running analysis to stop at the next file boundary."""
+        self.pipeline.cancel()
+    
+    def _emit_progress(self, percent: int, eta: Optional[float]):
+        self.progress_updated.emit(percent, UNKNOWN_ETA if eta is None else eta)
     
     def run(self):
         try:
-            self.status_updated.emit("Initializing analysis...")
-            
-            processor = ExcelProcessor(
-                TemperatureType(self.config['temperature_type']),
-                self.config['verbose']
-            )
-            
-            self.status_updated.emit("Processing Excel files...")
-            raw_data = processor.process_files(self.config['input_folder'])
-            
-            if not raw_data:
-                self.error_occurred.emit("No valid data found in Excel files")
-                return
-            
-            self.status_updated.emit("Performing interpolation analysis...")
-            results = []
-            total_items = len(raw_data)
-            
-            for i, data_item in enumerate(raw_data):
-                try:
-                    distance = InterpolationEngine.interpolate(
-                        np.array(data_item['temperatures']),
-                        np.array(data_item['distances']),
-                        self.config['temperature_of_interest'],
-                        InterpolationMethod(self.config['interpolation_method'])
-                    )
-                    
-                    if distance is not None:
-                        result = AnalysisResult(
-                            subsection=data_item['equipment_item'],
-                            scenario=data_item['scenario'],
-                            weather=data_item['weather'],
-                            downwind_distance=distance,
-                            interpolation_method=self.config['interpolation_method'],
-                            temperature_of_interest=self.config['temperature_of_interest']
-                        )
-                        results.append(result)
-                    
-                    progress = int((i + 1) / total_items * 100)
-                    self.progress_updated.emit(progress)
-                    
-                except Exception as e:
-                    logging.error(f"Error processing data item: {e}")
-                    continue
+            exported = self.pipeline.run_export()
+            self.analysis_completed.emit(exported)
             
-            self.analysis_completed.emit(results)
+        except AnalysisCancelled:
+            self.analysis_cancelled.emit()
             
         except Exception as e:
-            self.error_occurred.emit(str(e)) 
\ No newline at end of file
+            self.error_occurred.emit(str(e))
\ No newline at end of file
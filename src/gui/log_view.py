@@ -0,0 +1,73 @@
+import logging
+from collections import deque
+
+from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtCore import QTimer, pyqtSignal
+
+
+# Lines kept in the log pane; older lines are discarded
+LOG_MAX_LINES = 5000
+
+# Milliseconds between two flushes of pending messages to the pane
+LOG_FLUSH_INTERVAL = 200
+
+
+class LogView(QPlainTextEdit):
+    """
+    Read-only log pane that appends messages in batches.
+    
+    Messages are queued and written together every flush interval, in one
+    append, instead of relaying out the widget per message. Both the pane
+    and the queue are bounded to max_lines, so a run that logs every file
+    keeps a fixed memory footprint and the oldest lines are dropped first.
+    message_logged can be emitted from any thread.
+    """
+    
+    message_logged = pyqtSignal(str)
+    
+    def __init__(self, max_lines: int = LOG_MAX_LINES, flush_interval: int = LOG_FLUSH_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_lines)
+        self._pending = deque(maxlen=max_lines)
+        self._dropped = 0
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.timeout.connect(self.flush)
+        self.message_logged.connect(self.append_message)
+    
+    def append_message(self, message: str):
+        """Queue a message; it is shown at the next flush."""
+        if len(self._pending) == self._pending.maxlen:
+            self._dropped += 1
+        self._pending.append(message)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+    
+    def flush(self):
+        """Write every queued message to the pane now."""
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        lines = list(self._pending)
+        if self._dropped:
+            lines.insert(0, f"... {self._dropped} earlier messages not shown")
+        self._pending.clear()
+        self._dropped = 0
+        self.appendPlainText("\n".join(lines))
+
+
+class LogViewHandler(logging.Handler):
+    """Logging handler that forwards formatted records to a LogView from any thread."""
+    
+    def __init__(self, view: LogView, level=logging.NOTSET):
+        super().__init__(level)
+        self.view = view
+        self.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.view.message_logged.emit(self.format(record))
+        except Exception:
+            self.handleError(record)
\ No newline at end of file
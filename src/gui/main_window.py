@@ -1,18 +1,27 @@
 import os
 import logging
-import pandas as pd
-from typing import List
+from typing import List, Optional
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QGridLayout, QLabel, QLineEdit, QPushButton, QComboBox, QCheckBox,
-    QProgressBar, QTextEdit, QFileDialog, QMessageBox, QGroupBox,
+    QProgressBar, QFileDialog, QMessageBox, QGroupBox,
     QSpinBox, QDoubleSpinBox, QTabWidget
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 
-from core.types import TemperatureType, InterpolationMethod, AnalysisResult
+from core.types import TemperatureType, InterpolationMethod, ObserverSelection
 from core.worker import AnalysisWorker
+from core.progress import format_duration
+from core.cache import ParseCache
+from core.exporter import EXPORT_FORMATS
+from core.aggregation import parse_rollups
+from core.comparison import COMPARISON_METHODS, DEFAULT_TOLERANCE
+from gui.results_tab import ResultsTab
+from gui.log_view import LogView, LogViewHandler
+
+
+BOTH_TEMPERATURE_TYPES = "Both"
 
 
 class PHASTAnalyzerGUI(QMainWindow):
@@ -26,6 +35,7 @@ class PHASTAnalyzerGUI(QMainWindow):
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
+        self.log_handler: Optional[LogViewHandler] = None
         
         self.init_ui()
         
@@ -44,6 +54,10 @@ class PHASTAnalyzerGUI(QMainWindow):
         analysis_tab = self.create_analysis_tab()
         tab_widget.addTab(analysis_tab, "Analysis")
         
+        # Results tab
+        self.results_tab = ResultsTab()
+        tab_widget.addTab(self.results_tab, "Results")
+        
         # Settings tab
         settings_tab = self.create_settings_tab()
         tab_widget.addTab(settings_tab, "Settings")
@@ -57,7 +71,7 @@ class PHASTAnalyzerGUI(QMainWindow):
         layout.addWidget(self.status_label)
         
         # Log output
-        self.log_output = QTextEdit()
+        self.log_output = LogView()
         self.log_output.setMaximumHeight(150)
         self.log_output.setFont(QFont("Consolas", 9))
         layout.addWidget(self.log_output)
@@ -87,6 +101,15 @@ class PHASTAnalyzerGUI(QMainWindow):
         output_browse_btn.clicked.connect(self.browse_output_file)
         file_layout.addWidget(output_browse_btn, 1, 2)
         
+        # Discovery options
+        self.recursive_checkbox = QCheckBox("Include subfolders")
+        file_layout.addWidget(self.recursive_checkbox, 2, 1)
+        
+        file_layout.addWidget(QLabel("Exclude:"), 3, 0)
+        self.exclude_edit = QLineEdit()
+        self.exclude_edit.setPlaceholderText("Patterns to skip, e.g. archive, *_old.xlsx")
+        file_layout.addWidget(self.exclude_edit, 3, 1)
+        
         layout.addWidget(file_group)
         
         # Analysis parameters group
@@ -96,7 +119,7 @@ class PHASTAnalyzerGUI(QMainWindow):
         # Temperature type
         params_layout.addWidget(QLabel("Temperature Type:"), 0, 0)
         self.temp_type_combo = QComboBox()
-        self.temp_type_combo.addItems([t.value for t in TemperatureType])
+        self.temp_type_combo.addItems([t.value for t in TemperatureType] + [BOTH_TEMPERATURE_TYPES])
         params_layout.addWidget(self.temp_type_combo, 0, 1)
         
         # Temperature of interest
@@ -107,11 +130,24 @@ class PHASTAnalyzerGUI(QMainWindow):
         self.temp_interest_spin.setDecimals(2)
         params_layout.addWidget(self.temp_interest_spin, 1, 1)
         
+        # Additional temperatures of interest
+        params_layout.addWidget(QLabel("Additional Temperatures (°C):"), 2, 0)
+        self.extra_temps_edit = QLineEdit()
+        self.extra_temps_edit.setPlaceholderText("e.g. -40, -60, -100")
+        params_layout.addWidget(self.extra_temps_edit, 2, 1)
+        
         # Interpolation method
-        params_layout.addWidget(QLabel("Interpolation Method:"), 2, 0)
+        params_layout.addWidget(QLabel("Interpolation Method:"), 3, 0)
         self.interp_method_combo = QComboBox()
         self.interp_method_combo.addItems([m.value for m in InterpolationMethod])
-        params_layout.addWidget(self.interp_method_combo, 2, 1)
+        params_layout.addWidget(self.interp_method_combo, 3, 1)
+        
+        # Observers reported for each dispersion block
+        params_layout.addWidget(QLabel("Observers:"), 4, 0)
+        self.observer_combo = QComboBox()
+        self.observer_combo.addItems([s.value for s in ObserverSelection])
+        self.observer_combo.setToolTip("Results per observer, the furthest distance across observers, or both")
+        params_layout.addWidget(self.observer_combo, 4, 1)
         
         layout.addWidget(params_group)
         
@@ -123,13 +159,40 @@ class PHASTAnalyzerGUI(QMainWindow):
         self.verbose_checkbox.setChecked(True)
         options_layout.addWidget(self.verbose_checkbox)
         
+        self.incremental_checkbox = QCheckBox("Incremental (only re-analyse added or changed files)")
+        options_layout.addWidget(self.incremental_checkbox)
+        
+        self.checkpoint_checkbox = QCheckBox("Checkpoint progress so an interrupted run can resume")
+        self.checkpoint_checkbox.setChecked(True)
+        self.checkpoint_checkbox.setToolTip(
+            "Journal parsed files next to the output; rerunning with the same settings skips them"
+        )
+        options_layout.addWidget(self.checkpoint_checkbox)
+        
         layout.addWidget(options_group)
         
-        # Run button
+        # Run and cancel buttons
+        buttons_layout = QHBoxLayout()
+        
         self.run_button = QPushButton("Run Analysis")
         self.run_button.clicked.connect(self.run_analysis)
         self.run_button.setStyleSheet("QPushButton { font-weight: bold; padding: 10px; }")
-        layout.addWidget(self.run_button)
+        buttons_layout.addWidget(self.run_button)
+        
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_analysis)
+        self.cancel_button.setStyleSheet("QPushButton { padding: 10px; }")
+        self.cancel_button.setEnabled(False)
+        buttons_layout.addWidget(self.cancel_button)
+        
+        self.partial_button = QPushButton("Export Partial Results")
+        self.partial_button.clicked.connect(self.export_partial_results)
+        self.partial_button.setStyleSheet("QPushButton { padding: 10px; }")
+        self.partial_button.setToolTip("Export the files analysed so far while the run continues")
+        self.partial_button.setEnabled(False)
+        buttons_layout.addWidget(self.partial_button)
+        
+        layout.addLayout(buttons_layout)
         
         return tab
     
@@ -148,8 +211,73 @@ class PHASTAnalyzerGUI(QMainWindow):
         self.decimal_places_spin.setValue(2)
         export_layout.addWidget(self.decimal_places_spin, 0, 1)
         
+        export_layout.addWidget(QLabel("Rollup Sheets:"), 1, 0)
+        self.rollups_edit = QLineEdit()
+        self.rollups_edit.setPlaceholderText("e.g. max:subsection, p95:subsection+weather")
+        self.rollups_edit.setToolTip(
+            "Extra sheets of grouped distances: max, min, mean, median or pNN by "
+            "subsection, scenario, weather, temperature_type, observer or source_file"
+        )
+        export_layout.addWidget(self.rollups_edit, 1, 1)
+        
+        self.compare_checkbox = QCheckBox("Compare interpolation methods (Method Comparison sheet)")
+        self.compare_checkbox.setToolTip(
+            "Distances by " + ", ".join(method.value for method in COMPARISON_METHODS)
+            + " side by side, with their spread"
+        )
+        export_layout.addWidget(self.compare_checkbox, 2, 0, 1, 2)
+        
+        export_layout.addWidget(QLabel("Spread Tolerance (m):"), 3, 0)
+        self.compare_tolerance_spin = QDoubleSpinBox()
+        self.compare_tolerance_spin.setRange(0, 100000)
+        self.compare_tolerance_spin.setValue(DEFAULT_TOLERANCE)
+        self.compare_tolerance_spin.setToolTip("Records whose methods differ by more than this are flagged")
+        export_layout.addWidget(self.compare_tolerance_spin, 3, 1)
+        
         layout.addWidget(export_group)
         
+        # Performance settings
+        performance_group = QGroupBox("Performance")
+        performance_layout = QGridLayout(performance_group)
+        
+        performance_layout.addWidget(QLabel("Worker Processes:"), 0, 0)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(0, 64)
+        self.workers_spin.setSpecialValueText("Auto")
+        self.workers_spin.setValue(0)
+        self.workers_spin.setToolTip("Number of files parsed in parallel (Auto uses one per CPU core)")
+        performance_layout.addWidget(self.workers_spin, 0, 1)
+        
+        self.stats_checkbox = QCheckBox("Write a statistics report (.stats.json) next to the output")
+        self.stats_checkbox.setToolTip("Per-stage and per-file timings, row and record counts and peak memory")
+        performance_layout.addWidget(self.stats_checkbox, 1, 0, 1, 2)
+        
+        self.profile_checkbox = QCheckBox("Profile the run (.prof) - parses in a single process")
+        self.profile_checkbox.setToolTip("Dump a cProfile profile and a text summary next to the output")
+        performance_layout.addWidget(self.profile_checkbox, 2, 0, 1, 2)
+        
+        layout.addWidget(performance_group)
+        
+        # Cache settings
+        cache_group = QGroupBox("Parse Cache")
+        cache_layout = QGridLayout(cache_group)
+        
+        self.use_cache_checkbox = QCheckBox("Reuse parsed data for unchanged files")
+        self.use_cache_checkbox.setChecked(True)
+        cache_layout.addWidget(self.use_cache_checkbox, 0, 0, 1, 2)
+        
+        cache_layout.addWidget(QLabel("Maximum Size (MB):"), 1, 0)
+        self.cache_size_spin = QSpinBox()
+        self.cache_size_spin.setRange(16, 100000)
+        self.cache_size_spin.setValue(512)
+        cache_layout.addWidget(self.cache_size_spin, 1, 1)
+        
+        clear_cache_btn = QPushButton("Clear Cache")
+        clear_cache_btn.clicked.connect(self.clear_cache)
+        cache_layout.addWidget(clear_cache_btn, 2, 0, 1, 2)
+        
+        layout.addWidget(cache_group)
+        
         # Add stretch to push everything to top
         layout.addStretch()
         
@@ -164,13 +292,19 @@ class PHASTAnalyzerGUI(QMainWindow):
     def browse_output_file(self):
         """Browse for output file."""
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Output File", "", "Excel Files (*.xlsx);;All Files (*)"
+            self, "Save Output File", "",
+            "Excel Files (*.xlsx);;CSV Files (*.csv);;Parquet Files (*.parquet)"
         )
         if file_path:
-            if not file_path.endswith('.xlsx'):
+            if os.path.splitext(file_path)[1].lower() not in EXPORT_FORMATS:
                 file_path += '.xlsx'
             self.output_file_edit.setText(file_path)
     
+    def clear_cache(self):
+        """Delete all cached parse results."""
+        freed = ParseCache().clear()
+        self.update_status(f"Cleared parse cache ({freed / (1024 * 1024):.1f} MB freed)")
+    
     def run_analysis(self):
         """Run the analysis in a separate thread."""
         # Validate inputs
@@ -182,99 +316,175 @@ class PHASTAnalyzerGUI(QMainWindow):
             QMessageBox.warning(self, "Warning", "Input folder does not exist.")
             return
         
+        temperatures = self.temperatures_of_interest()
+        if temperatures is None:
+            QMessageBox.warning(
+                self, "Warning",
+                "Additional temperatures must be numbers separated by commas."
+            )
+            return
+        
+        rollups = [text for text in self.rollups_edit.text().replace(';', ',').split(',') if text.strip()]
+        try:
+            parse_rollups(rollups)
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", str(e))
+            return
+        
+        if self.temp_type_combo.currentText() == BOTH_TEMPERATURE_TYPES:
+            temperature_types = [t.value for t in TemperatureType]
+        else:
+            temperature_types = [self.temp_type_combo.currentText()]
+        
         # Prepare configuration
         config = {
             'input_folder': self.input_folder_edit.text(),
             'output_file': self.output_file_edit.text(),
-            'temperature_type': self.temp_type_combo.currentText(),
-            'temperature_of_interest': self.temp_interest_spin.value(),
+            'temperature_types': temperature_types,
+            'temperatures_of_interest': temperatures,
             'interpolation_method': self.interp_method_combo.currentText(),
+            'observer_selection': self.observer_combo.currentText(),
             'verbose': self.verbose_checkbox.isChecked(),
-            'decimal_places': self.decimal_places_spin.value()
+            'incremental': self.incremental_checkbox.isChecked(),
+            'checkpoint': self.checkpoint_checkbox.isChecked(),
+            'decimal_places': self.decimal_places_spin.value(),
+            'rollups': rollups,
+            'compare_methods': [
+                method.value for method in COMPARISON_METHODS
+            ] if self.compare_checkbox.isChecked() else None,
+            'compare_tolerance': self.compare_tolerance_spin.value(),
+            'workers': self.workers_spin.value(),
+            'use_cache': self.use_cache_checkbox.isChecked(),
+            'cache_max_mb': self.cache_size_spin.value(),
+            'keep_records': True,
+            'recursive': self.recursive_checkbox.isChecked(),
+            'exclude_patterns': [
+                pattern.strip() for pattern in self.exclude_edit.text().split(',') if pattern.strip()
+            ]
         }
+        output_base = os.path.splitext(config['output_file'])[0]
+        if self.stats_checkbox.isChecked():
+            config['stats_file'] = output_base + ".stats.json"
+        if self.profile_checkbox.isChecked():
+            config['profile_file'] = output_base + ".prof"
         
         # Start analysis worker
         self.worker = AnalysisWorker(config)
         self.worker.progress_updated.connect(self.update_progress)
         self.worker.status_updated.connect(self.update_status)
         self.worker.analysis_completed.connect(self.on_analysis_completed)
+        self.worker.analysis_cancelled.connect(self.on_analysis_cancelled)
         self.worker.error_occurred.connect(self.on_error)
         
         self.run_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.partial_button.setEnabled(True)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("%p%")
+        
+        # Per-file messages from the parser go to the log pane in batches
+        if self.verbose_checkbox.isChecked():
+            self.log_handler = LogViewHandler(self.log_output, logging.INFO)
+            logging.getLogger("core").addHandler(self.log_handler)
         
         self.worker.start()
     
-    def update_progress(self, value: int):
-        """Update progress bar."""
+    def temperatures_of_interest(self) -> Optional[List[float]]:
+        """Return the main and additional temperatures, or None if any are invalid."""
+        temperatures = [self.temp_interest_spin.value()]
+        for text in self.extra_temps_edit.text().replace(';', ',').split(','):
+            if not text.strip():
+                continue
+            try:
+                temperature = float(text)
+            except ValueError:
+                return None
+            if temperature not in temperatures:
+                temperatures.append(temperature)
+        return temperatures
+    
+    def cancel_analysis(self):
+        """Cancel the running analysis."""
+        if hasattr(self, 'worker') and self.worker.isRunning():
+            self.cancel_button.setEnabled(False)
+            self.update_status("Cancelling analysis...")
+            self.worker.cancel()
+    
+    def export_partial_results(self):
+        """Export the results analysed so far while the run continues."""
+        if not (hasattr(self, 'worker') and self.worker.isRunning()):
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Partial Results", "",
+            "Excel Files (*.xlsx);;CSV Files (*.csv);;Parquet Files (*.parquet)"
+        )
+        if not file_path:
+            return
+        if os.path.splitext(file_path)[1].lower() not in EXPORT_FORMATS:
+            file_path += '.xlsx'
+        try:
+            self.worker.pipeline.request_partial_export(file_path)
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", str(e))
+            return
+        self.update_status(f"Partial results will be written to {file_path} after the current file")
+    
+    def update_progress(self, value: int, eta: float):
+        """Update progress bar; a negative eta means it is not known yet."""
         self.progress_bar.setValue(value)
+        if eta >= 0:
+            self.progress_bar.setFormat(f"%p% - about {format_duration(eta)} left")
+        else:
+            self.progress_bar.setFormat("%p%")
     
     def update_status(self, message: str):
         """Update status label."""
         self.status_label.setText(message)
-        self.log_output.append(f"[INFO] {message}")
+        self.log_output.append_message(f"[INFO] {message}")
     
-    def on_analysis_completed(self, results: List[AnalysisResult]):
-        """Handle analysis completion."""
-        try:
-            self.export_results(results)
-            
-            self.progress_bar.setVisible(False)
-            self.run_button.setEnabled(True)
-            
-            QMessageBox.information(
-                self, "Success", 
-                f"Analysis completed successfully!\n"
-                f"Results exported to: {self.output_file_edit.text()}\n"
-                f"Total records: {len(results)}"
+    def finish_run(self):
+        """Reset the controls and log pane once a run has ended, however it ended."""
+        self.progress_bar.setVisible(False)
+        self.run_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.partial_button.setEnabled(False)
+        if self.log_handler:
+            logging.getLogger("core").removeHandler(self.log_handler)
+            self.log_handler = None
+        self.log_output.flush()
+    
+    def on_analysis_completed(self, exported: int):
+        """Handle analysis completion; the worker has already exported the results."""
+        self.finish_run()
+        
+        pipeline = self.worker.pipeline
+        if pipeline.records is not None:
+            self.results_tab.set_records(
+                pipeline.records,
+                pipeline.config['temperatures_of_interest'][0],
+                InterpolationMethod(pipeline.config['interpolation_method']),
+                self.decimal_places_spin.value(),
+                ObserverSelection(pipeline.config.get('observer_selection', ObserverSelection.ALL.value))
             )
-            
-        except Exception as e:
-            self.on_error(f"Export failed: {str(e)}")
+        
+        QMessageBox.information(
+            self, "Success", 
+            f"Analysis completed successfully!\n"
+            f"Results exported to: {self.output_file_edit.text()}\n"
+            f"Total records: {exported}"
+        )
+    
+    def on_analysis_cancelled(self):
+        """Handle a cancelled analysis."""
+        self.finish_run()
+        self.status_label.setText("Analysis cancelled")
     
     def on_error(self, error_message: str):
         """Handle analysis errors."""
-        self.progress_bar.setVisible(False)
-        self.run_button.setEnabled(True)
+        self.finish_run()
         self.status_label.setText("Analysis failed")
-        self.log_output.append(f"[ERROR] {error_message}")
+        self.log_output.append_message(f"[ERROR] {error_message}")
+        self.log_output.flush()
         
-        QMessageBox.critical(self, "Error", f"Analysis failed:\n{error_message}")
-    
-    def export_results(self, results: List[AnalysisResult]):
-        """Export results to Excel file."""
-        if not results:
-            raise ValueError("No results to export")
-        
-        # Convert results to DataFrame
-        data = []
-        for result in results:
-            data.append({
-                'Subsection': result.subsection,
-                'Scenario': result.scenario,
-                'Weather': result.weather,
-                f'Downwind Distance at {result.temperature_of_interest}°C (m)': 
-                    round(result.downwind_distance, self.decimal_places_spin.value()),
-                'Interpolation Method': result.interpolation_method
-            })
-        
-        df = pd.DataFrame(data)
-        
-        # Export to Excel
-        with pd.ExcelWriter(self.output_file_edit.text(), engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Analysis Results', index=False)
-            
-            # Auto-adjust column widths
-            worksheet = writer.sheets['Analysis Results']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width 
\ No newline at end of file
+        QMessageBox.critical(self, "Error", f"Analysis failed:\n{error_message}")
\ No newline at end of file
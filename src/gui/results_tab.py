@@ -0,0 +1,429 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QPushButton,
+    QComboBox, QDoubleSpinBox, QGroupBox, QTableView, QAbstractItemView,
+    QSplitter, QHeaderView
+)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QPointF
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
+
+from core.types import InterpolationMethod, ObserverSelection
+from core.record_store import RecordStore, ResultRows
+from core.interpolation import InterpolationEngine
+
+
+# (header, record store label field); None marks the distance column
+RESULT_COLUMNS = [
+    ("Subsection", 'equipment_item'),
+    ("Scenario", 'scenario'),
+    ("Weather", 'weather'),
+    ("Temperature Type", 'temperature_type'),
+    ("Observer", 'observer'),
+    ("Downwind Distance (m)", None),
+    ("Source File", 'source_file'),
+]
+
+DISTANCE_COLUMN = 5
+
+# Upper bounds that keep a sweep quick to compute and readable to plot
+MAX_SWEEP_SERIES = 12
+MAX_SWEEP_POINTS = 2000
+
+SERIES_COLORS = [
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b",
+    "#e377c2", "#7f7f7f", "#bcbd22", "#17becf", "#393b79", "#637939",
+]
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    Table model over the result rows of a RecordStore and one downwind
+    distance per row.
+    
+    The rows are those of the exported results (see ResultRows), so the
+    worst case across observers shows as observer Max. Cells are produced
+    on demand from the store's labels and the distance array, and sorting
+    permutes a row order array, so the view stays responsive with tens of
+    thousands of records.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.decimal_places = 2
+        self._labels: List[List[Optional[str]]] = [[] for _ in RESULT_COLUMNS]
+        self._distances = np.empty(0)
+        self._order = np.empty(0, dtype=np.int64)
+        self._sort_column: Optional[int] = None
+        self._sort_order = Qt.AscendingOrder
+    
+    def set_rows(self, records: RecordStore, rows: ResultRows, distances: np.ndarray):
+        """Show the result rows of a store with their distances."""
+        self.beginResetModel()
+        self._labels = []
+        for _, field in RESULT_COLUMNS:
+            if field == 'observer':
+                self._labels.append(rows.observers(records))
+            elif field:
+                labels = records.labels(field)
+                self._labels.append([labels[i] for i in rows.records])
+            else:
+                self._labels.append([])
+        self._distances = distances
+        self._order = np.arange(len(rows))
+        if self._sort_column is not None:
+            self._order = self._sorted_order(self._sort_column, self._sort_order)
+        self.endResetModel()
+    
+    def set_distances(self, distances: np.ndarray):
+        """Replace the distances, keeping the rows and re-sorting if sorted by distance."""
+        self._distances = distances
+        if self._sort_column == DISTANCE_COLUMN:
+            self.sort(DISTANCE_COLUMN, self._sort_order)
+        elif len(self._order):
+            self.dataChanged.emit(
+                self.index(0, DISTANCE_COLUMN),
+                self.index(len(self._order) - 1, DISTANCE_COLUMN)
+            )
+    
+    @property
+    def distances(self) -> np.ndarray:
+        """Distance of every result row, in row order."""
+        return self._distances
+    
+    def row_index(self, row: int) -> int:
+        """Return the result row shown in a table row."""
+        return int(self._order[row])
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._order)
+    
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(RESULT_COLUMNS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return RESULT_COLUMNS[section][0]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._order[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == DISTANCE_COLUMN:
+                distance = self._distances[row]
+                return "" if np.isnan(distance) else f"{distance:.{self.decimal_places}f}"
+            return self._labels[column][row]
+        if role == Qt.TextAlignmentRole and column == DISTANCE_COLUMN:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+    
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        """Sort rows by a column; records without a distance always sort last."""
+        self._sort_column, self._sort_order = column, order
+        self.layoutAboutToBeChanged.emit()
+        
+        old_indexes = self.persistentIndexList()
+        old_rows = [self._order[index.row()] for index in old_indexes]
+        self._order = self._sorted_order(column, order)
+        
+        position = np.empty_like(self._order)
+        position[self._order] = np.arange(len(self._order))
+        self.changePersistentIndexList(
+            old_indexes,
+            [self.index(int(position[row]), index.column()) for row, index in zip(old_rows, old_indexes)]
+        )
+        self.layoutChanged.emit()
+    
+    def _sorted_order(self, column: int, order) -> np.ndarray:
+        descending = order == Qt.DescendingOrder
+        if column == DISTANCE_COLUMN:
+            keys = -self._distances if descending else self._distances
+            return np.argsort(keys, kind='stable')
+        
+        labels = self._labels[column]
+        ordered = sorted(range(len(labels)), key=lambda i: labels[i] or "", reverse=descending)
+        return np.asarray(ordered, dtype=np.int64)
+
+
+class SweepTableModel(QAbstractTableModel):
+    """Distances of a few records over a range of thresholds, one row per threshold."""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.decimal_places = 2
+        self._thresholds = np.empty(0)
+        self._names: List[str] = []
+        self._distances = np.empty((0, 0))
+    
+    def set_sweep(self, thresholds: np.ndarray, names: List[str], distances: np.ndarray):
+        """Show a sweep; distances has one row per series and one column per threshold."""
+        self.beginResetModel()
+        self._thresholds, self._names, self._distances = thresholds, names, distances
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._thresholds)
+    
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._names) + 1
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return "Threshold (°C)" if section == 0 else self._names[section - 1]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return f"{self._thresholds[index.row()]:g}"
+            distance = self._distances[index.column() - 1, index.row()]
+            return "" if np.isnan(distance) else f"{distance:.{self.decimal_places}f}"
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+
+class SweepChart(QWidget):
+    """Line chart of downwind distance against threshold temperature."""
+    
+    MARGIN = 50
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(200)
+        self._thresholds = np.empty(0)
+        self._names: List[str] = []
+        self._distances = np.empty((0, 0))
+    
+    def set_sweep(self, thresholds: np.ndarray, names: List[str], distances: np.ndarray):
+        self._thresholds, self._names, self._distances = thresholds, names, distances
+        self.update()
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), Qt.white)
+        
+        valid = self._distances[~np.isnan(self._distances)] if self._distances.size else []
+        if len(self._thresholds) < 2 or not len(valid):
+            painter.drawText(self.rect(), Qt.AlignCenter, "Select records and run a sweep")
+            return
+        
+        left, top = self.MARGIN, 10
+        width = self.width() - self.MARGIN - 10
+        height = self.height() - self.MARGIN - 10
+        x_min, x_max = float(self._thresholds[0]), float(self._thresholds[-1])
+        y_max = float(np.max(valid)) or 1.0
+        
+        def point(x: float, y: float) -> QPointF:
+            return QPointF(
+                left + (x - x_min) / (x_max - x_min) * width,
+                top + height - y / y_max * height
+            )
+        
+        # Axes and end labels
+        painter.setPen(QPen(Qt.black))
+        painter.drawLine(left, top + height, left + width, top + height)
+        painter.drawLine(left, top, left, top + height)
+        painter.drawText(left, top + height + 15, f"{x_min:g}")
+        painter.drawText(left + width - 40, top + height + 15, f"{x_max:g} °C")
+        painter.drawText(2, top + 10, f"{y_max:.0f} m")
+        painter.drawText(2, top + height, "0")
+        
+        for series, distances in enumerate(self._distances):
+            painter.setPen(QPen(QColor(SERIES_COLORS[series % len(SERIES_COLORS)]), 2))
+            # Draw each run of thresholds that has a distance as its own line
+            line = QPolygonF()
+            for x, y in zip(self._thresholds, distances):
+                if np.isnan(y):
+                    if line.size() > 1:
+                        painter.drawPolyline(line)
+                    line = QPolygonF()
+                    continue
+                line.append(point(float(x), float(y)))
+            if line.size() > 1:
+                painter.drawPolyline(line)
+            painter.drawText(left + 10, top + 15 * (series + 1), self._names[series])
+
+
+class ResultsTab(QWidget):
+    """
+    Results of the last run, recomputed from the parsed records in memory.
+    
+    Changing the temperature or interpolation method recomputes every
+    distance without parsing again, and a sweep shows distance against
+    threshold for the selected records.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records: Optional[RecordStore] = None
+        self.rows: Optional[ResultRows] = None
+        self._recompute_timer = QTimer(self)
+        self._recompute_timer.setSingleShot(True)
+        self._recompute_timer.setInterval(100)
+        self._recompute_timer.timeout.connect(self.recompute)
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Temperature (°C):"))
+        self.temperature_spin = QDoubleSpinBox()
+        self.temperature_spin.setRange(-273, 1000)
+        self.temperature_spin.setDecimals(2)
+        self.temperature_spin.setValue(-15)
+        self.temperature_spin.valueChanged.connect(self.schedule_recompute)
+        controls.addWidget(self.temperature_spin)
+        
+        controls.addWidget(QLabel("Method:"))
+        self.method_combo = QComboBox()
+        self.method_combo.addItems([m.value for m in InterpolationMethod])
+        self.method_combo.currentTextChanged.connect(self.schedule_recompute)
+        controls.addWidget(self.method_combo)
+        
+        self.summary_label = QLabel("Run an analysis to see results")
+        controls.addWidget(self.summary_label, 1)
+        layout.addLayout(controls)
+        
+        splitter = QSplitter(Qt.Vertical)
+        
+        self.model = ResultsTableModel(self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setSortingEnabled(True)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table_view.verticalHeader().setVisible(False)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table_view.horizontalHeader().setStretchLastSection(True)
+        splitter.addWidget(self.table_view)
+        
+        # Threshold sweep for the selected records
+        sweep_group = QGroupBox("Threshold Sweep")
+        sweep_layout = QGridLayout(sweep_group)
+        
+        self.sweep_from_spin = self._sweep_spin(-100)
+        self.sweep_to_spin = self._sweep_spin(0)
+        self.sweep_step_spin = self._sweep_spin(1)
+        self.sweep_step_spin.setRange(0.01, 100)
+        for column, (label, spin) in enumerate([
+            ("From (°C):", self.sweep_from_spin),
+            ("To (°C):", self.sweep_to_spin),
+            ("Step (°C):", self.sweep_step_spin),
+        ]):
+            sweep_layout.addWidget(QLabel(label), 0, column * 2)
+            sweep_layout.addWidget(spin, 0, column * 2 + 1)
+        
+        sweep_button = QPushButton("Sweep Selected")
+        sweep_button.clicked.connect(self.run_sweep)
+        sweep_layout.addWidget(sweep_button, 0, 6)
+        
+        sweep_splitter = QSplitter(Qt.Horizontal)
+        self.sweep_chart = SweepChart()
+        sweep_splitter.addWidget(self.sweep_chart)
+        self.sweep_model = SweepTableModel(self)
+        sweep_table = QTableView()
+        sweep_table.setModel(self.sweep_model)
+        sweep_table.verticalHeader().setVisible(False)
+        sweep_splitter.addWidget(sweep_table)
+        sweep_layout.addWidget(sweep_splitter, 1, 0, 1, 7)
+        
+        splitter.addWidget(sweep_group)
+        layout.addWidget(splitter)
+    
+    def set_records(
+        self,
+        records: RecordStore,
+        temperature: float,
+        method: InterpolationMethod,
+        decimal_places: int = 2,
+        selection: ObserverSelection = ObserverSelection.ALL
+    ):
+        """Show the results of a finished run at its first temperature and method, with its observer rows."""
+        self.records = records
+        self.rows = records.result_rows(selection)
+        self.model.decimal_places = decimal_places
+        self.sweep_model.decimal_places = decimal_places
+        
+        for widget in (self.temperature_spin, self.method_combo):
+            widget.blockSignals(True)
+        self.temperature_spin.setValue(temperature)
+        self.method_combo.setCurrentText(method.value)
+        for widget in (self.temperature_spin, self.method_combo):
+            widget.blockSignals(False)
+        
+        self.model.set_rows(records, self.rows, self._row_distances([temperature])[:, 0])
+        self._update_summary()
+    
+    def schedule_recompute(self, *args):
+        """Recompute shortly after the last change, so typing does not queue up work."""
+        if self.records is not None:
+            self._recompute_timer.start()
+    
+    def recompute(self):
+        if self.records is None:
+            return
+        self.model.set_distances(self._row_distances([self.temperature_spin.value()])[:, 0])
+        self._update_summary()
+    
+    def run_sweep(self):
+        """Compute distance against threshold for the selected rows."""
+        if self.records is None:
+            return
+        
+        rows = sorted({index.row() for index in self.table_view.selectionModel().selectedRows()})
+        if not rows:
+            self.summary_label.setText("Select one or more rows to sweep")
+            return
+        rows = [self.model.row_index(row) for row in rows[:MAX_SWEEP_SERIES]]
+        
+        start, stop = self.sweep_from_spin.value(), self.sweep_to_spin.value()
+        step = self.sweep_step_spin.value()
+        count = min(int(abs(stop - start) / step) + 1, MAX_SWEEP_POINTS)
+        thresholds = np.linspace(min(start, stop), max(start, stop), max(count, 2))
+        
+        # A Max row is the furthest distance over its block's records at every threshold
+        members = [self.rows.members(row) for row in rows]
+        starts = np.cumsum([0] + [len(records) for records in members[:-1]])
+        subset = self.records.subset(np.concatenate(members))
+        distances = np.fmax.reduceat(self._distances(subset, thresholds), starts, axis=0)
+        observers = self.rows.observers(self.records)
+        names = [
+            " / ".join(
+                [str(self.records.label(field, self.rows.records[row]))
+                 for field in ('equipment_item', 'scenario', 'weather', 'temperature_type')]
+                + [str(observers[row])]
+            )
+            for row in rows
+        ]
+        self.sweep_chart.set_sweep(thresholds, names, distances)
+        self.sweep_model.set_sweep(thresholds, names, distances)
+    
+    def _distances(self, records: RecordStore, thresholds: Sequence[float]) -> np.ndarray:
+        method = InterpolationMethod(self.method_combo.currentText())
+        return InterpolationEngine.interpolate_store(records, thresholds, method)
+    
+    def _row_distances(self, thresholds: Sequence[float]) -> np.ndarray:
+        return self.rows.distances(self._distances(self.records, thresholds))
+    
+    def _update_summary(self):
+        total = self.model.rowCount()
+        reached = int(np.count_nonzero(~np.isnan(self.model.distances)))
+        self.summary_label.setText(f"{total} rows, {reached} with a distance")
+    
+    @staticmethod
+    def _sweep_spin(value: float) -> QDoubleSpinBox:
+        spin = QDoubleSpinBox()
+        spin.setRange(-273, 1000)
+        spin.setDecimals(2)
+        spin.setValue(value)
+        return spin
\ No newline at end of file
@@ -0,0 +1,61 @@
+import csv
+import os
+from pathlib import Path
+from typing import List
+
+from core.readers import reader_for
+
+
+# Delimiter written for each text report extension
+TEXT_DELIMITERS = {'.csv': ',', '.txt': '\t', '.tsv': '\t'}
+
+
+def convert_report(source: str, destination: str) -> int:
+    """
+    Write a report as CSV or tab-separated text, in the layout PHAST exports.
+    
+    Every sheet's rows are written one after the other, so a multi-sheet
+    workbook becomes a single file. Numbers are written so that they read
+    back as the same int or float.
+    
+    Args:
+        source: Report to convert, of any type a reader backend reads
+        destination: File to write; .csv for commas, .txt or .tsv for tabs
+    
+    Returns:
+        Number of rows written
+    """
+    delimiter = TEXT_DELIMITERS.get(Path(destination).suffix.lower())
+    if delimiter is None:
+        raise ValueError(f"Unsupported text report extension: {destination}")
+    reader = reader_for(Path(source))
+    if reader is None:
+        raise ValueError(f"No reader for {source}")
+    
+    count = 0
+    tmp_path = str(destination) + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        for _, rows in reader.iter_sheets(Path(source)):
+            for row in rows:
+                writer.writerow(["" if value is None else value for value in row])
+                count += 1
+    os.replace(tmp_path, destination)
+    return count
+
+
+def convert_folder(source_folder: str, destination_folder: str, extension: str = '.csv') -> List[Path]:
+    """
+    Convert every .xlsx report in a folder; see convert_report().
+    
+    Returns:
+        Paths of the converted reports
+    """
+    destination = Path(destination_folder)
+    destination.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for source in sorted(Path(source_folder).glob('*.xlsx')):
+        path = destination / (source.stem + extension)
+        convert_report(str(source), str(path))
+        paths.append(path)
+    return paths
\ No newline at end of file
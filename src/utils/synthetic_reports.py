@@ -0,0 +1,161 @@
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import openpyxl
+
+from core.excel_processor import DISPERSION_DATA_TITLE, DISTANCE_HEADER, TEMPERATURE_HEADERS
+from core.types import TemperatureType
+
+
+WEATHER_CATEGORIES = ["Category 2F", "Category 5D", "Category 1.5F", "Category 9D"]
+
+AMBIENT_TEMPERATURE = 30.0
+
+
+def generate_report(
+    file_path: str,
+    sheets: int = 1,
+    blocks_per_sheet: int = 4,
+    rows_per_block: int = 100,
+    observers: int = 2,
+    extra_columns: int = 0,
+    include_liquid: bool = False,
+    seed: Optional[int] = None
+) -> int:
+    """
+    Write a synthetic workbook in the layout of a PHAST dispersion report.
+    
+    Each sheet holds blocks_per_sheet dispersion blocks, each preceded by
+    the equipment item, scenario and weather sections of a real report.
+    Every two blocks share a scenario and every four an equipment item.
+    A block has rows_per_block rows for each observer, separated by a row
+    of empty cells as in real reports. Centreline temperatures start cold at
+    the release and warm towards ambient with distance.
+    
+    Args:
+        file_path: Path of the workbook to write
+        sheets: Number of worksheets
+        blocks_per_sheet: Dispersion data blocks per worksheet
+        rows_per_block: Data rows per observer in each block
+        observers: Observers per block
+        extra_columns: Additional numeric columns after the temperatures,
+            to mimic wide reports
+        include_liquid: Also write a liquid centreline temperature column
+        seed: Seed for reproducible curves
+    
+    Returns:
+        Number of dispersion blocks written
+    """
+    rng = np.random.RandomState(seed)
+    stem = Path(file_path).stem
+    
+    headers = ["Observer number", "Time [s]", DISTANCE_HEADER, TEMPERATURE_HEADERS[TemperatureType.VAPOUR]]
+    if include_liquid:
+        headers.append(TEMPERATURE_HEADERS[TemperatureType.LIQUID])
+    headers.extend(f"Extra quantity {i + 1} [-]" for i in range(extra_columns))
+    
+    wb = openpyxl.Workbook(write_only=True)
+    for sheet_index in range(sheets):
+        ws = wb.create_sheet(f"Sheet{sheet_index + 1}")
+        for _ in range(5):
+            ws.append([])
+        ws.append(["Dispersion Report"])
+        ws.append(["Study: Synthetic"])
+        
+        for block in range(blocks_per_sheet):
+            equipment = f"{stem}_S{sheet_index + 1}_E{block // 4 + 1:03d}"
+            if block % 4 == 0:
+                ws.append([f"Equipment Item: {equipment}"])
+                ws.append(["Material", "SYNTH-001"])
+                ws.append([])
+            if block % 2 == 0:
+                ws.append([f"Scenario (Time varying leak) : {equipment}-S{block // 2 + 1}"])
+                ws.append(["Material to track", "SYNTH-001"])
+                ws.append([])
+            
+            weather = WEATHER_CATEGORIES[block % len(WEATHER_CATEGORIES)]
+            ws.append([f"Weather: {weather}"])
+            ws.append(["Wind speed [m/s]", float(weather.split()[1][:-1])])
+            ws.append(["Atmospheric temperature [degC]", AMBIENT_TEMPERATURE])
+            ws.append([])
+            
+            ws.append(["Observer Release Data and Observer Mass Data "])
+            ws.append(["Observer number", "Release type", "Start time [s]"])
+            for observer in range(observers):
+                ws.append([observer + 1, "Continuous", observer * 3600])
+            ws.append([])
+            
+            ws.append([DISPERSION_DATA_TITLE + " "])
+            ws.append(["Dispersion data correspond to an averaging time of: 18.75 s"])
+            ws.append(headers)
+            
+            for observer in range(observers):
+                if observer:
+                    ws.append([""] * len(headers))
+                for row in _block_rows(rng, observer, rows_per_block, include_liquid, extra_columns):
+                    ws.append(row)
+            ws.append([])
+    
+    tmp_path = str(file_path) + ".tmp"
+    wb.save(tmp_path)
+    os.replace(tmp_path, file_path)
+    return sheets * blocks_per_sheet
+
+
+def generate_dataset(
+    folder: str,
+    files: int = 10,
+    sheets: int = 1,
+    blocks_per_sheet: int = 4,
+    rows_per_block: int = 100,
+    observers: int = 2,
+    extra_columns: int = 0,
+    include_liquid: bool = False,
+    seed: int = 0
+) -> List[Path]:
+    """
+    Write a folder of synthetic reports; see generate_report() for the layout.
+    
+    Returns:
+        Paths of the generated workbooks
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(files):
+        path = folder / f"synthetic-{index + 1:04d}.xlsx"
+        generate_report(
+            str(path), sheets, blocks_per_sheet, rows_per_block, observers,
+            extra_columns, include_liquid, seed + index
+        )
+        paths.append(path)
+    return paths
+
+
+def _block_rows(
+    rng: np.random.RandomState,
+    observer: int,
+    rows: int,
+    include_liquid: bool,
+    extra_columns: int
+) -> List[list]:
+    """Rows of one observer: distance grows with time, temperature relaxes to ambient."""
+    times = np.sort(rng.uniform(0, 60, rows))
+    times[0] = 0.0
+    distances = rng.uniform(2, 8) * times
+    release_temperature = rng.uniform(-160, -40)
+    length_scale = rng.uniform(0.2, 0.6) * max(distances[-1], 1.0)
+    vapour = AMBIENT_TEMPERATURE + (release_temperature - AMBIENT_TEMPERATURE) * np.exp(-distances / length_scale)
+    liquid = vapour - rng.uniform(5, 20)
+    extras = rng.uniform(0, 1, (rows, extra_columns))
+    
+    block = []
+    for i in range(rows):
+        row = [observer + 1, round(observer * 3600 + times[i], 4), round(distances[i], 5), round(vapour[i], 4)]
+        if include_liquid:
+            row.append(round(liquid[i], 4))
+        row.extend(extras[i].round(6).tolist())
+        block.append(row)
+    return block
\ No newline at end of file
@@ -0,0 +1,20 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The application imports its packages from src/, as main.py and cli.py run there
+sys.path.insert(0, str(ROOT / "src"))
+
+SAMPLES = ROOT / "test"
+
+
+@pytest.fixture
+def samples() -> Path:
+    """Folder of sample PHAST reports shipped with the repository."""
+    if not any(SAMPLES.glob("*.xlsx")):
+        pytest.skip("no sample reports")
+    return SAMPLES
\ No newline at end of file
@@ -0,0 +1,66 @@
+import logging
+
+import numpy as np
+import pytest
+
+from core.types import InterpolationMethod, ObserverSelection, MAX_OBSERVER
+from core.interpolation import InterpolationEngine
+from core.comparison import MethodComparison, COMPARISON_METHODS
+from core.record_store import RecordStoreBuilder
+
+from test_interpolation import TARGETS, synthetic_curves, reference
+
+
+def tied_records(observers: int = 2):
+    """Synthetic curves with tied temperatures, grouped into blocks of observers."""
+    offsets, temperatures, distances = synthetic_curves(seed=2)
+    builder = RecordStoreBuilder()
+    for i, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+        builder.append(
+            distances[start:end], temperatures[start:end],
+            equipment_item=f"Item {i // observers}", scenario="Leak", weather="1.5/F",
+            temperature_type="Vapour", observer=str(i % observers + 1), source_file="synthetic.xlsx"
+        )
+    return builder.build()
+
+
+@pytest.fixture(autouse=True)
+def quiet_reference():
+    logging.disable(logging.ERROR)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def test_methods_share_sort_on_ties():
+    records = tied_records()
+    methods = list(InterpolationMethod)
+    shared = InterpolationEngine.interpolate_methods(records, TARGETS, methods)
+    for method in methods:
+        expected = reference(records.offsets, records.temperatures, records.distances, TARGETS, method)
+        np.testing.assert_allclose(shared[method], expected, rtol=1e-9, atol=1e-9)
+
+
+def test_spread_on_ties():
+    records = tied_records()
+    comparison = MethodComparison(COMPARISON_METHODS, TARGETS, selection=ObserverSelection.ALL)
+    comparison.add(records)
+    
+    per_method = np.stack([
+        reference(records.offsets, records.temperatures, records.distances, TARGETS, method)
+        for method in COMPARISON_METHODS
+    ])
+    starts = records.group_starts()
+    maxima = np.fmax.reduceat(per_method, starts, axis=1)
+    expected = []
+    for block, start in enumerate(starts):
+        end = starts[block + 1] if block + 1 < len(starts) else len(records)
+        for values in [per_method[:, i] for i in range(start, end)] + [maxima[:, block]]:
+            if not np.isnan(values).all():
+                expected.append(np.fmax.reduce(values, axis=0) - np.fmin.reduce(values, axis=0))
+    np.testing.assert_allclose(comparison.spreads(), np.array(expected), rtol=1e-9, atol=1e-9)
+    
+    title, header, rows = comparison.table(2)
+    assert len(rows) == len(expected)
+    assert sum(row[4] == MAX_OBSERVER for row in rows) <= len(starts)
+    flags = [row[header.index(f'Spread Above {comparison.tolerance:g} m')] for row in rows]
+    assert flags == ['Yes' if np.any(spread > comparison.tolerance) else 'No' for spread in expected]
\ No newline at end of file
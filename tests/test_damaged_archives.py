@@ -0,0 +1,72 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.types import TemperatureType
+from core.cache import ParseCache
+from core.checkpoint import RunCheckpoint
+from core.manifest import AnalysisManifest
+from core.excel_processor import ExcelProcessor
+
+
+def truncate(path: Path):
+    """Cut an archive in half, as a crash while writing it would."""
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+
+
+@pytest.fixture
+def report(samples, tmp_path) -> Path:
+    folder = tmp_path / "in"
+    folder.mkdir()
+    path = folder / "a.xlsx"
+    shutil.copy(next(samples.glob("*.xlsx")), path)
+    return path
+
+
+def parse(report: Path, cache=None):
+    processor = ExcelProcessor([TemperatureType.VAPOUR], cache=cache)
+    return processor.process_files(str(report.parent))
+
+
+@pytest.mark.parametrize("damage", [truncate, lambda path: path.write_bytes(b"garbage")])
+def test_damaged_cache_entry_is_discarded(report, tmp_path, damage):
+    cache_dir = tmp_path / "cache"
+    expected = parse(report, ParseCache(str(cache_dir)))
+    [entry] = cache_dir.glob("*.npz")
+    damage(entry)
+    
+    # Parsed again rather than failing, on this run and the next
+    for _ in range(2):
+        records = parse(report, ParseCache(str(cache_dir)))
+        np.testing.assert_array_equal(records.distances, expected.distances)
+    assert ParseCache(str(cache_dir)).get(report, ExcelProcessor([TemperatureType.VAPOUR]).cache_namespace) is not None
+
+
+def test_damaged_checkpoint_batch_is_discarded(report, tmp_path):
+    records = parse(report)
+    settings = {'parser': 1}
+    output_file = str(tmp_path / "out.xlsx")
+    checkpoint = RunCheckpoint.open(output_file, settings)
+    checkpoint.add(report, records)
+    checkpoint.flush()
+    
+    [batch] = RunCheckpoint.path_for(output_file).glob("*.npz")
+    truncate(batch)
+    resumed = RunCheckpoint.open(output_file, settings)
+    assert resumed.restore(report) is None
+    assert len(resumed) == 0
+    assert list(resumed.iter_records()) == []
+
+
+def test_damaged_manifest_archive_counts_as_changed(report, tmp_path):
+    output_file = str(tmp_path / "out.xlsx")
+    manifest = AnalysisManifest.load(output_file)
+    manifest.update_file("a.xlsx", report, parse(report), [])
+    manifest.save()
+    
+    [archive] = manifest.data_path.glob("*.records.npz")
+    truncate(archive)
+    assert AnalysisManifest.load(output_file).diff({"a.xlsx": report}).changed == ["a.xlsx"]
\ No newline at end of file
@@ -0,0 +1,85 @@
+import logging
+
+import numpy as np
+import pytest
+
+from core.types import InterpolationMethod
+from core.interpolation import InterpolationEngine
+
+
+# Below, at and between the points, at the warmest point and above every point
+TARGETS = [-120.0, -80.0, -45.0, -42.5, -40.0, -37.5, -20.0, 0.0, 10.0, 25.0]
+
+
+def synthetic_curves(seed: int = 1, n_records: int = 300):
+    """
+    Ragged curves rounded to 5 °C so most records have tied temperatures,
+    plus a few short records, as (offsets, temperatures, distances).
+    """
+    rng = np.random.default_rng(seed)
+    lengths = np.concatenate([[1, 2, 3, 4], rng.integers(2, 40, n_records)])
+    temperatures = np.round(rng.uniform(-80.0, 10.0, lengths.sum()) / 5.0) * 5.0
+    distances = rng.uniform(0.0, 100.0, lengths.sum())
+    # Some records without ties, so the spline methods are compared too
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    for i in range(4, len(lengths), 3):
+        start, end = offsets[i], offsets[i + 1]
+        temperatures[start:end] = rng.permutation(np.linspace(-80.0, 10.0, end - start))
+    return offsets, temperatures, distances
+
+
+def reference(offsets, temperatures, distances, targets, method) -> np.ndarray:
+    """interpolate_many() for every record, NaN where it gives None."""
+    rows = []
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        row = InterpolationEngine.interpolate_many(temperatures[start:end], distances[start:end], targets, method)
+        rows.append([np.nan if distance is None else distance for distance in row])
+    return np.array(rows).reshape(len(offsets) - 1, len(targets))
+
+
+@pytest.fixture(autouse=True)
+def quiet_reference():
+    # The reference logs every record without a spline; the batch logs them once
+    logging.disable(logging.ERROR)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize("method", list(InterpolationMethod))
+def test_batch_matches_reference(method):
+    offsets, temperatures, distances = synthetic_curves()
+    batch = InterpolationEngine.interpolate_batch(offsets, temperatures, distances, TARGETS, method)
+    expected = reference(offsets, temperatures, distances, TARGETS, method)
+    np.testing.assert_allclose(batch, expected, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("method", list(InterpolationMethod))
+def test_batch_matches_reference_on_samples(samples, method):
+    from core.excel_processor import ExcelProcessor
+    from core.types import TemperatureType
+    
+    records = ExcelProcessor(list(TemperatureType)).process_files(str(samples))
+    batch = InterpolationEngine.interpolate_store(records, TARGETS, method)
+    expected = reference(records.offsets, records.temperatures, records.distances, TARGETS, method)
+    np.testing.assert_allclose(batch, expected, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("method", list(InterpolationMethod))
+def test_tied_temperatures(method):
+    # Two points at -40 °C and two at -10 °C: a target at a tie takes the last
+    # of them, and the segment up to -10 °C ends at the first
+    temperatures = np.array([-10.0, -40.0, -20.0, -40.0, 0.0, -10.0])
+    distances = np.array([30.0, 80.0, 50.0, 95.0, 10.0, 35.0])
+    targets = [-50.0, -40.0, -10.0, -11.0, 0.0]
+    offsets = np.array([0, len(temperatures)])
+    batch = InterpolationEngine.interpolate_batch(offsets, temperatures, distances, targets, method)[0]
+    expected = reference(offsets, temperatures, distances, targets, method)[0]
+    np.testing.assert_allclose(batch, expected, rtol=1e-9, atol=1e-9)
+    
+    if method == InterpolationMethod.LINEAR:
+        np.testing.assert_allclose(batch, [80.0, 95.0, 35.0, 32.0, 10.0])
+    elif method == InterpolationMethod.NEAREST:
+        np.testing.assert_allclose(batch, [80.0, 95.0, 35.0, 35.0, 10.0])
+    elif method != InterpolationMethod.ENVELOPE:
+        # No spline through repeated temperatures; below range still applies
+        np.testing.assert_allclose(batch, [80.0] + [np.nan] * 4)
\ No newline at end of file
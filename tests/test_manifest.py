@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+
+from core.types import AnalysisResult
+from core.manifest import AnalysisManifest
+from core.record_store import RecordStoreBuilder
+
+
+def records(offset: float = 0.0):
+    builder = RecordStoreBuilder()
+    builder.append([0.0, 10.0, 20.0 + offset], [-80.0, -50.0, -20.0], equipment_item="Pump", observer="1")
+    builder.append([0.0, 5.0], [-60.0, -10.0], equipment_item="Valve", observer="1")
+    return builder.build()
+
+
+def results(distance: float):
+    return [AnalysisResult("Pump", "Leak", None, distance, "Linear", -40.0, "Vapour", "1", "a.xlsx")]
+
+
+def test_round_trip_through_sidecars(tmp_path):
+    report = tmp_path / "a.xlsx"
+    report.write_bytes(b"report")
+    output_file = str(tmp_path / "results.xlsx")
+    
+    manifest = AnalysisManifest.load(output_file)
+    manifest.settings = {'parse': 1}
+    manifest.update_file("a.xlsx", report, records(), results(12.5))
+    manifest.save()
+    
+    # The index holds signatures and archive names, not curves or results
+    index = json.loads(AnalysisManifest.path_for(output_file).read_text())
+    assert set(index['files']['a.xlsx']) == {'size', 'mtime_ns', 'hash', 'record_count', 'records_file', 'results_file'}
+    
+    loaded = AnalysisManifest.load(output_file)
+    assert loaded.diff({"a.xlsx": report}).unchanged == ["a.xlsx"]
+    stored = loaded.records("a.xlsx")
+    np.testing.assert_array_equal(stored.distances, records().distances)
+    assert stored.labels('equipment_item') == ["Pump", "Valve"]
+    assert loaded.results("a.xlsx") == results(12.5)
+    
+    # Replaced results go to a new archive and the old one is removed
+    loaded.set_results("a.xlsx", results(30.0))
+    loaded.save()
+    assert AnalysisManifest.load(output_file).results("a.xlsx") == results(30.0)
+    assert len(list(loaded.data_path.glob("*.npz"))) == 2
+    
+    loaded.remove_file("a.xlsx")
+    loaded.save()
+    assert list(loaded.data_path.glob("*.npz")) == []
+
+
+def test_missing_archive_counts_as_changed(tmp_path):
+    report = tmp_path / "a.xlsx"
+    report.write_bytes(b"report")
+    output_file = str(tmp_path / "results.xlsx")
+    manifest = AnalysisManifest.load(output_file)
+    manifest.update_file("a.xlsx", report, records(), results(12.5))
+    manifest.save()
+    
+    for archive in manifest.data_path.glob("*.records.npz"):
+        archive.unlink()
+    assert AnalysisManifest.load(output_file).diff({"a.xlsx": report}).changed == ["a.xlsx"]
+
+
+def test_inline_manifest_is_ignored(tmp_path):
+    output_file = str(tmp_path / "results.xlsx")
+    AnalysisManifest.path_for(output_file).write_text(json.dumps({
+        'settings': {'parse': 1},
+        'files': {'a.xlsx': {'size': 1, 'mtime_ns': 1, 'hash': 'x', 'records': [], 'results': []}}
+    }))
+    manifest = AnalysisManifest.load(output_file)
+    assert manifest.settings == {} and manifest.files == {}
\ No newline at end of file
@@ -0,0 +1,87 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from core.types import InterpolationMethod, TemperatureType
+from core.pipeline import AnalysisPipeline
+from core.manifest import AnalysisManifest
+from core.excel_processor import ExcelProcessor
+
+
+def config(input_folder: Path, output_file: Path, incremental: bool):
+    return {
+        'input_folder': str(input_folder),
+        'output_file': str(output_file),
+        'temperature_types': [TemperatureType.VAPOUR.value],
+        'temperatures_of_interest': [-15.0, -40.0],
+        'interpolation_method': InterpolationMethod.LINEAR.value,
+        'incremental': incremental,
+        'workers': 1
+    }
+
+
+def sheet_rows(output_file: Path):
+    import openpyxl
+    
+    workbook = openpyxl.load_workbook(output_file, read_only=True)
+    try:
+        rows = list(workbook.worksheets[0].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+    return rows[0], sorted(rows[1:], key=repr)
+
+
+def test_incremental_added_changed_removed(samples, tmp_path):
+    reports = sorted(samples.glob("*.xlsx"))
+    folder = tmp_path / "in"
+    folder.mkdir()
+    output_file = tmp_path / "out.xlsx"
+    
+    def run_incremental():
+        AnalysisPipeline(config(folder, output_file, True)).run_export()
+    
+    shutil.copy(reports[0], folder / "a.xlsx")
+    shutil.copy(reports[1], folder / "c.xlsx")
+    run_incremental()
+    
+    # a.xlsx changes and b.xlsx is added; a sorts before b, so the changed
+    # file comes before the added one in the folder
+    shutil.copy(reports[2], folder / "a.xlsx")
+    shutil.copy(reports[0], folder / "b.xlsx")
+    run_incremental()
+    
+    manifest = AnalysisManifest.load(str(output_file))
+    processor = ExcelProcessor([TemperatureType.VAPOUR])
+    for key in ("a.xlsx", "b.xlsx", "c.xlsx"):
+        [(_, parsed)] = processor.iter_files([folder / key], root=folder)
+        np.testing.assert_array_equal(manifest.records(key).distances, parsed.distances)
+        assert {result.source_file for result in manifest.results(key)} == {key}
+    
+    (folder / "b.xlsx").unlink()
+    run_incremental()
+    
+    full_output = tmp_path / "full.xlsx"
+    AnalysisPipeline(config(folder, full_output, False)).run_export()
+    assert sheet_rows(output_file) == sheet_rows(full_output)
+    assert {row[-1] for row in sheet_rows(output_file)[1]} == {"a.xlsx", "c.xlsx"}
+
+def test_streaming_export_progress(samples, tmp_path, monkeypatch):
+    import functools
+    import core.pipeline
+    
+    # Report every change, however close together
+    monkeypatch.setattr(core.pipeline, 'ProgressTracker', functools.partial(core.pipeline.ProgressTracker, interval=0))
+    folder = tmp_path / "in"
+    folder.mkdir()
+    for report in sorted(samples.glob("*.xlsx"))[:3]:
+        shutil.copy(report, folder / report.name)
+    
+    reports = []
+    on_progress = lambda percent, eta: reports.append(percent)
+    AnalysisPipeline(config(folder, tmp_path / "out.xlsx", False), progress_callback=on_progress).run_export()
+    
+    # Parsing and analysis reach 90 %; writing the rows covers the rest rather than jumping at the end
+    assert reports == sorted(reports)
+    assert any(90 < percent < 100 for percent in reports)
+    assert reports[-1] == 100
\ No newline at end of file
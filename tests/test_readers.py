@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.types import TemperatureType
+from core.readers import ReportReader, XlsxReader, OpenpyxlReader, reader_for
+from core.excel_processor import ExcelProcessor
+from core.record_store import RecordStore, LABEL_FIELDS
+from utils.report_conversion import convert_folder
+
+
+def parse(folder: Path, reader: str) -> RecordStore:
+    return ExcelProcessor(list(TemperatureType), reader=reader).process_files(str(folder))
+
+
+def assert_same_records(actual: RecordStore, expected: RecordStore):
+    """Same curves and labels; source file names differ in their extension."""
+    np.testing.assert_array_equal(actual.offsets, expected.offsets)
+    np.testing.assert_array_equal(actual.distances, expected.distances)
+    np.testing.assert_array_equal(actual.temperatures, expected.temperatures)
+    for field in LABEL_FIELDS:
+        if field != 'source_file':
+            assert actual.labels(field) == expected.labels(field), field
+
+
+@pytest.fixture(scope="module")
+def reference():
+    from conftest import SAMPLES
+    
+    if not any(SAMPLES.glob("*.xlsx")) or not OpenpyxlReader.available():
+        pytest.skip("needs the sample reports and openpyxl")
+    records = parse(SAMPLES, OpenpyxlReader.name)
+    assert len(records) > 0
+    return records
+
+
+def test_report_reader_is_abstract():
+    with pytest.raises(TypeError):
+        ReportReader()
+
+
+def test_xlsx_rows_match_openpyxl(samples):
+    if not OpenpyxlReader.available():
+        pytest.skip("openpyxl is not installed")
+    def sheets(reader: ReportReader, file_path: Path):
+        # openpyxl gives an empty list rather than a tuple for some empty rows
+        return [(name, [tuple(row) for row in rows]) for name, rows in reader.iter_sheets(file_path)]
+    
+    for file_path in sorted(samples.glob("*.xlsx")):
+        expected = sheets(OpenpyxlReader(), file_path)
+        actual = sheets(XlsxReader(), file_path)
+        assert actual == expected, file_path.name
+
+
+def test_xlsx_records_match_openpyxl(samples, reference):
+    assert_same_records(parse(samples, XlsxReader.name), reference)
+
+
+@pytest.mark.parametrize("reader, extension", [('csv', '.csv'), ('text', '.txt')])
+def test_text_records_match_openpyxl(samples, reference, tmp_path, reader, extension):
+    convert_folder(str(samples), str(tmp_path), extension)
+    assert_same_records(parse(tmp_path, reader), reference)
+
+
+def test_default_reader_for_workbooks(samples):
+    assert isinstance(reader_for(next(samples.glob("*.xlsx"))), XlsxReader)
+
+@pytest.mark.parametrize("reader, extension", [('xlsx', None), ('csv', '.csv'), ('text', '.txt')])
+def test_synthetic_records_match_openpyxl(tmp_path, reader, extension):
+    from utils.synthetic_reports import generate_dataset
+    
+    if not OpenpyxlReader.available():
+        pytest.skip("openpyxl is not installed")
+    reports = tmp_path / "reports"
+    generate_dataset(str(reports), 2, 2, 3, 40, 2, 1, True, 0)
+    folder = reports
+    if extension:
+        folder = tmp_path / reader
+        convert_folder(str(reports), str(folder), extension)
+    assert_same_records(parse(folder, reader), parse(reports, OpenpyxlReader.name))
\ No newline at end of file
@@ -0,0 +1,62 @@
+import sqlite3
+
+import numpy as np
+
+from core.types import AnalysisResult
+from core.results_db import ResultsDatabase
+from core.record_store import RecordStoreBuilder
+
+
+def result(item: str, distance: float) -> AnalysisResult:
+    return AnalysisResult(item, "Leak", "1.5/F", distance, "Linear", -40.0, "Vapour", "1", "a.xlsx")
+
+
+def curves():
+    builder = RecordStoreBuilder()
+    builder.append([0.0, 10.0, 20.0], [-80.0, -50.0, -20.0], equipment_item="Pump", observer="1")
+    return builder.build()
+
+
+def test_staging_does_not_lock_database(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    with ResultsDatabase(path) as database:
+        writer = database.begin_study(str(tmp_path / "a.xlsx"))
+        writer.add_results(result(f"Pump {i}", float(i)) for i in range(50))
+        writer.add_curves(curves())
+        
+        # Another run can write while this one is still adding rows
+        other = sqlite3.connect(path, timeout=0)
+        other.isolation_level = None
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+        assert other.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+        
+        writer.commit()
+        assert other.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 50
+        other.close()
+        
+        rows = database.query_results(-40.0, limit=1)
+        assert rows[0]['subsection'] == "Pump 49"
+        loaded = database.load_curves()
+        assert len(loaded) == 1
+        np.testing.assert_array_equal(loaded.distances, [0.0, 10.0, 20.0])
+
+
+def test_rollback_keeps_previous_study(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    output_file = str(tmp_path / "a.xlsx")
+    with ResultsDatabase(path) as database:
+        writer = database.begin_study(output_file)
+        writer.add_results([result("Pump", 12.0)])
+        writer.commit()
+        
+        writer = database.begin_study(output_file)
+        writer.add_results([result("Pump", 99.0), result("Valve", 5.0)])
+        writer.rollback()
+        assert [row['distance'] for row in database.query_results()] == [12.0]
+        
+        writer = database.begin_study(output_file)
+        writer.add_results([result("Valve", 5.0)])
+        writer.commit()
+        assert [row['subsection'] for row in database.query_results()] == ["Valve"]
+        assert len(database.studies()) == 1
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pytest
+
+from core.types import InterpolationMethod, ObserverSelection, TemperatureType
+from core.pipeline import AnalysisPipeline
+
+pytest.importorskip("PyQt5.QtWidgets")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="module")
+def app():
+    from PyQt5.QtWidgets import QApplication
+    
+    return QApplication.instance() or QApplication([])
+
+
+def table(model):
+    """Rows shown in a results table as (label columns..., distance), distance None if blank."""
+    from gui.results_tab import DISTANCE_COLUMN
+    
+    rows = []
+    for row in range(model.rowCount()):
+        values = [model.data(model.index(row, column)) for column in range(model.columnCount())]
+        distance = values.pop(DISTANCE_COLUMN)
+        rows.append((*values, float(distance) if distance else None))
+    return rows
+
+
+@pytest.mark.parametrize("selection", list(ObserverSelection))
+def test_rows_match_export(app, samples, selection):
+    from gui.results_tab import ResultsTab
+    
+    config = {
+        'input_folder': str(samples),
+        'temperature_types': [t.value for t in TemperatureType],
+        'temperatures_of_interest': [-40.0],
+        'interpolation_method': InterpolationMethod.LINEAR.value,
+        'observer_selection': selection.value,
+        'keep_records': True
+    }
+    pipeline = AnalysisPipeline(config)
+    results = pipeline.run()
+    
+    tab = ResultsTab()
+    tab.set_records(pipeline.records, -40.0, InterpolationMethod.LINEAR, 6, selection)
+    shown = table(tab.model)
+    exported = [
+        (r.subsection, r.scenario, r.weather, r.temperature_type, r.observer, r.source_file,
+         round(r.downwind_distance, 6))
+        for r in results
+    ]
+    assert sorted(row for row in shown if row[-1] is not None) == sorted(exported)
+    assert any(row[4] == 'Max' for row in shown) == (selection != ObserverSelection.FIRST)
+
+
+def test_sweep_of_max_row(app, samples):
+    from core.interpolation import InterpolationEngine
+    from gui.results_tab import ResultsTab
+    from core.excel_processor import ExcelProcessor
+    
+    records = ExcelProcessor([TemperatureType.VAPOUR]).process_files(str(samples))
+    tab = ResultsTab()
+    tab.set_records(records, -40.0, InterpolationMethod.LINEAR, 2, ObserverSelection.MAXIMUM)
+    tab.table_view.selectRow(0)
+    tab.run_sweep()
+    
+    row = tab.model.row_index(0)
+    block = records.subset(tab.rows.members(row))
+    thresholds = tab.sweep_model._thresholds
+    expected = np.fmax.reduce(
+        InterpolationEngine.interpolate_store(block, thresholds, InterpolationMethod.LINEAR), axis=0
+    )
+    np.testing.assert_allclose(tab.sweep_model._distances[0], expected)
\ No newline at end of file
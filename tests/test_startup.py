@@ -0,0 +1,20 @@
+import pytest
+
+from benchmark import measure_startup, STARTUP_MODULES, LAZY_MODULES
+
+
+# Import time allowed for an entry point; it takes about 0.2 s, and loading
+# SciPy or pandas eagerly would add about as much again
+STARTUP_BUDGET_SECONDS = 1.0
+
+
+@pytest.mark.parametrize("module", list(STARTUP_MODULES.values()))
+def test_entry_point_imports_lazily(module):
+    # Fastest of a few fresh interpreters, so a busy machine does not fail the budget
+    results = [measure_startup(module) for _ in range(3)]
+    if results[0] is None:
+        pytest.skip(f"{module} cannot be imported here")
+    
+    assert results[0]['eager'] == [], f"{module} imports {', '.join(results[0]['eager'])} at start-up"
+    seconds = min(result['seconds'] for result in results)
+    assert seconds < STARTUP_BUDGET_SECONDS, f"{module} takes {seconds:.2f} s to import"
\ No newline at end of file